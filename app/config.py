@@ -27,11 +27,43 @@ def _get_int(name: str, default: int) -> int:
         return int(default)
 
 
+def _get_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return float(default)
+
+
 @dataclass
 class Settings:
     # DB
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
 
+    # Profil SQLite (app/database.py, PRAGMA-uri la fiecare conexiune nouă; ignorate pe PostgreSQL)
+    # - WAL: cititorii nu mai sunt blocați de scrieri (audit, rate-limit, import) => fără "database is locked"
+    # - SQLITE_WRITE_SPLIT: scrierile bulk (import, audit batch, janitor) trec printr-o singură conexiune
+    #   de scriere (BEGIN IMMEDIATE), la coadă în proces, în loc să se bată pe lock-ul fișierului
+    sqlite_wal: bool = _get_bool("SQLITE_WAL", "true")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()  # NORMAL e sigur în WAL (fără corupere)
+    sqlite_busy_timeout_ms: int = _get_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    sqlite_cache_size_mb: int = _get_int("SQLITE_CACHE_SIZE_MB", 64)  # per conexiune
+    sqlite_mmap_size_mb: int = _get_int("SQLITE_MMAP_SIZE_MB", 256)  # 0 = fără mmap
+    sqlite_write_split: bool = _get_bool("SQLITE_WRITE_SPLIT", "true")
+    sqlite_write_pool_timeout_seconds: float = _get_float("SQLITE_WRITE_POOL_TIMEOUT_SECONDS", 30.0)
+
+    # Replică de citire (PostgreSQL streaming replica): listări / statistici pe DATABASE_REPLICA_URL.
+    # Gol => totul pe primar. Read-your-writes: după un POST/PUT/PATCH/DELETE reușit, tenantul citește
+    # de pe primar REPLICA_PIN_SECONDS (trebuie să acopere lag-ul obișnuit al replicii).
+    database_replica_url: str = os.getenv("DATABASE_REPLICA_URL", "")
+    replica_pin_seconds: int = _get_int("REPLICA_PIN_SECONDS", 10)
+    replica_pin_max_keys: int = _get_int("REPLICA_PIN_MAX_KEYS", 100000)
+
+    # Calea async (app/database.py: async_engine / AsyncSessionLocal) pentru rutele dominate de I/O extern
+    # (trimitere SMS, sold, checkout). Gol => derivat din DATABASE_URL (sqlite+aiosqlite / postgresql+asyncpg).
+    database_async_url: str = os.getenv("DATABASE_ASYNC_URL", "")
+    async_db_pool_size: int = _get_int("ASYNC_DB_POOL_SIZE", 10)
+    async_db_max_overflow: int = _get_int("ASYNC_DB_MAX_OVERFLOW", 10)
+
     # DEV bootstrap (în prod: false + migrații)
     db_auto_create: bool = _get_bool("DB_AUTO_CREATE", "true")
 
@@ -44,6 +76,61 @@ class Settings:
     # SMS
     smsapi_token: str = os.getenv("SMSAPI_TOKEN", "")
     smsapi_sender: str = os.getenv("SMSAPI_SENDER", "")
+    # Local/load-test: http://127.0.0.1:8025 (scripts/dev/fake_smsapi.py); fără slash final
+    smsapi_base_url: str = os.getenv("SMSAPI_BASE_URL", "https://api.smsapi.ro").rstrip("/")
+    smsapi_timeout_seconds: float = _get_float("SMSAPI_TIMEOUT_SECONDS", 10.0)
+
+    # Client HTTP async comun (services/http_client.py) pentru provideri (SMSAPI): pool per worker
+    http_max_connections: int = _get_int("HTTP_MAX_CONNECTIONS", 100)
+    http_max_keepalive: int = _get_int("HTTP_MAX_KEEPALIVE", 20)
+    http_keepalive_expiry_seconds: float = _get_float("HTTP_KEEPALIVE_EXPIRY_SECONDS", 30.0)
+
+    # Scheduler SMS (per proces): rată per cont SMSAPI + coadă limitată per tenant
+    sms_rate_per_second: float = _get_float("SMS_RATE_PER_SECOND", 5.0)
+    sms_rate_burst: float = _get_float("SMS_RATE_BURST", 10.0)
+    sms_max_queue_per_tenant: int = _get_int("SMS_MAX_QUEUE_PER_TENANT", 20)
+    sms_queue_timeout_seconds: float = _get_float("SMS_QUEUE_TIMEOUT_SECONDS", 15.0)
+
+    # Bulk: câți destinatari per apel sms.do și câte comenzi per request
+    sms_batch_max_recipients: int = _get_int("SMS_BATCH_MAX_RECIPIENTS", 100)
+    sms_bulk_max_orders: int = _get_int("SMS_BULK_MAX_ORDERS", 500)
+
+    # Template SMS: mod transliterare implicit (off/auto/always) + ținta de segmente pentru "auto"
+    sms_transliteration_default: str = os.getenv("SMS_TRANSLITERATION_DEFAULT", "off")
+    sms_target_segments: int = _get_int("SMS_TARGET_SEGMENTS", 3)
+
+    # Cache sold SMSAPI (/profile): proaspăt TTL secunde, servit "stale" până la MAX_STALE cât se reîmprospătează
+    sms_balance_ttl_seconds: float = _get_float("SMS_BALANCE_TTL_SECONDS", 30.0)
+    sms_balance_max_stale_seconds: float = _get_float("SMS_BALANCE_MAX_STALE_SECONDS", 600.0)
+
+    # Callback rapoarte de livrare SMSAPI: URL-ul din panoul SMSAPI trebuie să conțină ?key=<secret>
+    smsapi_callback_secret: str = os.getenv("SMSAPI_CALLBACK_SECRET", "")
+
+    # Cotă lunară SMS reușite per tenant (0 = dezactivată) + cât trăiește o rezervare neconfirmată
+    sms_monthly_quota: int = _get_int("SMS_MONTHLY_QUOTA", 0)
+    sms_quota_reservation_ttl_seconds: int = _get_int("SMS_QUOTA_RESERVATION_TTL_SECONDS", 300)
+
+    # Retenție (zile; 0 = păstrăm tot): rândurile mai vechi se arhivează (JSONL gzip per lună) și se șterg în loturi
+    # (scripts/maintenance/retention.py)
+    sms_log_retention_days: int = _get_int("SMS_LOG_RETENTION_DAYS", 365)
+    audit_log_retention_days: int = _get_int("AUDIT_LOG_RETENTION_DAYS", 180)
+    retention_archive_dir: str = os.getenv("RETENTION_ARCHIVE_DIR", "./data/archive")
+    retention_batch_size: int = _get_int("RETENTION_BATCH_SIZE", 1000)
+
+    # Audit asincron (services/audit_writer.py): buffer in-process + INSERT batch la N rânduri / interval
+    audit_async: bool = _get_bool("AUDIT_ASYNC", "true")
+    audit_batch_size: int = _get_int("AUDIT_BATCH_SIZE", 200)
+    audit_flush_interval_ms: int = _get_int("AUDIT_FLUSH_INTERVAL_MS", 500)
+    audit_max_buffer: int = _get_int("AUDIT_MAX_BUFFER", 10000)
+
+    # Janitor (services/janitor.py): șterge în loturi tokenuri expirate / folosite / revocate, chei rate-limit
+    # inactive și rezervări de cotă decontate, după JANITOR_GRACE_HOURS.
+    # - thread în fiecare worker la JANITOR_INTERVAL_SECONDS (0 = oprit; atunci cron cu scripts/maintenance/janitor.py)
+    janitor_interval_seconds: int = _get_int("JANITOR_INTERVAL_SECONDS", 900)
+    janitor_grace_hours: int = _get_int("JANITOR_GRACE_HOURS", 24)
+    janitor_batch_size: int = _get_int("JANITOR_BATCH_SIZE", 500)
+    janitor_max_batches: int = _get_int("JANITOR_MAX_BATCHES", 50)  # per tabel per rulare; 0 = până la capăt
+    janitor_pause_ms: int = _get_int("JANITOR_PAUSE_MS", 20)
 
     # =========================
     # Stripe Billing (Subscriptions)
@@ -73,6 +160,18 @@ class Settings:
     # Debug
     debug: bool = _get_bool("DEBUG", "false")
 
+    # Instrumentare per request (services/request_timing.py + middleware/request_timing.py):
+    # query-uri + timp DB, timp la provideri (SMSAPI / Stripe / SMTP), timp în handler.
+    # - Server-Timing: mereu în DEBUG; pe staging fără DEBUG => SERVER_TIMING_HEADER=true (nu în prod: expune interne)
+    # - REQUEST_TIMING_LOG: o linie logfmt per request (logger app.request_timing, nivel INFO și în prod);
+    #   REQUEST_TIMING_LOG_MIN_MS > 0 => doar request-urile mai lente
+    # - SLOW_QUERY_MS: statement-urile mai lente => WARNING cu ruta (0 = dezactivat)
+    request_timing_enabled: bool = _get_bool("REQUEST_TIMING_ENABLED", "true")
+    server_timing_header: bool = _get_bool("SERVER_TIMING_HEADER", "false")
+    request_timing_log: bool = _get_bool("REQUEST_TIMING_LOG", "true")
+    request_timing_log_min_ms: float = _get_float("REQUEST_TIMING_LOG_MIN_MS", 0.0)
+    slow_query_ms: float = _get_float("SLOW_QUERY_MS", 500.0)
+
     # JWT / tokens
     jwt_secret: str = os.getenv("JWT_SECRET", "")
     jwt_issuer: str = os.getenv("JWT_ISSUER", "smssend-by-swg")
@@ -81,6 +180,15 @@ class Settings:
     access_token_expire_minutes: int = _get_int("ACCESS_TOKEN_EXPIRE_MINUTES", 15)
     refresh_token_expire_days: int = _get_int("REFRESH_TOKEN_EXPIRE_DAYS", 30)
 
+    # JWT: backend de semnare / verificare ("jose" = python-jose, implicit; "pyjwt" = PyJWT, opțional, mai rapid)
+    # + cache per proces cu payload-urile deja verificate (cheie = digest token; 0 = oprit)
+    jwt_backend: str = os.getenv("JWT_BACKEND", "jose").strip().lower()
+    jwt_cache_max_entries: int = _get_int("JWT_CACHE_MAX_ENTRIES", 10000)
+
+    # Cache user autentificat (per proces) pentru rutele de citire; 0 = dezactivat
+    user_cache_ttl_seconds: float = _get_float("USER_CACHE_TTL_SECONDS", 30.0)
+    user_cache_max_entries: int = _get_int("USER_CACHE_MAX_ENTRIES", 10000)
+
     # Secrete (pepper) – OBLIGATORII în prod
     password_pepper: str = os.getenv("PASSWORD_PEPPER", "")
     token_pepper: str = os.getenv("TOKEN_PEPPER", "")
@@ -103,6 +211,18 @@ class Settings:
     smtp_from: str = os.getenv("SMTP_FROM", "")
     smtp_tls: bool = _get_bool("SMTP_TLS", "true")
 
+    # Outbox email (services/email_outbox.py + services/email_sender.py): request-ul doar pune mesajul în
+    # email_outbox; un thread de fundal îl trimite pe o conexiune SMTP autentificată, refolosită între mesaje.
+    email_sender_enabled: bool = _get_bool("EMAIL_SENDER_ENABLED", "true")  # false => alt worker golește outbox-ul
+    email_outbox_poll_seconds: float = _get_float("EMAIL_OUTBOX_POLL_SECONDS", 5.0)
+    email_batch_size: int = _get_int("EMAIL_BATCH_SIZE", 50)
+    email_max_attempts: int = _get_int("EMAIL_MAX_ATTEMPTS", 6)
+    email_retry_base_seconds: int = _get_int("EMAIL_RETRY_BASE_SECONDS", 30)  # 30s, 60s, 120s ... (exponențial)
+    email_retry_max_seconds: int = _get_int("EMAIL_RETRY_MAX_SECONDS", 3600)
+    email_send_lease_seconds: int = _get_int("EMAIL_SEND_LEASE_SECONDS", 300)  # 'sending' blocat (crash) => reluat după
+    email_smtp_idle_seconds: int = _get_int("EMAIL_SMTP_IDLE_SECONDS", 60)  # închidem conexiunea după atâta inactivitate
+    email_smtp_timeout_seconds: float = _get_float("EMAIL_SMTP_TIMEOUT_SECONDS", 12.0)
+
     # =========================
     # Reset password (enterprise)
     # =========================
@@ -121,7 +241,11 @@ class Settings:
     reset_password_window_seconds_email: int = _get_int("RESET_PASSWORD_WINDOW_SECONDS_EMAIL", 3600)
     reset_password_block_seconds_email: int = _get_int("RESET_PASSWORD_BLOCK_SECONDS_EMAIL", 3600)
 
-    # Rate limit (DB-backed)
+    # Rate limit (services/rate_limit.py)
+    # - RATE_LIMIT_BACKEND: "db" (tabela rate_limits, multi-worker / multi-node) | "memory" (un singur proces)
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "db").strip().lower()
+    rate_limit_memory_max_keys: int = _get_int("RATE_LIMIT_MEMORY_MAX_KEYS", 100000)
+
     # - login: IP + email
     login_max_attempts_ip: int = _get_int("LOGIN_MAX_ATTEMPTS_IP", 30)
     login_window_seconds_ip: int = _get_int("LOGIN_WINDOW_SECONDS_IP", 300)
@@ -140,5 +264,36 @@ class Settings:
     lockout_fail_threshold: int = _get_int("LOCKOUT_FAIL_THRESHOLD", 10)
     lockout_seconds: int = _get_int("LOCKOUT_SECONDS", 900)
 
+    # Throttle global in-memory (middleware/request_throttle.py), per worker uvicorn, fără DB:
+    # token bucket = BURST cereri imediat, apoi PER_MINUTE / minut; per IP și (read / write) per user.
+    throttle_enabled: bool = _get_bool("THROTTLE_ENABLED", "true")
+    throttle_max_keys: int = _get_int("THROTTLE_MAX_KEYS", 100000)
+
+    throttle_auth_ip_per_minute: int = _get_int("THROTTLE_AUTH_IP_PER_MINUTE", 60)
+    throttle_auth_ip_burst: int = _get_int("THROTTLE_AUTH_IP_BURST", 20)
+
+    throttle_read_ip_per_minute: int = _get_int("THROTTLE_READ_IP_PER_MINUTE", 600)
+    throttle_read_ip_burst: int = _get_int("THROTTLE_READ_IP_BURST", 120)
+    throttle_read_user_per_minute: int = _get_int("THROTTLE_READ_USER_PER_MINUTE", 300)
+    throttle_read_user_burst: int = _get_int("THROTTLE_READ_USER_BURST", 60)
+
+    throttle_write_ip_per_minute: int = _get_int("THROTTLE_WRITE_IP_PER_MINUTE", 240)
+    throttle_write_ip_burst: int = _get_int("THROTTLE_WRITE_IP_BURST", 60)
+    throttle_write_user_per_minute: int = _get_int("THROTTLE_WRITE_USER_PER_MINUTE", 120)
+    throttle_write_user_burst: int = _get_int("THROTTLE_WRITE_USER_BURST", 30)
+
+    # Hashing parole (Argon2) într-un process pool separat, per worker uvicorn:
+    # - PASSWORD_HASH_WORKERS procese (0 = inline în threadpool, doar dev)
+    # - peste workers + PASSWORD_HASH_MAX_QUEUE cereri în curs => 503 + Retry-After
+    password_hash_workers: int = _get_int("PASSWORD_HASH_WORKERS", 2)
+    password_hash_max_queue: int = _get_int("PASSWORD_HASH_MAX_QUEUE", 16)
+    password_hash_timeout_seconds: float = _get_float("PASSWORD_HASH_TIMEOUT_SECONDS", 10.0)
+
+    # Parametri Argon2 (calibrați per host: scripts/maintenance/calibrate_argon2.py --write .env)
+    # Hash-urile cu alți parametri se rehash-uiesc la login (needs_password_rehash).
+    argon2_time_cost: int = _get_int("ARGON2_TIME_COST", 3)
+    argon2_memory_cost: int = _get_int("ARGON2_MEMORY_COST", 65536)  # KiB
+    argon2_parallelism: int = _get_int("ARGON2_PARALLELISM", 4)
+
 
 settings = Settings()
@@ -2,10 +2,39 @@
 # Scop:
 #   - Creează engine SQLAlchemy și SessionLocal.
 #   - Asigură directorul data/ există pentru SQLite.
+#   - dialect_insert(): INSERT cu ON CONFLICT (upsert) pentru SQLite / PostgreSQL.
+#   - SQLite: PRAGMA-uri de producție pe fiecare conexiune (WAL, synchronous, busy_timeout, cache, mmap)
+#     + write_engine / WriteSessionLocal: calea de scriere cu un singur writer (import, audit batch, janitor).
+#   - replica_engine / ReadSessionLocal: replica de citire (DATABASE_REPLICA_URL) pentru rutele read-only
+#     (deps/db.get_read_db); fără replică sunt engine / SessionLocal.
+#   - async_engine / AsyncSessionLocal: aceeași bază prin driver async (aiosqlite / asyncpg) pentru rutele
+#     `async def` care așteaptă mult după provideri externi (deps/db.get_async_db).
+#
+# Reguli (SQLite):
+#   - WAL: un writer și oricâți cititori în paralel; cititorii văd ultimul commit, nu sunt blocați.
+#   - engine (citiri + scrieri scurte din request): pysqlite deschide tranzacția abia la primul
+#     INSERT/UPDATE/DELETE, deci SELECT-urile nu țin lock (vezi services/unit_of_work.py).
+#   - write_engine: pool de O conexiune + BEGIN IMMEDIATE => scrierile bulk din același proces stau la coadă
+#     în pool (SQLITE_WRITE_POOL_TIMEOUT_SECONDS) în loc să primească SQLITE_BUSY; lock-ul de scriere
+#     se ia la începutul tranzacției, deci nu există upgrade citire -> scriere care să eșueze.
+#   - Între procese (workeri uvicorn, scripturi) contenția rămâne pe lock-ul fișierului => busy_timeout.
+#   - PostgreSQL / SQLITE_WRITE_SPLIT=false: write_engine este engine, WriteSessionLocal este SessionLocal.
+#
+# Reguli (async):
+#   - Pool separat de cel sync (ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW); pe SQLite O conexiune
+#     (ca write_engine: scrierile din rutele async stau la coadă în proces) + aceleași PRAGMA-uri.
+#   - expire_on_commit=False: după commit atributele rămân citibile fără I/O implicit (interzis în async).
+#   - Rutele async închid tranzacția ÎNAINTE de apelul extern => conexiunea se întoarce în pool cât
+#     așteptăm SMSAPI / Stripe, nu stă ocupată de request.
+#
+# Debug:
+#   - PRAGMA journal_mode; => "wal" (fișierele app.db-wal / app.db-shm lângă app.db sunt normale).
+#   - python scripts/bench/sqlite_concurrency.py => citiri / erori "database is locked" cu și fără profil.
 
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from .config import settings
@@ -14,12 +43,117 @@ from .config import settings
 data_dir = Path("./data")
 data_dir.mkdir(parents=True, exist_ok=True)
 
+is_sqlite = settings.database_url.startswith("sqlite")
+
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _apply_sqlite_pragmas(dbapi_conn, connection_record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        if settings.sqlite_wal:
+            cur.execute("PRAGMA journal_mode=WAL")  # persistent în fișier; ieftin de repetat
+        if settings.sqlite_synchronous in _SYNCHRONOUS_MODES:
+            cur.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        if settings.sqlite_busy_timeout_ms > 0:
+            cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        if settings.sqlite_cache_size_mb > 0:
+            cur.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_mb) * 1024}")  # negativ = KiB
+        if settings.sqlite_mmap_size_mb > 0:
+            cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}")
+    finally:
+        cur.close()
+
+
+def _begin_immediate(conn) -> None:
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
+    connect_args={"check_same_thread": False} if is_sqlite else {},
     pool_pre_ping=True,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if is_sqlite:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+if is_sqlite and settings.sqlite_write_split:
+    # isolation_level=None: pysqlite nu mai emite BEGIN-ul lui (DEFERRED); îl emitem noi, IMMEDIATE
+    write_engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False, "isolation_level": None},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_write_pool_timeout_seconds,
+        pool_pre_ping=True,
+    )
+    event.listen(write_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(write_engine, "begin", _begin_immediate)
+    WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+else:
+    write_engine = engine
+    WriteSessionLocal = SessionLocal
+
+if settings.database_replica_url:
+    # pool separat: citirile grele nu mai ocupă conexiuni din pool-ul primarului
+    replica_engine = create_engine(settings.database_replica_url, pool_pre_ping=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+else:
+    replica_engine = engine
+    ReadSessionLocal = SessionLocal
+
+
+def _async_url(url: str) -> str:
+    """
+    DATABASE_URL sync -> echivalentul async (driverul din URL e înlocuit).
+    Alte dialecte: setează explicit DATABASE_ASYNC_URL.
+    """
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+if is_sqlite:
+    # o singură conexiune: task-urile așteaptă în pool (fără thread), nu pe lock-ul fișierului;
+    # cu N conexiuni aiosqlite, tranzacțiile de scriere se întind pe mai multe treceri prin event loop
+    # și sub concurență mare expiră busy_timeout ("database is locked")
+    async_engine = create_async_engine(
+        settings.database_async_url or _async_url(settings.database_url),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_write_pool_timeout_seconds,
+        pool_pre_ping=True,
+    )
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+else:
+    async_engine = create_async_engine(
+        settings.database_async_url or _async_url(settings.database_url),
+        pool_size=settings.async_db_pool_size,
+        max_overflow=settings.async_db_max_overflow,
+        pool_pre_ping=True,
+    )
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+def dialect_insert(table):
+    """
+    insert() specific dialectului curent, ca să avem .on_conflict_do_update() (SQLite >= 3.24, PostgreSQL).
+    Pentru alte dialecte întoarce insert() generic (fără upsert) => apelantul trebuie să verifice.
+    """
+    name = engine.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table)
+    return insert(table)
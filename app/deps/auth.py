@@ -1,10 +1,15 @@
 # FILE: app/deps/auth.py
 # Scop:
-#   - get_current_user pe Bearer token (access token).
+#   - get_current_user pe Bearer token (access token) => obiect ORM User (load din DB).
+#   - get_current_user_cached => snapshot CachedUser din cache-ul per proces (fără SELECT pe hot path).
 #
 # Observație:
 #   - cerem email verificat pentru acces la API (dashboard).
 #   - pentru endpoint-uri publice (register/login/verify/refresh/logout) nu folosim dependency-ul.
+#   - rutele care modifică userul (setări, checkout) folosesc get_current_user; rutele de citire
+#     folosesc get_current_user_cached (vezi services/auth/user_cache.py).
+
+from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -12,21 +17,24 @@ from sqlalchemy.orm import Session
 
 from ..models import User
 from ..security import decode_token
+from ..services.auth.user_cache import CachedUser, user_cache
 from .db import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def _user_id_from_token(token: str) -> int:
     payload = decode_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalid sau expirat")
 
     try:
-        user_id = int(payload["sub"])
+        return int(payload["sub"])
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalid")
 
+
+def _load_user(db: Session, user_id: int, generation: Optional[int] = None) -> User:
     user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User inexistent sau inactiv")
@@ -34,4 +42,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if not user.email_verified_at:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email neverificat")
 
+    user_cache.put(CachedUser.from_user(user), generation)
     return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    user_id = _user_id_from_token(token)
+    return _load_user(db, user_id, user_cache.generation(user_id))
+
+
+def get_current_user_cached(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CachedUser:
+    """
+    Ca get_current_user, dar servit din cache; la miss citește userul prin sesiunea request-ului
+    (aceeași cu a rutei dacă și ea cere get_db). Session e leneșă => la hit nu se ia nicio conexiune.
+    """
+    user_id = _user_id_from_token(token)
+    cached, generation = user_cache.get(user_id) if user_cache.enabled else (None, None)
+    if cached is not None:
+        if not cached.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User inexistent sau inactiv")
+        if not cached.email_verified_at:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email neverificat")
+        return cached
+
+    return CachedUser.from_user(_load_user(db, user_id, generation))
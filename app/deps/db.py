@@ -1,15 +1,26 @@
 # FILE: app/deps/db.py
 # Scop:
 #   - Dependency standard pentru Session SQLAlchemy (per request).
+#   - get_write_db: sesiune pe calea de scriere (SQLite: un singur writer, BEGIN IMMEDIATE) pentru
+#     endpoint-urile care scriu în bulk (import Excel). Pe PostgreSQL e identică cu get_db.
+#   - get_read_db: sesiune pe replica de citire (DATABASE_REPLICA_URL) pentru rutele DOAR de citire
+#     (listări, statistici). Tenant pin-uit după o scriere (middleware/read_your_writes.py) => primar.
+#     Fără replică => identică cu get_db.
+#   - get_async_db: AsyncSession (driver async) pentru rutele `async def` care stau după provideri externi
+#     (trimitere SMS, checkout Stripe). Tranzacția se închide înainte de apelul extern (vezi app/database.py).
 #
 # Debug:
 #   - Dacă ai conexiuni blocate, verifică dacă requesturile se închid corect
 #     și dacă ai vreun while/await care ține session deschis.
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import SessionLocal
+from ..database import AsyncSessionLocal, ReadSessionLocal, SessionLocal, WriteSessionLocal
+from ..middleware.read_your_writes import replica_pins
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -18,3 +29,29 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_write_db() -> Generator[Session, None, None]:
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    if not replica_pins.enabled:
+        db = SessionLocal()
+    else:
+        primary = bool(getattr(request.state, "db_primary", False))
+        replica_pins.record_read(primary)
+        db = SessionLocal() if primary else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
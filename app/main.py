@@ -20,15 +20,26 @@
 #   - Routerele sunt importate explicit ca module; nu folosi "from .routes import ...".
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
-from .database import Base, engine
+from .database import Base, async_engine, engine
 from . import models  # asigură înregistrarea modelelor (SQLAlchemy)
+from .middleware.read_your_writes import ReadYourWritesMiddleware
+from .middleware.request_throttle import RequestThrottleMiddleware
+from .middleware.request_timing import RequestTimingMiddleware
 from .middleware.security_headers import SecurityHeadersMiddleware
+from .services.audit_writer import audit_writer
+from .services.auth.password_hasher import password_hasher
+from .services.email_sender import email_sender
+from .services.http_client import http_client
+from .services.janitor import janitor
+from .services.request_timing import request_timing
 
 # Routers (module-level)
 from .routes import (
@@ -39,6 +50,7 @@ from .routes import (
     product_links as product_links_routes,
     password_reset,
     billing,
+    metrics,
 )
 
 
@@ -71,20 +83,64 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
+# httpx (services/http_client.py) loghează fiecare request la INFO => doar avertismente
+logging.getLogger("httpx").setLevel(logging.WARNING)
+# o linie de timing per request și în prod (unde root-ul e pe WARNING)
+if settings.request_timing_log:
+    logging.getLogger("app.request_timing").setLevel(logging.INFO)
+
+# timp / număr de query-uri per request + slow-query log (evenimente pe toate engine-urile)
+request_timing.install()
 
 # Dev bootstrap DB (în prod: migrații)
 if settings.db_auto_create:
     Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup / shutdown per worker uvicorn:
+      - pool-ul de procese pentru Argon2 (login / register / reset parolă);
+      - janitor-ul (tokenuri expirate / chei rate-limit inactive), thread de fundal;
+      - writer-ul de audit (buffer + INSERT batch); la shutdown golește buffer-ul în DB;
+      - sender-ul de email (email_outbox -> SMTP pe conexiune refolosită); ce rămâne netrimis e durabil în DB;
+      - la shutdown: clientul HTTP async comun (provideri) și pool-ul async_engine.
+    """
+    await run_in_threadpool(password_hasher.start)
+    audit_writer.start()
+    janitor.start()
+    email_sender.start()
+    try:
+        yield
+    finally:
+        await run_in_threadpool(email_sender.stop)
+        await run_in_threadpool(janitor.stop)
+        await run_in_threadpool(audit_writer.stop)
+        await run_in_threadpool(password_hasher.shutdown)
+        await http_client.aclose()
+        await async_engine.dispose()
+
+
 app = FastAPI(
     title="eMAG SMS SaaS",
     description="Import comenzi eMAG din Excel, management SMS, multi-tenant, GDPR.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Security headers / CSP
 app.add_middleware(SecurityHeadersMiddleware, is_debug=settings.debug)
 
+# Read-your-writes pentru replica de citire (no-op fără DATABASE_REPLICA_URL)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Throttle global per IP / user (429 înainte de orice altă muncă / DB)
+app.add_middleware(RequestThrottleMiddleware)
+
+# Timing per request (adăugat ultimul => rulează primul: măsoară și throttle / auth)
+app.add_middleware(RequestTimingMiddleware, header=settings.debug or settings.server_timing_header)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(password_reset.router)
@@ -96,6 +152,9 @@ app.include_router(product_links_routes.router)
 # Billing (Stripe) - există ca router (chiar dacă e stub până implementăm complet)
 app.include_router(billing.router)
 
+# Metrici interne per proces (admin)
+app.include_router(metrics.router)
+
 # Static (pentru dev / fallback)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
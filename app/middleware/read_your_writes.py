@@ -0,0 +1,148 @@
+# FILE: app/middleware/read_your_writes.py
+# Scop:
+#   - Read-your-writes pentru replica de citire (DATABASE_REPLICA_URL, app/database.py):
+#     după o scriere reușită a unui tenant, citirile lui merg pe primar REPLICA_PIN_SECONDS,
+#     ca să nu vadă o listă de comenzi / statistici fără ce tocmai a importat / trimis.
+#   - deps/db.get_read_db citește decizia din scope["state"] (request.state.db_primary).
+#
+# Reguli:
+#   - Scriere = POST / PUT / PATCH / DELETE pe /api/... cu răspuns < 400 și Bearer valid (user = `sub`).
+#   - Pin-ul e ținut în două locuri:
+#       * in-process (ReplicaPins, LRU pe user id) — același worker;
+#       * cookie db_primary_until (timestamp unix, Path=/api) — ceilalți workeri uvicorn
+#         (nginx nu are sticky sessions). Cookie-ul nu e semnat: un client care îl falsifică
+#         își trimite doar propriile citiri pe primar.
+#   - Fără replică configurată middleware-ul nu face nimic (nici decode JWT, nici cookie).
+#
+# Limitări:
+#   - Scrierile din fundal (scheduler SMS, DLR callback) nu pin-uiesc: statisticile pot întârzia cât lag-ul replicii.
+#
+# Debug:
+#   - GET /api/metrics (admin) => read_routing: citiri pe replică / primar, pin-uri active.
+#   - Citiri "vechi" după o scriere => crește REPLICA_PIN_SECONDS peste lag-ul replicii
+#     (SELECT now() - pg_last_xact_replay_timestamp(); pe replică).
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..config import settings
+from .request_throttle import bearer_user_id
+
+PIN_COOKIE = "db_primary_until"
+
+_UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class ReplicaPins:
+    def __init__(self, *, enabled: bool, pin_seconds: int, max_keys: int):
+        self.enabled = enabled
+        self.pin_seconds = max(0, int(pin_seconds))
+        self.max_keys = max(1, int(max_keys))
+
+        self._lock = threading.Lock()
+        self._pins: "OrderedDict[str, float]" = OrderedDict()  # user id -> time.time() până la care e pin-uit
+
+        self.pins = 0
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def pin(self, user_id: str, now: Optional[float] = None) -> float:
+        until = (now or time.time()) + self.pin_seconds
+        with self._lock:
+            self._pins[user_id] = until
+            self._pins.move_to_end(user_id)
+            while len(self._pins) > self.max_keys:
+                self._pins.popitem(last=False)
+            self.pins += 1
+        return until
+
+    def is_pinned(self, user_id: Optional[str], cookie_until: Optional[float] = None, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        if cookie_until is not None and cookie_until > now:
+            return True
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._pins.get(user_id)
+            if until is None:
+                return False
+            if until <= now:
+                del self._pins[user_id]
+                return False
+            return True
+
+    def record_read(self, primary: bool) -> None:
+        with self._lock:
+            if primary:
+                self.primary_reads += 1
+            else:
+                self.replica_reads += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "pin_seconds": self.pin_seconds,
+                "active_pins": len(self._pins),
+                "pins": self.pins,
+                "primary_reads": self.primary_reads,
+                "replica_reads": self.replica_reads,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pins.clear()
+
+
+replica_pins = ReplicaPins(
+    enabled=bool(settings.database_replica_url),
+    pin_seconds=settings.replica_pin_seconds,
+    max_keys=settings.replica_pin_max_keys,
+)
+
+
+def _cookie_until(headers) -> Optional[float]:
+    for name, value in headers:
+        if name != b"cookie":
+            continue
+        for part in value.decode("latin-1").split(";"):
+            key, _, raw = part.strip().partition("=")
+            if key == PIN_COOKIE:
+                try:
+                    return float(raw)
+                except ValueError:
+                    return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, *, pins: ReplicaPins = replica_pins):
+        self.app = app
+        self.pins = pins
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.pins.enabled or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        user_id = bearer_user_id(scope["headers"])
+        state = scope.setdefault("state", {})
+        state["db_primary"] = self.pins.is_pinned(user_id, _cookie_until(scope["headers"]))
+
+        if scope["method"] not in _UNSAFE_METHODS or user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = self.pins.pin(user_id)
+                cookie = (
+                    f"{PIN_COOKIE}={int(until) + 1}; Max-Age={self.pins.pin_seconds}; Path=/api; HttpOnly; SameSite=Strict"
+                    + ("; Secure" if settings.cookie_secure else "")
+                )
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())])
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
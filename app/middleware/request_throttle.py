@@ -0,0 +1,216 @@
+# FILE: app/middleware/request_throttle.py
+# Scop:
+#   - Throttle global, ieftin, pe TOATE rutele /api: token bucket in-memory per IP și per user,
+#     înainte de orice sesiune DB (429 fără niciun query).
+#   - Limite per clasă de rută (config THROTTLE_*):
+#       * auth  : login / register / forgot / reset / refresh / verify-email / logout — doar per IP
+#                 (peste ele rămân limitele DB din services/rate_limit.py);
+#       * read  : GET / HEAD / OPTIONS (preflight CORS) pe /api/... — per IP + per user;
+#       * write : POST / PUT / PATCH / DELETE pe /api/... — per IP + per user.
+#   - Scutite: /health, /static, webhook Stripe și callback-ul DLR SMSAPI (vin de pe câteva IP-uri ale
+#     providerului, în rafale după un bulk; un 429 = raport de livrare pierdut / retry-uri Stripe respinse).
+#
+# Reguli:
+#   - Middleware ASGI "pur" (nu BaseHTTPMiddleware): fără wrapping de request/response pe calea normală.
+#   - User-ul = `sub` din JWT-ul Bearer, verificat cu aceeași cheie (security.decode_token), fără DB.
+#     Token lipsă / invalid => doar bucket-ul de IP (ruta răspunde oricum 401).
+#   - Bucket: services/token_bucket.TokenBucket (același ca în scheduler-ul SMS):
+#     `burst` cereri imediat, apoi `per_minute` / 60 pe secundă.
+#
+# Limitări:
+#   - Per proces: cu N workeri uvicorn limita efectivă e până la N × limită (nginx nu are sticky per IP).
+#   - IP-ul e scope["client"]: în spatele nginx rulează uvicorn cu --proxy-headers.
+#
+# Debug:
+#   - GET /api/metrics (admin) => request_throttle: permise / respinse per clasă, chei active.
+#   - THROTTLE_ENABLED=false => dezactivat complet.
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..config import settings
+from ..security import decode_token
+from ..services.token_bucket import TokenBucket
+
+AUTH_PATHS = frozenset(
+    {
+        "/api/auth/login",
+        "/api/auth/register",
+        "/api/auth/forgot-password",
+        "/api/auth/reset-password",
+        "/api/auth/refresh",
+        "/api/auth/verify-email",
+        "/api/auth/logout",
+    }
+)
+EXEMPT_PATHS = frozenset({"/api/billing/webhook", "/api/sms/callback/dlr"})
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass(frozen=True)
+class BucketLimit:
+    per_minute: int
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass(frozen=True)
+class RouteClassLimits:
+    ip: BucketLimit
+    user: Optional[BucketLimit] = None
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """
+    Clasa de limitare pentru (metodă, path); None => scutit.
+    """
+    if not path.startswith("/api/") or path in EXEMPT_PATHS:
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in READ_METHODS:
+        return "read"
+    return "write"
+
+
+class RequestThrottle:
+    def __init__(self, limits: Dict[str, RouteClassLimits], *, max_keys: int = 100000, enabled: bool = True):
+        self.limits = limits
+        self.max_keys = max(1, int(max_keys))
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._allowed: Dict[str, int] = {name: 0 for name in limits}
+        self._denied: Dict[str, int] = {name: 0 for name in limits}
+
+    @classmethod
+    def from_settings(cls) -> "RequestThrottle":
+        s = settings
+        return cls(
+            {
+                "auth": RouteClassLimits(
+                    ip=BucketLimit(s.throttle_auth_ip_per_minute, s.throttle_auth_ip_burst),
+                ),
+                "read": RouteClassLimits(
+                    ip=BucketLimit(s.throttle_read_ip_per_minute, s.throttle_read_ip_burst),
+                    user=BucketLimit(s.throttle_read_user_per_minute, s.throttle_read_user_burst),
+                ),
+                "write": RouteClassLimits(
+                    ip=BucketLimit(s.throttle_write_ip_per_minute, s.throttle_write_ip_burst),
+                    user=BucketLimit(s.throttle_write_user_per_minute, s.throttle_write_user_burst),
+                ),
+            },
+            max_keys=s.throttle_max_keys,
+            enabled=s.throttle_enabled,
+        )
+
+    def check(self, route_class: str, ip: str, user_id: Optional[str]) -> int:
+        """
+        Consumă un token din bucket-ul de IP (și de user, dacă e cazul).
+        Întoarce 0 dacă e permis, altfel Retry-After în secunde.
+        """
+        limits = self.limits[route_class]
+        now = time.monotonic()
+        with self._lock:
+            retry_after = self._take_locked(f"{route_class}:ip:{ip}", limits.ip, now)
+            if not retry_after and limits.user is not None and user_id is not None:
+                retry_after = self._take_locked(f"{route_class}:user:{user_id}", limits.user, now)
+            if retry_after:
+                self._denied[route_class] += 1
+            else:
+                self._allowed[route_class] += 1
+        return retry_after
+
+    def needs_user(self, route_class: str) -> bool:
+        return self.limits[route_class].user is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "keys": len(self._buckets),
+                "allowed": dict(self._allowed),
+                "denied": dict(self._denied),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _take_locked(self, key: str, limit: BucketLimit, now: float) -> int:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate=limit.rate, capacity=limit.burst)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        if bucket.try_take(now=now):
+            return 0
+        return max(1, math.ceil(bucket.seconds_until(now=now)))
+
+
+request_throttle = RequestThrottle.from_settings()
+
+
+_DENIED_BODY = json.dumps({"detail": "Prea multe cereri. Reîncearcă mai târziu."}, ensure_ascii=False).encode("utf-8")
+
+
+def bearer_user_id(headers) -> Optional[str]:
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            payload = decode_token(token.strip())
+            sub = payload.get("sub") if payload else None
+            return str(sub) if sub is not None else None
+    return None
+
+
+class RequestThrottleMiddleware:
+    def __init__(self, app, *, throttle: RequestThrottle = request_throttle):
+        self.app = app
+        self.throttle = throttle
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.throttle.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client: Optional[Tuple[str, int]] = scope.get("client")
+        ip = client[0] if client else "unknown"
+        user_id = bearer_user_id(scope["headers"]) if self.throttle.needs_user(route_class) else None
+
+        retry_after = self.throttle.check(route_class, ip, user_id)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_DENIED_BODY)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _DENIED_BODY})
@@ -0,0 +1,43 @@
+# FILE: app/middleware/request_timing.py
+# Scop:
+#   - Deschide contorii per request (services/request_timing.py) și îi raportează:
+#       * header Server-Timing (DEBUG / SERVER_TIMING_HEADER=true): db (+ nr. query-uri), smsapi / stripe / smtp,
+#         app (handler fără DB și provideri), total;
+#       * o linie de log structurată la finalul request-ului (REQUEST_TIMING_LOG), inclusiv în prod.
+#
+# Reguli:
+#   - Middleware-ul cel mai din exterior (adăugat ultimul în app/main.py) => prinde și DB-ul din throttle / auth.
+#   - "total" = până la începutul răspunsului (headerele pleacă atunci); corpul unui StreamingResponse nu intră.
+#   - Request-urile non-HTTP (websocket, lifespan) trec neatinse.
+#
+# Debug:
+#   - curl -si http://127.0.0.1:8000/api/orders -H "Authorization: Bearer ..." | grep -i server-timing
+
+from ..services.request_timing import RequestTimingRecorder, request_timing
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app, *, recorder: RequestTimingRecorder = request_timing, header: bool = False):
+        self.app = app
+        self.recorder = recorder
+        self.header = header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.recorder.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = self.recorder.begin(scope)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings.finish(message["status"])
+                if self.header:
+                    headers = list(message.get("headers", [])) + [(b"server-timing", timings.server_timing().encode())]
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.recorder.end(timings, token)
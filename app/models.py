@@ -1,6 +1,9 @@
 # FILE: app/models.py
 # Scop:
-#   - Modele DB: User, Order, ProductLink, SmsLog, AuditLog + auth tokens + rate-limit state.
+#   - Modele DB: User, Order, ProductLink, SmsLog, SmsDailyStat, AuditLog + auth tokens + rate-limit state.
+#   - Cotă lunară SMS: SmsQuotaCounter (un rând per tenant + lună) + SmsQuotaReservation.
+#   - SmsSendHistory: istoric anti-duplicat (telefon + PNK), păstrat și după retenția pe sms_logs.
+#   - EmailOutbox: coadă durabilă de emailuri, trimise în fundal (services/email_sender.py).
 #
 # Observații enterprise:
 #   - email_normalized are UNIQUE => previne dubluri (case-insensitive).
@@ -18,11 +21,13 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Date,
     Text,
     ForeignKey,
     DECIMAL,
     Boolean,
     CheckConstraint,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -46,6 +51,12 @@ class User(Base):
 
     # Parolă (argon2 hash)
     password_hash = Column(String(255), nullable=False)
+    # Schema hash-ului: "argon2+pepper" / "argon2" (legacy, fără pepper); NULL = netagat (cont vechi)
+    # => verify_password face o singură verificare Argon2 când schema e cunoscută.
+    # Debug:
+    # - DB existentă => ALTER TABLE users ADD COLUMN password_scheme VARCHAR(16);
+    #   apoi python scripts/maintenance/password_schemes.py report
+    password_scheme = Column(String(16), nullable=True)
 
     # Identitate
     first_name = Column(String(128), nullable=False)
@@ -79,6 +90,13 @@ class User(Base):
     smsapi_token = Column(String(255), nullable=True)
     smsapi_sender = Column(String(32), nullable=True)
     sms_company_name = Column(String(255), nullable=True)
+    # Template SMS propriu ({company}, {review_url}); NULL => template-ul implicit
+    # Transliterare: off / auto / always; NULL => SMS_TRANSLITERATION_DEFAULT
+    # Debug:
+    # - DB existentă => ALTER TABLE users ADD COLUMN sms_template TEXT;
+    #                   ALTER TABLE users ADD COLUMN sms_transliteration VARCHAR(8);
+    sms_template = Column(Text, nullable=True)
+    sms_transliteration = Column(String(8), nullable=True)
 
     # =========================
     # Stripe (Billing)
@@ -114,7 +132,9 @@ class RefreshToken(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False, index=True)
-    revoked_at = Column(DateTime, nullable=True)
+    # index: janitor-ul șterge tokenurile revocate (rotite) după grație
+    # (DB existentă => CREATE INDEX ix_refresh_tokens_revoked_at ON refresh_tokens (revoked_at);)
+    revoked_at = Column(DateTime, nullable=True, index=True)
 
     ip = Column(String(64), nullable=True)
     user_agent = Column(String(255), nullable=True)
@@ -132,14 +152,16 @@ class EmailVerificationToken(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False, index=True)
-    used_at = Column(DateTime, nullable=True)
+    # index: janitor (DB existentă => CREATE INDEX ix_email_verification_tokens_used_at ON email_verification_tokens (used_at);)
+    used_at = Column(DateTime, nullable=True, index=True)
 
     user = relationship("User", back_populates="email_verification_tokens")
 
 
 class RateLimitState(Base):
     """
-    Rate limit simplu, DB-backed.
+    Starea rate limit-ului DB-backed (services/rate_limit.py, RATE_LIMIT_BACKEND=db).
+    Actualizat doar prin UPSERT atomic (INSERT ... ON CONFLICT (key) DO UPDATE).
     Key examples:
       - "login:ip:1.2.3.4"
       - "login:email:user@example.com"
@@ -153,10 +175,13 @@ class RateLimitState(Base):
     count = Column(Integer, nullable=False, default=0)
 
     blocked_until = Column(DateTime, nullable=True)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    # index: janitor-ul șterge cheile inactive (DB existentă => CREATE INDEX ix_rate_limits_updated_at ON rate_limits (updated_at);)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class Order(Base):
+    # PostgreSQL, opțional: partiționat pe user_id (scripts/maintenance/partition_tenant_tables.py);
+    # în DB PK-ul devine (user_id, id), ORM-ul rămâne pe id. Query-urile filtrează mereu pe user_id.
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -218,6 +243,7 @@ class ProductLink(Base):
 
 
 class SmsLog(Base):
+    # Partiționat împreună cu orders (services/partitioning.py); join-urile spre orders includ user_id.
     __tablename__ = "sms_logs"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -225,16 +251,116 @@ class SmsLog(Base):
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
 
     phone = Column(String(64), nullable=False)
-    message_id = Column(String(128), nullable=True)
+    # index: callback-urile de livrare (DLR) SMSAPI se potrivesc pe message_id
+    message_id = Column(String(128), nullable=True, index=True)
+    # status = rezultatul submit-ului (success/error); livrarea vine separat, prin DLR
     status = Column(String(32), nullable=True)
     error_message = Column(Text, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Raport de livrare (DLR) SMSAPI: ex. delivered / undelivered / expired
+    # Debug:
+    # - DB existentă => ALTER TABLE sms_logs ADD COLUMN delivery_status VARCHAR(32);
+    #                   ALTER TABLE sms_logs ADD COLUMN delivery_status_at DATETIME;
+    #                   CREATE INDEX ix_sms_logs_message_id ON sms_logs (message_id);
+    delivery_status = Column(String(32), nullable=True)
+    delivery_status_at = Column(DateTime, nullable=True)
+
+    # index: retenția selectează/șterge pe created_at (DB existentă => CREATE INDEX ix_sms_logs_created_at ON sms_logs (created_at);)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="sms_logs")
     order = relationship("Order", back_populates="sms_logs")
 
 
+class SmsDailyStat(Base):
+    """
+    Rollup zilnic SMS per tenant + PNK (zi UTC), întreținut incremental la fiecare trimitere
+    (în aceeași tranzacție cu SmsLog). Dashboard-ul citește de aici, nu din sms_logs.
+    - pnk = "" pentru comenzile fără PNK (NOT NULL ca UNIQUE să funcționeze).
+    Debug:
+    - Tabel nou (create_all îl creează); pentru istoricul existent rulează
+      scripts/maintenance/backfill_sms_daily_stats.py
+    """
+    __tablename__ = "sms_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "pnk", name="uq_sms_daily_stats_user_day_pnk"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    pnk = Column(String(64), nullable=False, default="")
+
+    success_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    last_sent_at = Column(DateTime, nullable=True)
+
+
+class SmsSendHistory(Base):
+    """
+    Un rând per (tenant, telefon, PNK) care a primit SMS de recenzie cu succes.
+    Garda anti-duplicat citește de aici (nu din sms_logs, care are retenție); până la backfill,
+    și din sms_logs ⋈ orders (services/sms/send_history.py).
+    - phone_key = ultimele 9 cifre ale telefonului.
+    Debug:
+    - Tabel nou; pentru istoricul existent: python scripts/maintenance/retention.py backfill-history
+    """
+    __tablename__ = "sms_send_history"
+    __table_args__ = (
+        UniqueConstraint("user_id", "phone_key", "pnk", name="uq_sms_send_history_user_phone_pnk"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    phone_key = Column(String(16), nullable=False)
+    pnk = Column(String(64), nullable=False)
+
+    sent_count = Column(Integer, nullable=False, default=1)
+    first_sent_at = Column(DateTime, nullable=False)
+    last_sent_at = Column(DateTime, nullable=False)
+
+
+class SmsQuotaCounter(Base):
+    """
+    Contor cotă SMS per tenant + perioadă ("YYYY-MM", UTC).
+    - used = SMS reușite confirmate; reserved = rezervări în curs (trimiteri în zbor).
+    - Rezervarea e un singur UPDATE condiționat (used + reserved + n <= limită) => fără race între workeri.
+    Debug:
+    - Tabel nou (create_all îl creează); reserved blocat > 0 fără trimiteri => rezervări expirate
+      neprocesate (vezi expire_stale_reservations în services/billing/quota_reserve.py).
+    """
+    __tablename__ = "sms_quota_counters"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", name="uq_sms_quota_counters_user_period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(7), nullable=False)
+
+    used = Column(Integer, nullable=False, default=0)
+    reserved = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SmsQuotaReservation(Base):
+    """
+    Rezervare de cotă pentru o trimitere (simplă sau bulk).
+    status: pending -> committed (după trimitere) | released (eșec) | expired (worker mort / timeout).
+    Tranziția din pending se face condiționat (WHERE status='pending') => o rezervare se decontează o singură dată.
+    """
+    __tablename__ = "sms_quota_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    period = Column(String(7), nullable=False)
+    amount = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False, default="pending", index=True)
+
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -244,7 +370,8 @@ class AuditLog(Base):
     ip = Column(String(64), nullable=True)
     user_agent = Column(String(255), nullable=True)
     details = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # index: retenția selectează/șterge pe created_at (DB existentă => CREATE INDEX ix_audit_logs_created_at ON audit_logs (created_at);)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="audit_logs")
 
@@ -266,3 +393,28 @@ class PasswordResetToken(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False, index=True)
     used_at = Column(DateTime, nullable=True, index=True)
+
+
+class EmailOutbox(Base):
+    """
+    Coadă durabilă de emailuri (services/email_outbox.py + services/email_sender.py).
+    status: pending -> sending (lease până la next_attempt_at) -> sent | failed; la eroare temporară
+    revine în pending cu next_attempt_at = acum + backoff.
+    body conține linkul de verificare / codul de reset => se golește (NULL) după trimitere / eșec definitiv.
+    Tabel nou: create_all îl creează (nu e nevoie de ALTER pe DB existentă).
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_error = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # index: janitor-ul șterge emailurile trimise după grație
+    sent_at = Column(DateTime, nullable=True, index=True)
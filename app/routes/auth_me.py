@@ -3,13 +3,13 @@
 
 from fastapi import APIRouter, Depends
 
-from ..deps.auth import get_current_user
-from ..models import User
+from ..deps.auth import get_current_user_cached
+from ..services.auth.user_cache import CachedUser
 from ..schemas import UserOut
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserOut)
-def me_route(current_user: User = Depends(get_current_user)):
+def me_route(current_user: CachedUser = Depends(get_current_user_cached)):
     return current_user
@@ -1,29 +1,41 @@
 # FILE: app/routes/billing.py
 # Scop:
 #   - Router /api/billing.
-#   - În acest moment este STUB (minim) ca aplicația să pornească stabil.
-#   - Implementarea reală Stripe (BILL-03..BILL-06) o facem pas cu pas.
+#   - /me, /portal, /webhook sunt încă STUB (minim) ca aplicația să pornească stabil.
+#   - /checkout: Stripe Checkout Session (services/billing/create_checkout.py), `async def` pe
+#     AsyncSession + API-ul async Stripe => request-ul nu ține thread cât răspunde Stripe.
+#     Fără STRIPE_SECRET_KEY răspunde în continuare 501 (ca stub-ul).
 #
 # Debug:
 #   - Dacă primești ImportError în app/main.py legat de `billing`,
 #     înseamnă că acest fișier lipsește sau nu e inclus în repo.
+#   - Checkout 502 => Stripe a răspuns cu eroare (price/keys/cont); 500 "Stripe neconfigurat" => .env.
 
+import logging
+
+import stripe
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..deps.db import get_db
-from ..deps.auth import get_current_user
+from ..config import settings
+from ..deps.db import get_async_db, get_db
+from ..deps.auth import get_current_user, get_current_user_cached
 from ..models import User
+from ..schemas import BillingCheckoutIn, BillingCheckoutOut
 from ..services.audit import create_audit_log
+from ..services.auth.user_cache import CachedUser
+from ..services.billing.create_checkout import create_checkout_session_async
 
 router = APIRouter(prefix="/api/billing", tags=["billing"])
+logger = logging.getLogger(__name__)
 
 
 @router.get("/me")
 def billing_me(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
     """
     Status billing pentru userul curent.
@@ -38,16 +50,65 @@ def billing_me(
     }
 
 
-@router.post("/checkout")
-def billing_checkout(
+@router.post("/checkout", response_model=BillingCheckoutOut)
+async def billing_checkout(
+    data: BillingCheckoutIn,
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cached_user: CachedUser = Depends(get_current_user_cached),
 ):
-    create_audit_log(db, "BILLING_CHECKOUT_STUB", current_user.id, request, details=None)
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Billing checkout nu este implementat încă (BILL-04).",
+    if not settings.stripe_secret_key:
+        await db.run_sync(create_audit_log, "BILLING_CHECKOUT_STUB", cached_user.id, request, details=None)
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Billing checkout nu este configurat (STRIPE_SECRET_KEY).",
+        )
+
+    # checkout scrie stripe_customer_id pe user => obiectul ORM, nu snapshot-ul din cache
+    current_user = await db.get(User, cached_user.id)
+    if current_user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User inexistent sau inactiv")
+    await db.commit()  # conexiunea înapoi în pool cât așteptăm Stripe
+
+    try:
+        res = await create_checkout_session_async(db, user=current_user, plan=data.plan)
+    except stripe.error.StripeError as exc:
+        logger.exception("Stripe error la checkout user_id=%s plan=%s", cached_user.id, data.plan)
+        await _checkout_failed(db, cached_user.id, request, data.plan, exc)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Eroare la procesatorul de plăți. Reîncearcă.",
+        )
+    except Exception as exc:
+        logger.exception("Eroare internă la billing checkout user_id=%s plan=%s", cached_user.id, data.plan)
+        await _checkout_failed(db, cached_user.id, request, data.plan, exc)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Eroare internă. Verifică setările și încearcă din nou.",
+        )
+
+    await db.run_sync(
+        create_audit_log,
+        "BILLING_CHECKOUT_CREATE",
+        cached_user.id,
+        request,
+        details={
+            "plan": data.plan,
+            "stripe_customer_id": current_user.stripe_customer_id,
+            "checkout_session_id": res.session_id,
+        },
+    )
+    return BillingCheckoutOut(ok=True, url=res.url, session_id=res.session_id)
+
+
+async def _checkout_failed(db: AsyncSession, user_id: int, request: Request, plan: str, exc: Exception) -> None:
+    await db.rollback()
+    await db.run_sync(
+        create_audit_log,
+        "BILLING_CHECKOUT_FAIL",
+        user_id,
+        request,
+        details={"plan": plan, "error": str(exc)[:500]},
     )
 
 
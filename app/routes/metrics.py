@@ -0,0 +1,49 @@
+# FILE: app/routes/metrics.py
+# Scop:
+#   - Endpoint intern de metrici per proces (worker uvicorn): GET /api/metrics.
+#   - Doar pentru role=admin (starea conține date despre toți tenanții).
+#
+# Debug:
+#   - Cu mai mulți workeri, fiecare request ajunge la un worker diferit => valorile diferă între apeluri.
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..deps.auth import get_current_user_cached
+from ..middleware.read_your_writes import replica_pins
+from ..middleware.request_throttle import request_throttle
+from ..services.audit_writer import audit_writer
+from ..services.auth.password_hasher import password_hasher
+from ..services.auth.user_cache import CachedUser, user_cache
+from ..services.email_sender import email_sender
+from ..services.http_client import http_client
+from ..services.janitor import janitor
+from ..services.rate_limit import rate_limiter
+from ..services.request_timing import request_timing
+from ..security import verified_token_cache
+from ..services.sms.balance_cache import sms_balance_cache
+from ..services.sms.scheduler import sms_scheduler
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("")
+def metrics(current_user: CachedUser = Depends(get_current_user_cached)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acces interzis.")
+
+    return {
+        "ok": True,
+        "sms_scheduler": sms_scheduler.snapshot(),
+        "sms_balance_cache": sms_balance_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "jwt_cache": verified_token_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "request_throttle": request_throttle.stats(),
+        "read_routing": replica_pins.stats(),
+        "janitor": janitor.stats(),
+        "audit_writer": audit_writer.stats(),
+        "email_sender": email_sender.stats(),
+        "http_client": http_client.stats(),
+        "request_timing": request_timing.stats(),
+    }
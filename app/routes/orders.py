@@ -5,17 +5,20 @@
 #       * sms_sent (pentru comanda curentă)
 #       * previous_sms_count = câte SMS-uri de recenzie am trimis
 #         pentru ACELAȘI telefon + ACELAȘI PNK (produs).
+#   - Info SMS calculată pe pagină cu query-uri agregate (services/orders_list.py), nu per rând.
 
 import logging
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Request
 from sqlalchemy.orm import Session
 
-from ..models import User, Order, SmsLog
+from ..models import User
 from ..schemas import OrdersListOut, OrderOut
-from ..deps.auth import get_current_user
-from ..deps.db import get_db
+from ..deps.auth import get_current_user, get_current_user_cached
+from ..deps.db import get_read_db, get_write_db
 from ..services.orders_import import import_orders_from_excel
+from ..services.orders_list import list_orders_page
 from ..services.audit import create_audit_log
+from ..services.auth.user_cache import CachedUser
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
@@ -26,7 +29,7 @@ logger = logging.getLogger(__name__)
 def import_orders(
     request: Request,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),  # DELETE + mii de INSERT-uri: calea de scriere (SQLite: un writer)
     current_user: User = Depends(get_current_user),
 ):
     user_id = current_user.id
@@ -56,47 +59,19 @@ def import_orders(
 def list_orders(
     page: int = 1,
     page_size: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
     if page < 1:
         page = 1
     if page_size < 1 or page_size > 200:
         page_size = 50
 
-    q = (
-        db.query(Order)
-        .filter(Order.user_id == current_user.id)
-        .order_by(Order.id.desc())
-    )
-    total = q.count()
-    orders = q.offset((page - 1) * page_size).limit(page_size).all()
+    total, page_rows = list_orders_page(db, current_user.id, page=page, page_size=page_size)
 
     rows: list[OrderOut] = []
-    for o in orders:
-        # SMS trimis pentru comanda curentă (există log 'success' pentru acest order_id)
-        sms_sent = any(log.status == "success" for log in o.sms_logs)
-
-        phone = o.phone_number
-        pnk = o.pnk
-        previous_sms_count = 0
-
-        # Istoric SMS recenzie = câte SMS-uri de succes pentru ACELAȘI telefon + ACELAȘI PNK
-        if phone and pnk:
-            total_for_phone_pnk = (
-                db.query(SmsLog)
-                .join(Order, SmsLog.order_id == Order.id)
-                .filter(
-                    SmsLog.user_id == current_user.id,
-                    SmsLog.phone == str(phone),
-                    SmsLog.status == "success",
-                    Order.pnk == pnk,
-                )
-                .count()
-            )
-            # dacă pentru comanda curentă tocmai avem sms_sent=True, "previous" = total - 1
-            previous_sms_count = max(0, total_for_phone_pnk - (1 if sms_sent else 0))
-
+    for r in page_rows:
+        o = r.order
         row = OrderOut(
             id=o.id,
             order_number=o.order_number,
@@ -106,8 +81,8 @@ def list_orders(
             phone_number=o.phone_number,
             order_status=o.order_status,
             payment_status=o.payment_status,
-            sms_sent=sms_sent,
-            previous_sms_count=previous_sms_count,
+            sms_sent=r.sms_sent,
+            previous_sms_count=r.previous_sms_count,
         )
         rows.append(row)
 
@@ -11,8 +11,9 @@ from sqlalchemy.orm import Session
 
 from ..models import User, ProductLink
 from ..schemas import ProductLinkIn, ProductLinkOut, ProductLinksListOut
-from ..deps.auth import get_current_user
-from ..deps.db import get_db
+from ..deps.auth import get_current_user, get_current_user_cached
+from ..deps.db import get_db, get_read_db
+from ..services.auth.user_cache import CachedUser
 
 router = APIRouter(prefix="/api/product-links", tags=["product-links"])
 
@@ -51,8 +52,8 @@ def _validate_url(url: str) -> None:
 
 @router.get("", response_model=ProductLinksListOut)
 def list_product_links(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
     """
     Listă cu ultimele 10 mapări PNK → URL pentru userul curent.
@@ -1,27 +1,36 @@
 # FILE: app/routes/settings.py
 
+from typing import Union
+
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 
 from ..models import User
 from ..schemas import SmsSettingsIn, SmsSettingsOut, SmsBalanceOut
-from ..deps.auth import get_current_user
+from ..deps.auth import get_current_user, get_current_user_cached
 from ..deps.db import get_db
 from ..services.audit import create_audit_log
-from ..services.sms_service import get_sms_balance_for_user
+from ..services.auth.user_cache import CachedUser, user_cache
+from ..services.sms_service import get_sms_balance_for_user_async
+from ..services.sms.template import validate_template
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 
 @router.get("/sms", response_model=SmsSettingsOut)
 def get_sms_settings(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
+    return _settings_out(current_user)
+
+
+def _settings_out(user: Union[User, CachedUser]) -> SmsSettingsOut:
     return SmsSettingsOut(
-        has_token=bool(current_user.smsapi_token),
-        sender=current_user.smsapi_sender,
-        company_name=current_user.sms_company_name,
+        has_token=bool(user.smsapi_token),
+        sender=user.smsapi_sender,
+        company_name=user.sms_company_name,
+        template=user.sms_template,
+        transliteration=user.sms_transliteration,
     )
 
 
@@ -57,10 +66,23 @@ def update_sms_settings(
             detail="Token SMSAPI este obligatoriu prima dată.",
         )
 
+    # Template: None => neschimbat, "" => implicit; validat (compilat) înainte de salvare
+    if data.template is not None:
+        template = data.template.strip()
+        if template:
+            try:
+                validate_template(template)
+            except ValueError as exc:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        current_user.sms_template = template or None
+    if data.transliteration is not None:
+        current_user.sms_transliteration = data.transliteration
+
     current_user.smsapi_sender = sender
     current_user.sms_company_name = company_name
     db.commit()
     db.refresh(current_user)
+    user_cache.invalidate(current_user.id)
 
     create_audit_log(
         db,
@@ -71,22 +93,20 @@ def update_sms_settings(
             "sender": sender,
             "company_name": company_name,
             "token_updated": bool(token),
+            "template_updated": data.template is not None,
+            "transliteration": current_user.sms_transliteration,
         },
+        sync=True,  # schimbare credențiale SMSAPI
     )
 
-    return SmsSettingsOut(
-        has_token=bool(current_user.smsapi_token),
-        sender=current_user.smsapi_sender,
-        company_name=current_user.sms_company_name,
-    )
+    return _settings_out(current_user)
 
 
 @router.get("/sms/balance", response_model=SmsBalanceOut)
-def get_sms_balance(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_sms_balance(
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
-    ok, points, error = get_sms_balance_for_user(current_user)
+    ok, points, error = await get_sms_balance_for_user_async(current_user)
     if not ok:
         return SmsBalanceOut(ok=False, points=None, error=error)
     return SmsBalanceOut(ok=True, points=points, error=None)
@@ -3,28 +3,75 @@
 #   - Trimite SMS pentru o comandă folosind linkul de recenzie mapat la PNK.
 #   - Textul SMS include numele firmei din setări.
 #   - NU permite mai mult de un SMS de recenzie pentru aceeași pereche (telefon, PNK).
-#   - Statistici globale SMS per user.
+#   - Statistici SMS per user din rollup-ul zilnic (sms_daily_stats): totaluri + serie pe zi / PNK.
+#   - Callback public pentru rapoartele de livrare SMSAPI (DLR), protejat cu ?key=<SMSAPI_CALLBACK_SECRET>.
+#   - Trimiterea trece prin scheduler-ul SMS (rată per cont SMSAPI + round-robin între tenanți).
+#   - Cotă lunară SMS (SMS_MONTHLY_QUOTA): rezervare înainte de trimitere, 402 dacă e epuizată.
+#   - Trimiterea simplă e `async def` (AsyncSession + client HTTP async): cât stă în coada scheduler-ului
+#     și cât așteaptă SMSAPI nu ține nici thread din threadpool, nici conexiune DB.
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import func
+import asyncio
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..models import User, Order, SmsLog, ProductLink
-from ..deps.auth import get_current_user
-from ..deps.db import get_db
-from ..services.sms_service import send_sms_for_order
+from ..config import settings
+from ..models import User, Order, ProductLink
+from ..deps.auth import get_current_user, get_current_user_cached
+from ..deps.db import get_async_db, get_db, get_read_db
+from ..services.auth.user_cache import CachedUser
+from ..services.sms_service import send_sms_for_order_async, resolve_sms_account
+from ..services.sms.scheduler import sms_scheduler, bucket_key_for
+from ..services.sms.bulk_send import send_review_sms_bulk
+from ..services.sms.review_message import render_review_message
+from ..services.sms.daily_stats import get_sms_stats
+from ..services.sms.send_history import has_sent_review
+from ..services.billing.quota_reserve import (
+    reserve_sms_quota,
+    commit_sms_quota,
+    release_sms_quota,
+    get_sms_quota_usage,
+)
+from ..services.sms.delivery_reports import parse_delivery_reports, apply_delivery_reports
+from ..security import constant_time_equal
 from ..services.audit import create_audit_log
-from ..schemas import SmsStatsOut
+from ..schemas import SmsStatsOut, SmsStatsSeriesOut, SmsDailyPointOut, SmsQuotaOut, SmsQueueOut, SmsBulkIn, SmsBulkOut, SmsBulkItemOut, SmsPreviewOut
 
 router = APIRouter(prefix="/api/sms", tags=["sms"])
 
 
+async def _run_to_completion(coro):
+    """
+    Rulează `coro` până la capăt chiar dacă request-ul e anulat între timp; anularea se propagă după.
+    CancelScope(shield=True) acoperă anularea anyio (Starlette), task-ul separat + asyncio.shield
+    acoperă task.cancel() nativ.
+    """
+    task = asyncio.ensure_future(coro)
+    cancelled = False
+    with anyio.CancelScope(shield=True):
+        while not task.done():
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.done():
+                    break
+                cancelled = True
+    if cancelled and not task.cancelled() and task.exception() is None:
+        raise asyncio.CancelledError()
+    return task.result()
+
+
 @router.post("/order/{order_id}")
-def send_sms_for_order_route(
+async def send_sms_for_order_route(
     order_id: int,
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
 ):
     """
     Trimite un SMS pentru comanda dată.
@@ -36,10 +83,8 @@ def send_sms_for_order_route(
         cu status 'success' (ca să nu bombardăm clientul cu solicitări pentru același produs).
     """
     order = (
-        db.query(Order)
-        .filter(Order.id == order_id, Order.user_id == current_user.id)
-        .first()
-    )
+        await db.execute(select(Order).where(Order.id == order_id, Order.user_id == current_user.id))
+    ).scalars().first()
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,13 +116,13 @@ def send_sms_for_order_route(
 
     # Mapare PNK → URL recenzie
     link = (
-        db.query(ProductLink)
-        .filter(
-            ProductLink.user_id == current_user.id,
-            ProductLink.pnk == order.pnk,
+        await db.execute(
+            select(ProductLink).where(
+                ProductLink.user_id == current_user.id,
+                ProductLink.pnk == order.pnk,
+            )
         )
-        .first()
-    )
+    ).scalars().first()
     if not link:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -88,18 +133,9 @@ def send_sms_for_order_route(
         )
 
     # Verificare anti-spam: a mai primit acest client (telefon) SMS de recenzie pentru acest PNK?
-    already_sent_for_product = (
-        db.query(SmsLog)
-        .join(Order, SmsLog.order_id == Order.id)
-        .filter(
-            SmsLog.user_id == current_user.id,
-            SmsLog.phone == str(phone),
-            SmsLog.status == "success",
-            Order.pnk == order.pnk,
-        )
-        .count()
-    )
-    if already_sent_for_product > 0:
+    # (istoricul compact sms_send_history, păstrat și după retenția pe sms_logs)
+    already_sent_for_product = await db.run_sync(has_sent_review, current_user.id, str(phone), order.pnk)
+    if already_sent_for_product:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
@@ -112,30 +148,53 @@ def send_sms_for_order_route(
     review_url = link.review_url
     company = current_user.sms_company_name
 
-    message_text = (
-        f"Bună ziua, suntem echipa de la {company} și vă mulțumim pentru comanda dvs. "
-        "Recent ați cumpărat un produs de la noi și ne-ar ajuta mult feedback-ul dvs. despre produs. "
-        f"Puteți lăsa o recenzie aici: [%goto:{review_url}%] "
-        "Acest mesaj este trimis punctual doar clienților care au plasat comenzi, nu este o campanie generală de marketing."
-    )
+    rendered = render_review_message(current_user, review_url=review_url)
 
-    success, info = send_sms_for_order(db, current_user, order, message_text)
-
-    create_audit_log(
-        db,
-        "SEND_SMS",
-        current_user.id,
-        request,
-        details={
-            "order_id": order_id,
-            "success": success,
-            "info": info,
-            "review_url": review_url,
-            "company_name": company,
-            "phone": str(phone),
-            "pnk": order.pnk,
-        },
-    )
+    # Cotă lunară (402 dacă e epuizată), apoi rândul tenantului + token în bucket-ul contului SMSAPI (429/503)
+    reservation = await db.run_sync(reserve_sms_quota, current_user.id, 1)
+    # închidem tranzacția de citire => conexiunea se întoarce în pool cât stăm la coadă / după SMSAPI
+    await db.commit()
+    try:
+        token, sender = resolve_sms_account(current_user)
+        await sms_scheduler.acquire_async(tenant_id=current_user.id, bucket_key=bucket_key_for(token, sender))
+    except BaseException:
+        # SMSAPI nu a fost apelat => eliberăm rezervarea; și la CancelledError (client deconectat):
+        # shield, altfel anulează și curățenia
+        with anyio.CancelScope(shield=True):
+            await db.rollback()
+            await db.run_sync(release_sms_quota, reservation)
+        raise
+
+    async def send_and_record():
+        try:
+            success, info = await send_sms_for_order_async(db, current_user, order, rendered.text)
+        except Exception:
+            await db.rollback()
+            # SMSAPI poate fi acceptat deja mesajul (a căzut scrierea logului) => îl decontăm ca trimis
+            await db.run_sync(commit_sms_quota, reservation, 1)
+            raise
+        await db.run_sync(commit_sms_quota, reservation, 1 if success else 0)
+        await db.run_sync(
+            create_audit_log,
+            "SEND_SMS",
+            current_user.id,
+            request,
+            details={
+                "order_id": order_id,
+                "success": success,
+                "info": info,
+                "review_url": review_url,
+                "company_name": company,
+                "phone": str(phone),
+                "pnk": order.pnk,
+                "segments": rendered.segments,
+            },
+        )
+        return success, info
+
+    # din acest punct SMSAPI poate accepta mesajul: apel + SmsLog / istoric + cotă + audit se duc la capăt
+    # chiar dacă clientul se deconectează (altfel: SMS trimis, dar nelogat => duplicat la reîncercare)
+    success, info = await _run_to_completion(send_and_record())
 
     if not success:
         raise HTTPException(
@@ -146,22 +205,173 @@ def send_sms_for_order_route(
     return {"ok": True, "message_id": info}
 
 
-@router.get("/stats", response_model=SmsStatsOut)
-def sms_stats(
+@router.post("/bulk", response_model=SmsBulkOut)
+def send_sms_bulk_route(
+    data: SmsBulkIn,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    base_q = db.query(SmsLog).filter(SmsLog.user_id == current_user.id)
-    total_success = base_q.filter(SmsLog.status == "success").count()
-    total_error = base_q.filter(SmsLog.status == "error").count()
-    last_sent_at = (
-        db.query(func.max(SmsLog.created_at))
-        .filter(SmsLog.user_id == current_user.id)
-        .scalar()
+    """
+    Trimite SMS de recenzie pentru mai multe comenzi.
+    Comenzile cu același text (același PNK) pleacă într-un singur apel SMSAPI multi-destinatar.
+    Aceleași reguli ca la trimiterea simplă; comenzile neeligibile apar ca "skipped" cu motiv.
+    dry_run=true => doar eligibilitate + segmente estimate (status "ready"), fără trimitere.
+    """
+    if len(data.order_ids) > settings.sms_bulk_max_orders:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maxim {settings.sms_bulk_max_orders} comenzi per trimitere.",
+        )
+
+    if not current_user.sms_company_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Nu poți trimite SMS-uri până nu setezi numele firmei pentru mesaj. "
+                "Adaugă numele firmei tale în cardul 'Setări SMSAPI'."
+            ),
+        )
+
+    results = send_review_sms_bulk(db, user=current_user, order_ids=data.order_ids, dry_run=data.dry_run)
+
+    sent = sum(1 for r in results if r.status == "success")
+    failed = sum(1 for r in results if r.status == "error")
+    skipped = sum(1 for r in results if r.status == "skipped")
+    segments = sum(r.segments or 0 for r in results if r.status != "skipped")
+
+    if not data.dry_run:
+        create_audit_log(
+            db,
+            "SEND_SMS_BULK",
+            current_user.id,
+            request,
+            details={
+                "requested": len(data.order_ids),
+                "sent": sent,
+                "failed": failed,
+                "skipped": skipped,
+                "segments": segments,
+            },
+        )
+
+    return SmsBulkOut(
+        ok=True,
+        dry_run=data.dry_run,
+        sent=sent,
+        failed=failed,
+        skipped=skipped,
+        estimated_segments=segments,
+        results=[SmsBulkItemOut(**r.__dict__) for r in results],
     )
 
+
+@router.get("/preview", response_model=SmsPreviewOut)
+def sms_preview(
+    pnk: str,
+    db: Session = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
+):
+    """
+    Textul exact + encoding + segmente facturabile pentru PNK-ul dat, înainte de trimitere.
+    """
+    link = (
+        db.query(ProductLink)
+        .filter(ProductLink.user_id == current_user.id, ProductLink.pnk == pnk.strip().upper())
+        .first()
+    )
+    if not link:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nu există link de recenzie configurat pentru PNK {pnk}.",
+        )
+
+    rendered = render_review_message(current_user, review_url=link.review_url)
+    return SmsPreviewOut(**rendered.__dict__)
+
+
+@router.api_route("/callback/dlr", methods=["GET", "POST"], response_class=PlainTextResponse)
+async def sms_delivery_callback(request: Request, db: Session = Depends(get_db)):
+    """
+    Callback SMSAPI pentru rapoarte de livrare (public, fără JWT).
+    Acceptă GET (query) și POST (form); SMSAPI poate trimite mai multe rapoarte într-un apel.
+    Răspunde "OK" (altfel SMSAPI reîncearcă).
+    """
+    secret = settings.smsapi_callback_secret
+    if not secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Callback DLR neconfigurat.")
+    if not constant_time_equal(request.query_params.get("key") or "", secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acces interzis.")
+
+    params = dict(request.query_params)
+    if request.method == "POST":
+        form = await request.form()
+        params.update({k: str(v) for k, v in form.items()})
+
+    reports = parse_delivery_reports(params)
+    await run_in_threadpool(apply_delivery_reports, db, reports)
+    return "OK"
+
+
+@router.get("/quota", response_model=SmsQuotaOut)
+def sms_quota(
+    db: Session = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
+):
+    """
+    Cota lunară SMS: folosite / rezervate (în curs) / rămase. enabled=false => fără limită.
+    """
+    usage = get_sms_quota_usage(db, current_user.id)
+    return SmsQuotaOut(
+        enabled=usage.enabled,
+        period=usage.period,
+        limit=usage.limit,
+        used=usage.used,
+        reserved=usage.reserved,
+        remaining=usage.remaining,
+    )
+
+
+@router.get("/queue", response_model=SmsQueueOut)
+def sms_queue(current_user: CachedUser = Depends(get_current_user_cached)):
+    """
+    Starea cozii SMS pentru userul curent (procesul curent): adâncime + timpi de așteptare.
+    """
+    return SmsQueueOut(**sms_scheduler.tenant_snapshot(current_user.id))
+
+
+@router.get("/stats", response_model=SmsStatsOut)
+def sms_stats(
+    db: Session = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
+):
+    """
+    Totaluri all-time din rollup (un query, cost constant indiferent de mărimea sms_logs).
+    """
+    summary = get_sms_stats(db, current_user.id)
     return SmsStatsOut(
-        total_sent_success=total_success,
-        total_sent_error=total_error,
-        last_sent_at=last_sent_at,
+        total_sent_success=summary.total_sent_success,
+        total_sent_error=summary.total_sent_error,
+        last_sent_at=summary.last_sent_at,
+    )
+
+
+@router.get("/stats/daily", response_model=SmsStatsSeriesOut)
+def sms_stats_daily(
+    days: int = Query(30, ge=1, le=366),
+    by_pnk: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_current_user_cached),
+):
+    """
+    Totaluri + serie zilnică (UTC) pe ultimele `days` zile, opțional defalcată pe PNK.
+    Zilele fără trimiteri lipsesc din serie.
+    """
+    summary = get_sms_stats(db, current_user.id, days=days, by_pnk=by_pnk)
+    return SmsStatsSeriesOut(
+        total_sent_success=summary.total_sent_success,
+        total_sent_error=summary.total_sent_error,
+        last_sent_at=summary.last_sent_at,
+        days=days,
+        series=[SmsDailyPointOut(**p.__dict__) for p in summary.series],
     )
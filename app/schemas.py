@@ -11,7 +11,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Literal
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator, field_validator
@@ -152,6 +152,9 @@ class SmsSettingsIn(BaseModel):
     token: Optional[str] = Field(default=None, max_length=255)
     sender: str = Field(..., min_length=3, max_length=32)
     company_name: str = Field(..., min_length=2, max_length=255)
+    # template: None => neschimbat, "" => revenire la template-ul implicit
+    template: Optional[str] = Field(default=None, max_length=1000)
+    transliteration: Optional[Literal["off", "auto", "always"]] = None
 
     @field_validator("token", mode="before")
     @classmethod
@@ -171,6 +174,8 @@ class SmsSettingsOut(BaseModel):
     has_token: bool
     sender: Optional[str]
     company_name: Optional[str]
+    template: Optional[str] = None
+    transliteration: Optional[str] = None
 
 
 class SmsBalanceOut(BaseModel):
@@ -185,6 +190,71 @@ class SmsStatsOut(BaseModel):
     last_sent_at: Optional[datetime]
 
 
+class SmsQuotaOut(BaseModel):
+    enabled: bool
+    period: str  # YYYY-MM (UTC)
+    limit: int
+    used: int
+    reserved: int
+    remaining: int
+
+
+class SmsDailyPointOut(BaseModel):
+    day: date
+    pnk: Optional[str] = None  # None când seria e agregată doar pe zi
+    success: int
+    error: int
+    last_sent_at: Optional[datetime] = None
+
+
+class SmsStatsSeriesOut(SmsStatsOut):
+    days: int
+    series: List[SmsDailyPointOut]
+
+
+class SmsBulkIn(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1)
+    # dry_run: doar eligibilitate + segmente estimate, fără trimitere
+    dry_run: bool = False
+
+
+class SmsBulkItemOut(BaseModel):
+    order_id: int
+    status: Literal["success", "error", "skipped", "ready"]
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    segments: Optional[int] = None
+
+
+class SmsBulkOut(BaseModel):
+    ok: bool = True
+    dry_run: bool = False
+    sent: int
+    failed: int
+    skipped: int
+    # segmente facturabile estimate pentru comenzile eligibile (trimise sau de trimis)
+    estimated_segments: int = 0
+    results: List[SmsBulkItemOut]
+
+
+class SmsPreviewOut(BaseModel):
+    text: str
+    encoding: Literal["gsm7", "ucs2"]
+    length: int
+    segments: int
+    transliterated: bool
+
+
+class SmsQueueOut(BaseModel):
+    queue_depth: int
+    oldest_wait_seconds: float
+    granted: int
+    rejected: int
+    timed_out: int
+    avg_wait_seconds: float
+    max_wait_seconds: float
+
+
 class ProductLinkIn(BaseModel):
     pnk: str = Field(..., min_length=3, max_length=64)
     review_url: str = Field(..., min_length=10)
@@ -1,18 +1,29 @@
 # FILE: app/security.py
 # Scop:
-#   - Parole: Argon2 + pepper (secret separat de DB).
+#   - Parole: Argon2 + pepper (secret separat de DB); parametrii Argon2 din config (ARGON2_*),
+#     calibrați per host cu scripts/maintenance/calibrate_argon2.py.
 #   - JWT access token scurt (15m default), cu issuer/audience + jti.
 #   - Token hashing pentru refresh/verify (stocăm DOAR hash în DB).
 #
 # Debug avansat:
-#   - verify_password suportă "legacy" (fără pepper) ca să nu-ți blochezi userii existenți.
+#   - users.password_scheme ("argon2+pepper" / "argon2") => verify_password face o singură verificare Argon2.
+#     Hash-urile netagate (NULL) încearcă pepper + legacy și se tag-uiesc / migrează la primul login reușit.
+#   - python scripts/maintenance/password_schemes.py report => câte hash-uri legacy / netagate au rămas.
 #   - dacă JWT decode eșuează frecvent, verifică JWT_SECRET + clock drift pe VPS.
+#   - decode_token ține un cache LRU per proces: digest(token) -> payload deja verificat, până la `exp`
+#     (același access token vine de zeci de ori în cei 15 minute). Doar token-urile VALIDE intră în cache.
+#     GET /api/metrics (admin) => jwt_cache; JWT_CACHE_MAX_ENTRIES=0 îl oprește.
+#   - JWT_BACKEND=pyjwt => PyJWT (pip install PyJWT) în loc de python-jose, același API / aceleași claim-uri.
+#     python scripts/bench/jwt_decode.py => cost per request: jose / pyjwt, cu și fără cache.
 
 from __future__ import annotations
 
 import hashlib
 import hmac
 import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Any, Dict
 from uuid import uuid4
@@ -25,6 +36,9 @@ from .config import settings
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
 )
 
 
@@ -38,37 +52,65 @@ def _pepper_password(password: str) -> str:
     return f"{password}{settings.password_pepper}"
 
 
-def hash_password(password: str) -> str:
+PASSWORD_SCHEME_PEPPERED = "argon2+pepper"
+PASSWORD_SCHEME_LEGACY = "argon2"
+
+
+def current_password_scheme() -> str:
     """
-    Hash Argon2 pentru parolă, folosind pepper.
+    Schema cu care hash_password() produce hash-uri acum (se salvează în users.password_scheme).
     """
-    return pwd_context.hash(_pepper_password(password))
+    return PASSWORD_SCHEME_PEPPERED if settings.password_pepper else PASSWORD_SCHEME_LEGACY
 
 
-def verify_password(plain_password: str, password_hash: str) -> bool:
+def hash_password(password: str) -> str:
     """
-    Verificare parolă cu fallback legacy (fără pepper).
-    Motiv:
-      - tranziție sigură pentru useri existenți.
+    Hash Argon2 pentru parolă, folosind pepper.
+    Fără PASSWORD_PEPPER (dev) hash-ul e de fapt legacy => salvează și current_password_scheme().
     """
-    try:
-        # Primul încercăm varianta nouă (cu pepper).
-        if settings.password_pepper and pwd_context.verify(_pepper_password(plain_password), password_hash):
-            return True
-    except Exception:
-        pass
+    return pwd_context.hash(_pepper_password(password))
 
-    # Legacy fallback (DB vechi, fără pepper).
+
+def _verify(secret: str, password_hash: str) -> bool:
     try:
-        return pwd_context.verify(str(plain_password), password_hash)
+        return pwd_context.verify(secret, password_hash)
     except Exception:
         return False
 
 
-def needs_password_rehash(password_hash: str) -> bool:
+def verify_password_scheme(plain_password: str, password_hash: str, scheme: Optional[str]) -> Optional[str]:
     """
-    Dacă parametrii Argon2 s-au schimbat, putem rehash-ui la următorul login.
+    Verifică parola și întoarce schema care a validat-o (sau None dacă parola e greșită).
+      - schema cunoscută => EXACT o verificare Argon2 (și pentru parolă greșită).
+      - schema necunoscută (hash vechi, netagat) => pepper, apoi legacy; login-ul tag-uiește userul
+        după primul succes, deci dubla verificare rămâne doar pentru conturile încă netagate.
     """
+    if scheme == PASSWORD_SCHEME_PEPPERED:
+        if not settings.password_pepper:
+            return None
+        return scheme if _verify(_pepper_password(plain_password), password_hash) else None
+    if scheme == PASSWORD_SCHEME_LEGACY:
+        return scheme if _verify(str(plain_password), password_hash) else None
+
+    if settings.password_pepper and _verify(_pepper_password(plain_password), password_hash):
+        return PASSWORD_SCHEME_PEPPERED
+    if _verify(str(plain_password), password_hash):
+        return PASSWORD_SCHEME_LEGACY
+    return None
+
+
+def verify_password(plain_password: str, password_hash: str, scheme: Optional[str] = None) -> bool:
+    return verify_password_scheme(plain_password, password_hash, scheme) is not None
+
+
+def needs_password_rehash(password_hash: str, scheme: Optional[str] = None) -> bool:
+    """
+    Rehash la următorul login dacă:
+      - parametrii Argon2 s-au schimbat, sau
+      - hash-ul e în altă schemă decât cea curentă (ex. legacy fără pepper după ce PASSWORD_PEPPER e setat).
+    """
+    if scheme is not None and scheme != current_password_scheme():
+        return True
     try:
         return pwd_context.needs_update(password_hash)
     except Exception:
@@ -78,6 +120,90 @@ def needs_password_rehash(password_hash: str) -> bool:
 JWT_ALGORITHM = "HS256"
 
 
+def _load_jwt_backend(name: str):
+    """
+    (encode, decode, excepția de bază) pentru backend-ul ales; ambele au aceeași semnătură
+    encode(claims, key, algorithm=) / decode(token, key, algorithms=, audience=, issuer=).
+    """
+    if name == "pyjwt":
+        try:
+            import jwt as pyjwt
+        except ImportError as exc:
+            raise RuntimeError("JWT_BACKEND=pyjwt cere pachetul PyJWT (pip install PyJWT).") from exc
+        if not settings.jwt_secret:
+            # python-jose acceptă cheie goală (dev); PyJWT nu
+            raise RuntimeError("JWT_BACKEND=pyjwt cere JWT_SECRET setat (și în DEBUG).")
+        return pyjwt.encode, pyjwt.decode, pyjwt.PyJWTError
+    return jwt.encode, jwt.decode, JWTError
+
+
+_jwt_encode, _jwt_decode, _JWTError = _load_jwt_backend(settings.jwt_backend)
+
+
+class VerifiedTokenCache:
+    """
+    LRU per proces: sha256(token) -> payload verificat (semnătură + iss / aud / exp).
+    O intrare expiră odată cu token-ul (`exp`); token-ul brut nu e ținut în memorie.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._items.get(digest)
+            if payload is None:
+                self.misses += 1
+                return None
+            if payload["exp"] <= time.time():
+                del self._items[digest]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest: bytes, payload: Dict[str, Any]) -> None:
+        if not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self._lock:
+            self._items[digest] = payload
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": settings.jwt_backend,
+                "size": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+verified_token_cache = VerifiedTokenCache(settings.jwt_cache_max_entries)
+
+
 def create_access_token(
     data: Dict[str, Any],
     expires_delta: Optional[timedelta] = None,
@@ -108,26 +234,37 @@ def create_access_token(
         }
     )
 
-    return jwt.encode(to_encode, settings.jwt_secret, algorithm=JWT_ALGORITHM)
+    return _jwt_encode(to_encode, settings.jwt_secret, algorithm=JWT_ALGORITHM)
 
 
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Decode + verify JWT.
     Returnează payload sau None dacă invalid/expirat.
+    Token-urile deja verificate (și neexpirate) vin din verified_token_cache, fără HMAC / claim checks.
     """
+    digest = None
+    if verified_token_cache.enabled:
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = verified_token_cache.get(digest)
+        if cached is not None:
+            return dict(cached)
+
     try:
-        payload = jwt.decode(
+        payload = _jwt_decode(
             token,
             settings.jwt_secret,
             algorithms=[JWT_ALGORITHM],
             audience=settings.jwt_audience,
             issuer=settings.jwt_issuer,
         )
-        return payload
-    except JWTError:
+    except _JWTError:
         return None
 
+    if digest is not None:
+        verified_token_cache.put(digest, dict(payload))
+    return payload
+
 
 def generate_random_token(length: int = 64) -> str:
     """
@@ -1,5 +1,19 @@
 # FILE: app/services/audit.py
+# Scop:
+#   - Un rând în audit_logs per acțiune (login, trimitere SMS, setări, billing ...).
+#
+# Moduri de scriere:
+#   - commit=False  => rândul intră în tranzacția apelantului
+#                      (un singur commit per request: login / register / refresh).
+#   - sync=True     => db.add + commit imediat: acțiuni critice de securitate (reset parolă, verificare email,
+#                      schimbare credențiale SMS, logout), care trebuie să existe în DB când răspundem.
+#   - implicit      => services/audit_writer.py (buffer in-process, INSERT batch): fără commit în request.
+#
+# Debug:
+#   - Un rând "lipsă" imediat după request => e încă în buffer (max AUDIT_FLUSH_INTERVAL_MS);
+#     GET /api/metrics (admin) => audit_writer.buffered.
 
+from datetime import datetime
 from typing import Optional, Dict, Any
 import json
 
@@ -7,6 +21,7 @@ from fastapi import Request
 from sqlalchemy.orm import Session
 
 from ..models import AuditLog
+from .audit_writer import audit_writer
 
 
 def create_audit_log(
@@ -15,7 +30,13 @@ def create_audit_log(
     user_id: Optional[int],
     request: Optional[Request] = None,
     details: Optional[Dict[str, Any]] = None,
+    commit: bool = True,
+    sync: bool = False,
 ) -> None:
+    """
+    commit=False => rândul intră în tranzacția apelantului (un singur commit per request).
+    sync=True    => commit imediat (acțiuni critice); altfel rândul pleacă prin audit_writer.
+    """
     ip = None
     user_agent = None
     if request:
@@ -29,12 +50,19 @@ def create_audit_log(
         except Exception:
             details_str = str(details)[:2000]
 
-    log = AuditLog(
-        user_id=user_id,
-        action=action,
-        ip=ip,
-        user_agent=(user_agent or "")[:255] if user_agent else None,
-        details=details_str,
-    )
-    db.add(log)
-    db.commit()
+    row = {
+        "user_id": user_id,
+        "action": action,
+        "ip": ip,
+        "user_agent": (user_agent or "")[:255] if user_agent else None,
+        "details": details_str,
+        "created_at": datetime.utcnow(),
+    }
+
+    if commit and not sync and audit_writer.enabled:
+        audit_writer.enqueue(row)
+        return
+
+    db.add(AuditLog(**row))
+    if commit:
+        db.commit()
@@ -0,0 +1,191 @@
+# FILE: app/services/audit_writer.py
+# Scop:
+#   - Audit asincron: create_audit_log pune rândul într-un buffer in-process, iar un thread de fundal
+#     îl scrie în audit_logs prin INSERT-uri batch (executemany, o tranzacție per lot),
+#     la AUDIT_BATCH_SIZE rânduri sau la AUDIT_FLUSH_INTERVAL_MS, ce vine primul.
+#   - Latența request-ului nu mai include commit-ul (fsync-ul) audit-ului.
+#
+# Reguli:
+#   - created_at se fixează la enqueue (momentul acțiunii), nu la flush.
+#   - Buffer plin (AUDIT_MAX_BUFFER) => rândul se scrie sincron în thread-ul apelantului (backpressure, nu pierdem).
+#   - Eroare la scriere => lotul rămâne în buffer și se reîncearcă la următorul flush;
+#     peste AUDIT_MAX_BUFFER cele mai vechi se aruncă (logat + contor `dropped`).
+#   - Scrie pe write_engine (app/database.py): pe SQLite, la coadă cu importurile, fără SQLITE_BUSY.
+#   - Shutdown: lifespan (app/main.py) => stop() golește buffer-ul. Scripturile: atexit.
+#   - Acțiunile critice de securitate nu trec pe aici: create_audit_log(..., sync=True) sau commit=False
+#     (în tranzacția apelantului, ex. login / register / refresh).
+#
+# Limitări:
+#   - Per proces: un kill -9 pierde ce e în buffer (max AUDIT_FLUSH_INTERVAL_MS de audit non-critic).
+#
+# Debug:
+#   - GET /api/metrics (admin) => audit_writer: în buffer, scrise, loturi, fallback-uri sincrone, erori.
+#   - AUDIT_ASYNC=false => comportamentul vechi (commit per rând).
+
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from ..config import settings
+from ..database import write_engine
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_INSERT_AUDIT_STMT = insert(AuditLog.__table__)
+
+
+class AuditWriter:
+    def __init__(self, *, enabled: bool, batch_size: int, flush_interval_seconds: float, max_buffer: int):
+        self.enabled = enabled
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_seconds = max(0.01, float(flush_interval_seconds))
+        self.max_buffer = max(self.batch_size, int(max_buffer))
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # un singur flush odată (thread / stop / flush manual)
+        self._buffer: List[Dict[str, Any]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._atexit_registered = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.sync_fallbacks = 0
+        self.errors = 0
+        self.dropped = 0
+        self.max_batch = 0
+        self.last_flush_seconds = 0.0
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name="audit-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=timeout)
+        self.flush()
+
+    # -------------------------
+    # API public
+    # -------------------------
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        if self._thread is None:
+            self.start()  # scripturi / teste: pornire leneșă
+        with self._cond:
+            if len(self._buffer) < self.max_buffer:
+                self._buffer.append(row)
+                self.enqueued += 1
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify_all()
+                return
+            self.sync_fallbacks += 1
+            self._cond.notify_all()
+        self._write([row])
+
+    def flush(self) -> int:
+        """
+        Scrie tot ce e în buffer, sincron (shutdown, scripturi, teste). Întoarce rândurile scrise.
+        """
+        written = 0
+        while True:
+            with self._cond:
+                rows, self._buffer = self._buffer[: self.batch_size], self._buffer[self.batch_size :]
+            if not rows:
+                return written
+            if not self._write(rows):
+                return written
+            written += len(rows)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "running": self._thread is not None,
+                "buffered": len(self._buffer),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "max_batch": self.max_batch,
+                "sync_fallbacks": self.sync_fallbacks,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "last_flush_seconds": round(self.last_flush_seconds, 4),
+            }
+
+    # -------------------------
+    # Intern
+    # -------------------------
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval_seconds
+                while not self._stopping and len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            self.flush()
+            with self._cond:
+                if self._buffer and not self._stopping:
+                    self._cond.wait(self.flush_interval_seconds)  # DB indisponibilă: nu reîncercăm în buclă
+
+    def _write(self, rows: List[Dict[str, Any]]) -> bool:
+        with self._write_lock:
+            t0 = time.perf_counter()
+            try:
+                with write_engine.begin() as conn:
+                    conn.execute(_INSERT_AUDIT_STMT, rows)
+            except Exception:
+                logger.exception("Audit writer: scrierea unui lot de %d rânduri a eșuat", len(rows))
+                self._requeue(rows)
+                return False
+            elapsed = time.perf_counter() - t0
+
+        with self._cond:
+            self.written += len(rows)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(rows))
+            self.last_flush_seconds = elapsed
+        return True
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        with self._cond:
+            self.errors += 1
+            self._buffer[:0] = rows
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.dropped += overflow
+                logger.error("Audit writer: buffer plin după erori, %d rânduri vechi aruncate", overflow)
+
+
+audit_writer = AuditWriter(
+    enabled=settings.audit_async,
+    batch_size=settings.audit_batch_size,
+    flush_interval_seconds=settings.audit_flush_interval_ms / 1000.0,
+    max_buffer=settings.audit_max_buffer,
+)
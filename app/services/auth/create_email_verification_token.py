@@ -14,7 +14,7 @@ from ...models import EmailVerificationToken
 from ...security import generate_random_token, hash_token
 
 
-def create_email_verification_token(db: Session, *, user_id: int) -> str:
+def create_email_verification_token(db: Session, *, user_id: int, commit: bool = True) -> str:
     raw = generate_random_token(64)
     th = hash_token(raw)
 
@@ -35,6 +35,7 @@ def create_email_verification_token(db: Session, *, user_id: int) -> str:
         used_at=None,
     )
     db.add(row)
-    db.commit()
+    if commit:
+        db.commit()
 
     return raw
@@ -1,6 +1,7 @@
 # FILE: app/services/auth/login_user.py
 # Scop:
 #   - Login enterprise: rate-limit (IP+email), lockout, email verify, refresh cookie.
+#   - O singură tranzacție per login (rate-limit + user + refresh token + audit), inclusiv pe eșec.
 #
 # Debug:
 #   - Dacă userul zice "corect dar nu merge", verifică:
@@ -15,10 +16,19 @@ from sqlalchemy.orm import Session
 from ...config import settings
 from ...models import User, RefreshToken
 from ...schemas import LoginIn, TokenOut
-from ...security import verify_password, needs_password_rehash, hash_password, create_access_token, generate_random_token, hash_token
+from ...security import (
+    needs_password_rehash,
+    current_password_scheme,
+    create_access_token,
+    generate_random_token,
+    hash_token,
+)
 from ..audit import create_audit_log
+from ..rate_limit import RateLimitRule, enforce_rate_limits_or_raise
+from ..unit_of_work import unit_of_work
 from .normalize_email import normalize_email
-from .enforce_rate_limit import enforce_rate_limit_or_raise
+from .password_hasher import password_hasher
+from .user_cache import user_cache
 
 
 def login_user(db: Session, *, data: LoginIn, request: Request, response: Response) -> TokenOut:
@@ -27,60 +37,76 @@ def login_user(db: Session, *, data: LoginIn, request: Request, response: Respon
 
     email_norm = normalize_email(data.email)
 
-    # Rate limit: IP + email
-    enforce_rate_limit_or_raise(
-        db,
-        key=f"login:ip:{ip}",
-        max_count=settings.login_max_attempts_ip,
-        window_seconds=settings.login_window_seconds_ip,
-        block_seconds=settings.login_block_seconds_ip,
-    )
-    enforce_rate_limit_or_raise(
+    # Un singur commit per login (și pe căile de eșec): vezi services/unit_of_work.py
+    with unit_of_work(db):
+        token_out, raw_refresh = _login(db, data=data, request=request, email_norm=email_norm, ip=ip, ua=ua)
+
+    user_cache.invalidate(token_out.user.id)  # login nou => snapshot proaspăt la primul request
+    _set_refresh_cookie(response, raw_refresh)
+    return token_out
+
+
+def _login(db: Session, *, data: LoginIn, request: Request, email_norm: str, ip: str, ua: str | None):
+    # Rate limit: IP + email, un singur statement (tranzacție proprie, înaintea oricărei scrieri din request)
+    enforce_rate_limits_or_raise(
         db,
-        key=f"login:email:{email_norm}",
-        max_count=settings.login_max_attempts_email,
-        window_seconds=settings.login_window_seconds_email,
-        block_seconds=settings.login_block_seconds_email,
+        [
+            RateLimitRule(
+                key=f"login:ip:{ip}",
+                max_count=settings.login_max_attempts_ip,
+                window_seconds=settings.login_window_seconds_ip,
+                block_seconds=settings.login_block_seconds_ip,
+            ),
+            RateLimitRule(
+                key=f"login:email:{email_norm}",
+                max_count=settings.login_max_attempts_email,
+                window_seconds=settings.login_window_seconds_email,
+                block_seconds=settings.login_block_seconds_email,
+            ),
+        ],
     )
 
     user = db.query(User).filter(User.email_normalized == email_norm).first()
 
     # Anti-enumerare: răspuns identic pentru user inexistent
     if not user or not user.is_active:
-        create_audit_log(db, "LOGIN_FAIL", None, request, details={"email": email_norm, "ip": ip})
+        create_audit_log(db, "LOGIN_FAIL", None, request, details={"email": email_norm, "ip": ip}, commit=False)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credențiale invalide.")
 
     now = datetime.utcnow()
 
     # Lockout
     if user.locked_until and user.locked_until > now:
-        create_audit_log(db, "LOGIN_LOCKED", user.id, request, details={"until": user.locked_until.isoformat()})
+        create_audit_log(
+            db, "LOGIN_LOCKED", user.id, request, details={"until": user.locked_until.isoformat()}, commit=False
+        )
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Cont temporar blocat. Reîncearcă mai târziu.")
 
     # Email verification required
     if not user.email_verified_at:
-        create_audit_log(db, "LOGIN_EMAIL_NOT_VERIFIED", user.id, request, details={"email": email_norm})
+        create_audit_log(db, "LOGIN_EMAIL_NOT_VERIFIED", user.id, request, details={"email": email_norm}, commit=False)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email neverificat. Verifică inbox și confirmă emailul.")
 
-    # Verify password
-    ok = verify_password(data.password, user.password_hash)
-    if not ok:
+    # Verify password (o singură verificare Argon2 dacă schema e tagată)
+    scheme = password_hasher.verify_password_scheme(data.password, user.password_hash, user.password_scheme)
+    if scheme is None:
         user.failed_login_count = int(user.failed_login_count or 0) + 1
         if user.failed_login_count >= settings.lockout_fail_threshold:
             user.locked_until = now + timedelta(seconds=settings.lockout_seconds)
-        db.commit()
 
-        create_audit_log(db, "LOGIN_FAIL", user.id, request, details={"email": email_norm, "ip": ip})
+        create_audit_log(db, "LOGIN_FAIL", user.id, request, details={"email": email_norm, "ip": ip}, commit=False)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credențiale invalide.")
 
-    # Upgrade hash dacă e cazul (argon2 params / pepper legacy)
-    if settings.password_pepper and needs_password_rehash(user.password_hash):
-        user.password_hash = hash_password(data.password)
+    # Upgrade hash dacă e cazul (argon2 params / legacy fără pepper); altfel doar tag-uim schema
+    if needs_password_rehash(user.password_hash, scheme):
+        user.password_hash = password_hasher.hash_password(data.password)
+        user.password_scheme = current_password_scheme()
+    elif user.password_scheme != scheme:
+        user.password_scheme = scheme
 
     user.failed_login_count = 0
     user.locked_until = None
     user.last_login_at = now
-    db.commit()
 
     # Access token scurt
     access = create_access_token({"sub": str(user.id)})
@@ -101,13 +127,10 @@ def login_user(db: Session, *, data: LoginIn, request: Request, response: Respon
         user_agent=ua[:255] if ua else None,
     )
     db.add(rt)
-    db.commit()
-
-    _set_refresh_cookie(response, raw_refresh)
 
-    create_audit_log(db, "LOGIN_SUCCESS", user.id, request, details={"ip": ip})
+    create_audit_log(db, "LOGIN_SUCCESS", user.id, request, details={"ip": ip}, commit=False)
 
-    return TokenOut(access_token=access, user=user)
+    return TokenOut(access_token=access, user=user), raw_refresh
 
 
 def _set_refresh_cookie(response: Response, raw_refresh: str) -> None:
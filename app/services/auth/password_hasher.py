@@ -0,0 +1,201 @@
+# FILE: app/services/auth/password_hasher.py
+# Scop:
+#   - Argon2 (hash + verify) rulează într-un process pool dedicat, nu în threadpool-ul FastAPI:
+#       * procesele scapă de GIL => hashing-ul nu încetinește restul request-urilor din worker;
+#       * un val de login-uri nu mai poate ocupa toate thread-urile cu hashing memory-hard
+#         (/api/orders, /api/sms/... rămân responsive).
+#   - Plafon de concurență (PASSWORD_HASH_WORKERS) + coadă limitată (PASSWORD_HASH_MAX_QUEUE):
+#     peste plafon răspundem imediat 503 + Retry-After, în loc să ținem thread-uri blocate.
+#   - Metrici: timp în coadă + timp de hashing (mediu / max), acceptate / respinse / timeout.
+#
+# Reguli:
+#   - Funcțiile din pool sunt cele din app/security.py (aceeași config: procesele copil citesc același .env).
+#   - Contextul e "spawn" (nu fork): nu moștenim lock-uri / conexiuni DB / thread-uri din procesul uvicorn.
+#     Consecință: procesul copil re-importă modulul __main__ => scripturile care ajung aici au nevoie de
+#     `if __name__ == "__main__":` (toate din scripts/ îl au).
+#   - Pool-ul pornește în lifespan (app/main.py) și se oprește la shutdown; dacă nu a fost pornit
+#     (scripturi), pornește leneș la primul apel.
+#
+# Limitări:
+#   - Per worker uvicorn: cu N workeri => N × PASSWORD_HASH_WORKERS procese Argon2 (memorie: × argon2 memory_cost).
+#
+# Debug:
+#   - GET /api/metrics (admin) => password_hasher.
+#   - PASSWORD_HASH_WORKERS=0 => inline (fără pool), util în dev / debugger.
+
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from ...config import settings
+from ... import security
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(fn: Callable, args: tuple):
+    """
+    Rulează în procesul copil. Întoarce (rezultat, început [epoch], durată hashing [s]).
+    """
+    started = time.time()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, started, time.perf_counter() - t0
+
+
+def _warmup() -> bool:
+    return True
+
+
+class PasswordHasher:
+    def __init__(self, *, workers: int, max_queue: int, timeout_seconds: float):
+        self.workers = max(0, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout_seconds = max(0.1, float(timeout_seconds))
+
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hash_total = 0.0
+        self.hash_max = 0.0
+
+    @property
+    def max_pending(self) -> int:
+        return max(1, self.workers) + self.max_queue
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self) -> None:
+        if self.workers <= 0:
+            return
+        with self._lock:
+            pool = self._ensure_pool_locked()
+        # pornim procesele acum (spawn + import app durează), nu la primul login
+        for f in [pool.submit(_warmup) for _ in range(self.workers)]:
+            f.result(timeout=60)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _ensure_pool_locked(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    # -------------------------
+    # API public
+    # -------------------------
+    def hash_password(self, password: str) -> str:
+        return self._run(security.hash_password, password)
+
+    def verify_password_scheme(self, plain_password: str, password_hash: str, scheme: Optional[str]) -> Optional[str]:
+        return self._run(security.verify_password_scheme, plain_password, password_hash, scheme)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "errors": self.errors,
+                "avg_wait_seconds": round(self.wait_total / n, 4) if n else 0.0,
+                "max_wait_seconds": round(self.wait_max, 4),
+                "avg_hash_seconds": round(self.hash_total / n, 4) if n else 0.0,
+                "max_hash_seconds": round(self.hash_max, 4),
+            }
+
+    # -------------------------
+    # Intern
+    # -------------------------
+    def _run(self, fn: Callable, *args: Any):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise self._busy_locked()
+            self._pending += 1
+            pool = self._ensure_pool_locked() if self.workers > 0 else None
+
+        submitted = time.time()
+        future = None
+        try:
+            if pool is None:
+                result, started, hash_seconds = _timed_call(fn, args)
+            else:
+                future = pool.submit(_timed_call, fn, args)
+                # _pending scade când procesul chiar termină: după timeout, future.cancel() nu oprește
+                # un hash deja pornit, iar admiterea / Retry-After trebuie să-l numere în continuare
+                future.add_done_callback(self._release_pending)
+                try:
+                    result, started, hash_seconds = future.result(timeout=self.timeout_seconds)
+                except FutureTimeoutError:
+                    future.cancel()
+                    with self._lock:
+                        self.timed_out += 1
+                        raise self._busy_locked()
+        except BrokenProcessPool:
+            logger.exception("Process pool pentru hashing parole a căzut; îl recreăm")
+            with self._lock:
+                self.errors += 1
+                if self._pool is pool:
+                    self._pool = None
+                raise self._busy_locked()
+        finally:
+            if future is None:  # inline sau submit eșuat (pool căzut)
+                self._release_pending()
+
+        wait = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.hash_total += hash_seconds
+            self.hash_max = max(self.hash_max, hash_seconds)
+        return result
+
+    def _release_pending(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _busy_locked(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serverul este ocupat. Reîncearcă în câteva secunde.",
+            headers={"Retry-After": str(self._retry_after_locked())},
+        )
+
+    def _retry_after_locked(self) -> int:
+        # cât durează să se golească ce e deja în curs, la viteza medie observată
+        avg = self.hash_total / self.completed if self.completed else 0.5
+        return max(1, math.ceil(avg * self._pending / max(1, self.workers)))
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+    timeout_seconds=settings.password_hash_timeout_seconds,
+)
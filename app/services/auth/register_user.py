@@ -16,17 +16,41 @@ from fastapi import Request
 from ...config import settings
 from ...models import User
 from ...schemas import UserRegisterIn, RegisterOut
-from ...security import hash_password
+from ...security import current_password_scheme
 from ..audit import create_audit_log
+from ..email_sender import email_sender
+from ..rate_limit import enforce_rate_limit_or_raise
+from ..unit_of_work import unit_of_work
 
 from .normalize_email import normalize_email
+from .password_hasher import password_hasher
 from .validate_password import validate_password_or_raise
-from .enforce_rate_limit import enforce_rate_limit_or_raise
 from .create_email_verification_token import create_email_verification_token
 from .send_verification_email import send_verification_email
 
 
 def register_user(db: Session, *, data: UserRegisterIn, request: Request) -> RegisterOut:
+    email_norm = normalize_email(data.email)
+
+    # Un singur commit (rate-limit + user + token verificare + audit): vezi services/unit_of_work.py
+    try:
+        with unit_of_work(db):
+            out, verify = _register(db, data=data, request=request, email_norm=email_norm)
+    except IntegrityError:
+        # cursă pe același email (unit_of_work a făcut deja rollback); răspuns generic (anti-enumerare)
+        create_audit_log(db, "REGISTER_RACE_DUPLICATE", None, request, details={"email": email_norm})
+        return RegisterOut(
+            ok=True,
+            message="Dacă emailul este valid, vei primi instrucțiuni. Dacă ai deja cont, folosește login/resetare parolă.",
+        )
+
+    # emailul e deja în email_outbox (același commit); SMTP-ul îl face thread-ul de fundal, nu request-ul
+    if verify:
+        email_sender.wake()
+    return out
+
+
+def _register(db: Session, *, data: UserRegisterIn, request: Request, email_norm: str):
     ip = request.client.host if request.client else "unknown"
     ua = request.headers.get("user-agent")
 
@@ -39,8 +63,6 @@ def register_user(db: Session, *, data: UserRegisterIn, request: Request) -> Reg
         block_seconds=settings.register_block_seconds_ip,
     )
 
-    email_norm = normalize_email(data.email)
-
     # Parolă enterprise
     validate_password_or_raise(
         data.password,
@@ -52,18 +74,20 @@ def register_user(db: Session, *, data: UserRegisterIn, request: Request) -> Reg
     # Dacă există deja => mesaj generic (anti-enumerare)
     existing = db.query(User).filter(User.email_normalized == email_norm).first()
     if existing:
-        create_audit_log(db, "REGISTER_DUPLICATE", existing.id, request, details={"email": email_norm})
-        return RegisterOut(
+        create_audit_log(db, "REGISTER_DUPLICATE", existing.id, request, details={"email": email_norm}, commit=False)
+        out = RegisterOut(
             ok=True,
             message="Dacă emailul este valid, vei primi instrucțiuni. Dacă ai deja cont, folosește login/resetare parolă.",
         )
+        return out, False
 
     now = datetime.utcnow()
 
     user = User(
         email=email_norm,  # stocăm consistent
         email_normalized=email_norm,
-        password_hash=hash_password(data.password),
+        password_hash=password_hasher.hash_password(data.password),
+        password_scheme=current_password_scheme(),
 
         first_name=data.first_name,
         last_name=data.last_name,
@@ -91,24 +115,11 @@ def register_user(db: Session, *, data: UserRegisterIn, request: Request) -> Reg
     )
 
     db.add(user)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        # și aici răspuns generic (anti-enumerare)
-        create_audit_log(db, "REGISTER_RACE_DUPLICATE", None, request, details={"email": email_norm})
-        return RegisterOut(
-            ok=True,
-            message="Dacă emailul este valid, vei primi instrucțiuni. Dacă ai deja cont, folosește login/resetare parolă.",
-        )
-
-    db.refresh(user)
-
-    # token verificare email
-    token = create_email_verification_token(db, user_id=user.id)
+    db.flush()  # user.id pentru token + audit (IntegrityError la cursă pe email)
 
-    # trimitem email (în prod obligatoriu să funcționeze)
-    send_verification_email(to_email=user.email, token=token)
+    # token verificare email + emailul în outbox (în prod fără SMTP => RuntimeError => rollback, fără cont)
+    token = create_email_verification_token(db, user_id=user.id, commit=False)
+    send_verification_email(db, to_email=user.email, token=token, commit=False)
 
     create_audit_log(
         db,
@@ -116,9 +127,11 @@ def register_user(db: Session, *, data: UserRegisterIn, request: Request) -> Reg
         user.id,
         request,
         details={"email": email_norm, "ip": ip, "ua": ua},
+        commit=False,
     )
 
-    return RegisterOut(
+    out = RegisterOut(
         ok=True,
         message="Cont creat. Verifică emailul pentru confirmare înainte de login.",
     )
+    return out, True
@@ -27,7 +27,7 @@ def revoke_refresh_token(db: Session, *, request: Request, response: Response, r
 
     rt.revoked_at = datetime.utcnow()
     db.commit()
-    create_audit_log(db, "LOGOUT", rt.user_id, request, details=None)
+    create_audit_log(db, "LOGOUT", rt.user_id, request, details=None, sync=True)
 
 
 def _clear_refresh_cookie(response: Response) -> None:
@@ -16,22 +16,34 @@ from ...models import RefreshToken, User
 from ...schemas import TokenOut
 from ...security import hash_token, generate_random_token, create_access_token
 from ..audit import create_audit_log
+from ..unit_of_work import unit_of_work
 
 
 def rotate_refresh_token(db: Session, *, request: Request, response: Response, raw_refresh: str) -> TokenOut:
+    # Un singur commit (rotire + audit), inclusiv pe eșec: vezi services/unit_of_work.py
+    try:
+        with unit_of_work(db):
+            token_out, new_raw = _rotate(db, request=request, raw_refresh=raw_refresh)
+    except HTTPException:
+        _clear_refresh_cookie(response)
+        raise
+
+    _set_refresh_cookie(response, new_raw)
+    return token_out
+
+
+def _rotate(db: Session, *, request: Request, raw_refresh: str):
     now = datetime.utcnow()
     th = hash_token(raw_refresh)
 
     rt = db.query(RefreshToken).filter(RefreshToken.token_hash == th).first()
     if not rt or rt.revoked_at or rt.expires_at <= now:
-        _clear_refresh_cookie(response)
-        create_audit_log(db, "REFRESH_FAIL", None, request, details={"reason": "missing_or_expired"})
+        create_audit_log(db, "REFRESH_FAIL", None, request, details={"reason": "missing_or_expired"}, commit=False)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesiune invalidă. Reautentifică-te.")
 
     user = db.query(User).filter(User.id == rt.user_id, User.is_active == True).first()
     if not user or not user.email_verified_at:
-        _clear_refresh_cookie(response)
-        create_audit_log(db, "REFRESH_FAIL", rt.user_id, request, details={"reason": "user_invalid"})
+        create_audit_log(db, "REFRESH_FAIL", rt.user_id, request, details={"reason": "user_invalid"}, commit=False)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesiune invalidă. Reautentifică-te.")
 
     # Rotire: revocăm vechiul token și emitem altul
@@ -51,16 +63,12 @@ def rotate_refresh_token(db: Session, *, request: Request, response: Response, r
         ip=(request.client.host if request.client else None),
         user_agent=(request.headers.get("user-agent") or "")[:255] or None,
     )
-
     db.add(new_row)
-    db.commit()
-
-    _set_refresh_cookie(response, new_raw)
 
     access = create_access_token({"sub": str(user.id)})
-    create_audit_log(db, "REFRESH_SUCCESS", user.id, request, details=None)
+    create_audit_log(db, "REFRESH_SUCCESS", user.id, request, details=None, commit=False)
 
-    return TokenOut(access_token=access, user=user)
+    return TokenOut(access_token=access, user=user), new_raw
 
 
 def _set_refresh_cookie(response: Response, raw_refresh: str) -> None:
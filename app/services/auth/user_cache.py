@@ -0,0 +1,148 @@
+# FILE: app/services/auth/user_cache.py
+# Scop:
+#   - Cache LRU per proces cu snapshot-ul userului autentificat (câmpurile pentru autorizare + citiri dashboard),
+#     ca rutele de citire să nu mai facă SELECT users la fiecare request (dashboard-ul face 5–6 la încărcare).
+#   - TTL scurt (USER_CACHE_TTL_SECONDS), plafonat la durata access token-ului.
+#
+# Reguli:
+#   - Snapshot imutabil (CachedUser): nu e obiect ORM, nu se poate modifica / salva din greșeală.
+#   - Rutele care SCRIU pe user folosesc în continuare get_current_user (load din DB), care și reîmprospătează cache-ul.
+#   - invalidate(user_id) după: schimbare setări, login, reset parolă, verificare email, dezactivare.
+#   - Generație per user: un load început înainte de invalidate nu mai poate repune în cache date vechi.
+#
+# Observații:
+#   - Cache-ul e per worker: invalidarea într-un worker nu ajunge în ceilalți => staleness maxim = TTL.
+#   - Conține token-ul SMSAPI (pentru /sms/balance); stă doar în memoria procesului, nu apare în metrici.
+#
+# Debug:
+#   - GET /api/metrics (admin) => user_cache: hits / misses / invalidations / evictions.
+#   - USER_CACHE_TTL_SECONDS=0 dezactivează cache-ul.
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from ...config import settings
+from ...models import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    company_name: Optional[str]
+    company_cui: Optional[str]
+    street: str
+    street_no: str
+    locality: str
+    county: str
+    postal_code: str
+    country: str
+    role: str
+    is_active: bool
+    email_verified_at: Optional[datetime]
+    policy_version: Optional[str]
+    policy_accepted_at: Optional[datetime]
+    created_at: datetime
+    last_login_at: Optional[datetime]
+
+    smsapi_token: Optional[str]
+    smsapi_sender: Optional[str]
+    sms_company_name: Optional[str]
+    sms_template: Optional[str]
+    sms_transliteration: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(**{f: getattr(user, f) for f in cls.__dataclass_fields__})
+
+
+class UserCache:
+    def __init__(self, *, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[CachedUser, float]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, user_id: int) -> Tuple[Optional[CachedUser], int]:
+        """
+        (snapshot sau None, generația curentă). Generația se dă înapoi la put() după load-ul din DB.
+        """
+        now = time.monotonic()
+        with self._lock:
+            gen = self._generations.get(user_id, 0)
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0], gen
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None, gen
+
+    def generation(self, user_id: int) -> int:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, snapshot: CachedUser, generation: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and self._generations.get(snapshot.id, 0) != generation:
+                return  # a fost invalidat între timp; load-ul nostru poate fi vechi
+            self._entries[snapshot.id] = (snapshot, time.monotonic())
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for uid in list(self._entries):
+                self._generations[uid] = self._generations.get(uid, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+# TTL plafonat la durata access token-ului
+user_cache = UserCache(
+    ttl_seconds=min(settings.user_cache_ttl_seconds, settings.access_token_expire_minutes * 60),
+    max_entries=settings.user_cache_max_entries,
+)
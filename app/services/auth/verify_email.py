@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from ...models import EmailVerificationToken, User
 from ...security import hash_token
 from ..audit import create_audit_log
+from .user_cache import user_cache
 
 
 def verify_email(db: Session, *, request: Request, token: str) -> None:
@@ -41,5 +42,6 @@ def verify_email(db: Session, *, request: Request, token: str) -> None:
     user.email_verified_at = now
     row.used_at = now
     db.commit()
+    user_cache.invalidate(user.id)
 
-    create_audit_log(db, "EMAIL_VERIFY_SUCCESS", user.id, request, details={"email": user.email})
+    create_audit_log(db, "EMAIL_VERIFY_SUCCESS", user.id, request, details={"email": user.email}, sync=True)
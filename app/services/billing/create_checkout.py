@@ -6,6 +6,7 @@
 # Notes:
 #   - Trial (7 zile) se aplică DOAR pentru growth/pro și vine din env STRIPE_TRIAL_DAYS.
 #   - success_url/cancel_url sunt controlate din env (nu hardcodăm).
+#   - create_checkout_session_async: aceiași parametri, prin API-ul async al SDK-ului Stripe (HTTPX).
 #
 # Debug / depanare:
 #   - "Stripe neconfigurat" => lipsește STRIPE_SECRET_KEY sau URL-urile.
@@ -17,11 +18,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 import stripe
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ...config import settings
 from ...models import User
-from .stripe_customer import get_or_create_stripe_customer_id
+from ..request_timing import external_call
+from .stripe_customer import get_or_create_stripe_customer_id, get_or_create_stripe_customer_id_async
 
 
 @dataclass(frozen=True)
@@ -64,6 +67,30 @@ def create_checkout_session(db: Session, *, user: User, plan: str) -> CheckoutRe
     Creează Checkout Session pentru un plan.
     Returnează (session_id, url) pentru redirect din UI.
     """
+    _check_stripe_config()
+    price_id = _get_price_id_for_plan(plan)
+    customer_id = get_or_create_stripe_customer_id(db, user=user)
+
+    with external_call("stripe"):
+        session = stripe.checkout.Session.create(**_checkout_params(user, plan, price_id, customer_id))
+    return _checkout_result(session)
+
+
+async def create_checkout_session_async(db: AsyncSession, *, user: User, plan: str) -> CheckoutResult:
+    """
+    Ca create_checkout_session, pentru rute async (stripe ..._async pe clientul HTTPX al SDK-ului).
+    `user` trebuie încărcat în `db` (AsyncSession).
+    """
+    _check_stripe_config()
+    price_id = _get_price_id_for_plan(plan)
+    customer_id = await get_or_create_stripe_customer_id_async(db, user=user)
+
+    with external_call("stripe"):
+        session = await stripe.checkout.Session.create_async(**_checkout_params(user, plan, price_id, customer_id))
+    return _checkout_result(session)
+
+
+def _check_stripe_config() -> None:
     if not settings.stripe_secret_key:
         raise RuntimeError("Stripe neconfigurat: lipsește STRIPE_SECRET_KEY.")
     if not settings.stripe_checkout_success_url or not settings.stripe_checkout_cancel_url:
@@ -71,9 +98,8 @@ def create_checkout_session(db: Session, *, user: User, plan: str) -> CheckoutRe
 
     stripe.api_key = settings.stripe_secret_key
 
-    price_id = _get_price_id_for_plan(plan)
-    customer_id = get_or_create_stripe_customer_id(db, user=user)
 
+def _checkout_params(user: User, plan: str, price_id: str, customer_id: str) -> dict:
     success_url = _ensure_session_id_placeholder(settings.stripe_checkout_success_url.strip())
     cancel_url = settings.stripe_checkout_cancel_url.strip()
 
@@ -89,20 +115,22 @@ def create_checkout_session(db: Session, *, user: User, plan: str) -> CheckoutRe
     if trial_days > 0:
         subscription_data["trial_period_days"] = trial_days
 
-    session = stripe.checkout.Session.create(
-        mode="subscription",
-        customer=customer_id,
-        client_reference_id=str(user.id),
-        line_items=[{"price": price_id, "quantity": 1}],
-        success_url=success_url,
-        cancel_url=cancel_url,
-        metadata={
+    return {
+        "mode": "subscription",
+        "customer": customer_id,
+        "client_reference_id": str(user.id),
+        "line_items": [{"price": price_id, "quantity": 1}],
+        "success_url": success_url,
+        "cancel_url": cancel_url,
+        "metadata": {
             "app_user_id": str(user.id),
             "plan": plan,
         },
-        subscription_data=subscription_data,
-    )
+        "subscription_data": subscription_data,
+    }
+
 
+def _checkout_result(session) -> CheckoutResult:
     if not session.url:
         raise RuntimeError("Stripe checkout URL missing (session.url is empty).")
 
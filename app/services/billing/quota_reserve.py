@@ -0,0 +1,287 @@
+# FILE: app/services/billing/quota_reserve.py
+# Scop:
+#   - Hard limit lunar "SMS reușite / lună" per tenant (CHECKLIST SMS-01 / SMS-02), fără race între workeri.
+#   - Flux: reserve (înainte de trimitere) -> commit(used=k) sau release (eșec) -> rezervările uitate expiră.
+#
+# Cum e atomic:
+#   - Rezervarea = UN singur UPDATE condiționat pe rândul contorului:
+#       UPDATE sms_quota_counters SET reserved = reserved + :n
+#       WHERE user_id = :u AND period = :p AND used + reserved + :n <= :limit
+#       RETURNING used, reserved
+#     Fără SELECT înainte => doi workeri nu pot „vedea” același loc liber.
+#   - Decontarea trece rezervarea din 'pending' condiționat (WHERE status = 'pending'),
+#     deci fiecare rezervare e scăzută din reserved O singură dată (commit / release / expire).
+#
+# Observații:
+#   - SMS_MONTHLY_QUOTA=0 => cota e dezactivată (reserve întoarce None, restul sunt no-op).
+#   - Perioada = luna UTC ("YYYY-MM"); o rezervare se decontează pe perioada în care a fost făcută.
+#   - Dacă o rezervare expiră înainte de commit (worker blocat), SMS-urile trimise se adaugă totuși la used
+#     (putem depăși limita cu cel mult acele SMS-uri; nu pierdem contabilizarea).
+#
+# Debug:
+#   - 402 deși tenantul „nu a trimis”: verifică reserved din sms_quota_counters; rezervările pending
+#     expirate se eliberează la următorul reserve refuzat (sau din janitor).
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Integer, bindparam, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from ...config import settings
+from ...database import dialect_insert
+from ...models import SmsQuotaCounter, SmsQuotaReservation
+
+
+@dataclass(frozen=True)
+class QuotaReservation:
+    id: int
+    user_id: int
+    period: str
+    amount: int
+
+
+@dataclass(frozen=True)
+class QuotaUsage:
+    enabled: bool
+    period: str
+    limit: int
+    used: int
+    reserved: int
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used - self.reserved) if self.enabled else 0
+
+
+_COUNTERS = SmsQuotaCounter.__table__
+_RESERVATIONS = SmsQuotaReservation.__table__
+
+# Statement-uri construite o dată (bindparam): tranzacțiile de scriere rămân cât mai scurte
+_RESERVE_STMT = (
+    update(_COUNTERS)
+    .where(
+        _COUNTERS.c.user_id == bindparam("b_user_id"),
+        _COUNTERS.c.period == bindparam("b_period"),
+        _COUNTERS.c.used + _COUNTERS.c.reserved + bindparam("b_amount") <= bindparam("b_limit"),
+    )
+    .values(reserved=_COUNTERS.c.reserved + bindparam("b_amount"), updated_at=bindparam("b_now"))
+)
+_INSERT_RESERVATION_STMT = insert(_RESERVATIONS)
+# PostgreSQL: rezervare + rândul din sms_quota_reservations într-un singur statement (CTE cu UPDATE ... RETURNING)
+# => lock-ul pe rândul contorului e ținut un round trip mai puțin (contenția pe un tenant = acest rând)
+_RESERVED_CTE = _RESERVE_STMT.returning(_COUNTERS.c.user_id, _COUNTERS.c.period).cte("reserved")
+_RESERVE_AND_INSERT_STMT = (
+    insert(_RESERVATIONS)
+    .from_select(
+        ["user_id", "period", "amount", "status", "expires_at", "created_at"],
+        select(
+            _RESERVED_CTE.c.user_id,
+            _RESERVED_CTE.c.period,
+            bindparam("b_amount", type_=Integer),
+            literal("pending"),
+            bindparam("b_expires_at", type_=DateTime),
+            bindparam("b_now", type_=DateTime),
+        ),
+    )
+    .returning(_RESERVATIONS.c.id)
+)
+_SETTLE_COUNTER_STMT = (
+    update(_COUNTERS)
+    .where(_COUNTERS.c.user_id == bindparam("b_user_id"), _COUNTERS.c.period == bindparam("b_period"))
+    .values(
+        used=_COUNTERS.c.used + bindparam("b_used"),
+        reserved=_COUNTERS.c.reserved - bindparam("b_release"),
+        updated_at=bindparam("b_now"),
+    )
+)
+_MARK_RESERVATION_STMT = (
+    update(_RESERVATIONS)
+    .where(_RESERVATIONS.c.id == bindparam("b_id"), _RESERVATIONS.c.status == "pending")
+    .values(status=bindparam("b_status"))
+)
+
+
+def current_period(now: Optional[datetime] = None) -> str:
+    return (now or datetime.utcnow()).strftime("%Y-%m")
+
+
+def _ensure_counter(db: Session, user_id: int, period: str) -> None:
+    table = _COUNTERS
+    stmt = dialect_insert(table).values(user_id=user_id, period=period, used=0, reserved=0)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        db.execute(stmt.on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.period]))
+        return
+    exists = db.execute(
+        select(table.c.id).where(table.c.user_id == user_id, table.c.period == period)
+    ).first()
+    if not exists:
+        db.execute(stmt)
+
+
+def _try_reserve(db: Session, user_id: int, period: str, amount: int, limit: int, now: datetime) -> Tuple[bool, Optional[int]]:
+    """
+    (rezervat, id rezervare): pe PostgreSQL rândul de rezervare e inserat în același statement,
+    altfel id-ul e None și apelantul îl inserează.
+    """
+    params = {"b_user_id": user_id, "b_period": period, "b_amount": amount, "b_limit": limit, "b_now": now}
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        params["b_expires_at"] = now + timedelta(seconds=settings.sms_quota_reservation_ttl_seconds)
+        reservation_id = db.execute(_RESERVE_AND_INSERT_STMT, params).scalar()
+        return reservation_id is not None, reservation_id
+    if bind.dialect.update_returning:
+        stmt = _RESERVE_STMT.returning(_COUNTERS.c.used, _COUNTERS.c.reserved)
+        return db.execute(stmt, params).first() is not None, None
+    return db.execute(_RESERVE_STMT, params).rowcount == 1, None
+
+
+def reserve_sms_quota(
+    db: Session,
+    user_id: int,
+    amount: int,
+    *,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Optional[QuotaReservation]:
+    """
+    Rezervă `amount` SMS-uri din cota lunii curente (commit propriu, vizibil imediat altor workeri).
+    - None dacă cota e dezactivată.
+    - 402 dacă nu mai e loc (după ce eliberăm rezervările expirate ale tenantului).
+    """
+    limit = settings.sms_monthly_quota if limit is None else limit
+    if limit <= 0 or amount <= 0:
+        return None
+
+    now = now or datetime.utcnow()
+    period = current_period(now)
+
+    ok, reservation_id = _try_reserve(db, user_id, period, amount, limit, now)
+    if not ok:
+        # rândul contorului poate lipsi (prima trimitere din lună) sau blocat de rezervări expirate
+        _ensure_counter(db, user_id, period)
+        expire_stale_reservations(db, user_id=user_id, now=now, commit=False)
+        ok, reservation_id = _try_reserve(db, user_id, period, amount, limit, now)
+
+    if not ok:
+        db.commit()
+        usage = get_sms_quota_usage(db, user_id, limit=limit, now=now)
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=(
+                f"Ai atins limita lunară de {limit} SMS-uri (rămase: {usage.remaining}, cerute: {amount}). "
+                "Fă upgrade la abonament pentru a trimite mai multe."
+            ),
+        )
+
+    if reservation_id is None:
+        res = db.execute(
+            _INSERT_RESERVATION_STMT,
+            {
+                "user_id": user_id,
+                "period": period,
+                "amount": amount,
+                "status": "pending",
+                "expires_at": now + timedelta(seconds=settings.sms_quota_reservation_ttl_seconds),
+                "created_at": now,
+            },
+        )
+        reservation_id = res.inserted_primary_key[0]
+    db.commit()
+    return QuotaReservation(id=reservation_id, user_id=user_id, period=period, amount=amount)
+
+
+def _settle(db: Session, reservation: QuotaReservation, used: int, new_status: str) -> None:
+    used = max(0, min(int(used), reservation.amount))
+
+    moved = db.execute(_MARK_RESERVATION_STMT, {"b_id": reservation.id, "b_status": new_status}).rowcount == 1
+
+    # dacă rezervarea a expirat între timp, reserved a fost deja scăzut => adăugăm doar used
+    release = reservation.amount if moved else 0
+    if release or used:
+        db.execute(
+            _SETTLE_COUNTER_STMT,
+            {
+                "b_user_id": reservation.user_id,
+                "b_period": reservation.period,
+                "b_used": used,
+                "b_release": release,
+                "b_now": datetime.utcnow(),
+            },
+        )
+    db.commit()
+
+
+def commit_sms_quota(db: Session, reservation: Optional[QuotaReservation], used: int) -> None:
+    """
+    Decontează rezervarea: `used` SMS-uri reușite trec în used, restul se eliberează.
+    """
+    if reservation is None:
+        return
+    _settle(db, reservation, used, "committed")
+
+
+def release_sms_quota(db: Session, reservation: Optional[QuotaReservation]) -> None:
+    """
+    Eliberează integral rezervarea (trimiterea n-a avut loc).
+    """
+    if reservation is None:
+        return
+    _settle(db, reservation, 0, "released")
+
+
+def expire_stale_reservations(
+    db: Session,
+    *,
+    user_id: Optional[int] = None,
+    now: Optional[datetime] = None,
+    batch_size: int = 500,
+    commit: bool = True,
+) -> int:
+    """
+    Trece rezervările 'pending' expirate în 'expired' și le scade din reserved.
+    Sigur concurent: doar cine reușește tranziția condiționată scade contorul.
+    """
+    now = now or datetime.utcnow()
+    r = _RESERVATIONS
+
+    q = select(r.c.id, r.c.user_id, r.c.period, r.c.amount).where(
+        r.c.status == "pending", r.c.expires_at < now
+    )
+    if user_id is not None:
+        q = q.where(r.c.user_id == user_id)
+    rows = db.execute(q.order_by(r.c.expires_at).limit(batch_size)).all()
+
+    expired = 0
+    for rid, uid, period, amount in rows:
+        moved = db.execute(_MARK_RESERVATION_STMT, {"b_id": rid, "b_status": "expired"}).rowcount == 1
+        if not moved:
+            continue
+        db.execute(
+            _SETTLE_COUNTER_STMT,
+            {"b_user_id": uid, "b_period": period, "b_used": 0, "b_release": amount, "b_now": now},
+        )
+        expired += 1
+
+    if commit:
+        db.commit()
+    return expired
+
+
+def get_sms_quota_usage(
+    db: Session,
+    user_id: int,
+    *,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> QuotaUsage:
+    limit = settings.sms_monthly_quota if limit is None else limit
+    period = current_period(now)
+    c = _COUNTERS
+    row = db.execute(
+        select(c.c.used, c.c.reserved).where(c.c.user_id == user_id, c.c.period == period)
+    ).first()
+    used, reserved = (int(row[0]), int(row[1])) if row else (0, 0)
+    return QuotaUsage(enabled=limit > 0, period=period, limit=max(0, limit), used=used, reserved=reserved)
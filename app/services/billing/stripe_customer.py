@@ -6,6 +6,8 @@
 # De ce așa:
 #   - Portalul Stripe și webhooks au nevoie de "customer" ca pivot.
 #   - Evităm să lucrăm cu customer_email ca identitate (email se poate schimba).
+#   - Varianta async (rute `async def`): stripe.Customer.create_async (client HTTPX al SDK-ului),
+#     nu ține thread cât răspunde Stripe.
 #
 # Debug / depanare:
 #   - Dacă Stripe dă eroare, verifică STRIPE_SECRET_KEY și conectivitatea.
@@ -13,10 +15,12 @@
 #   - Dacă ai customers multipli pentru același user, verifică audit logs.
 
 import stripe
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ...config import settings
 from ...models import User
+from ..request_timing import external_call
 
 
 def get_or_create_stripe_customer_id(db: Session, *, user: User) -> str:
@@ -30,24 +34,44 @@ def get_or_create_stripe_customer_id(db: Session, *, user: User) -> str:
     if user.stripe_customer_id:
         return str(user.stripe_customer_id)
 
+    with external_call("stripe"):
+        customer = stripe.Customer.create(**_customer_params(user))
+
+    user.stripe_customer_id = str(customer.id)
+    db.commit()
+    db.refresh(user)
+
+    return str(customer.id)
+
+
+async def get_or_create_stripe_customer_id_async(db: AsyncSession, *, user: User) -> str:
+    """
+    Ca get_or_create_stripe_customer_id; `user` trebuie încărcat în `db` (AsyncSession).
+    """
+    if user.stripe_customer_id:
+        return str(user.stripe_customer_id)
+
+    with external_call("stripe"):
+        customer = await stripe.Customer.create_async(**_customer_params(user))
+
+    user.stripe_customer_id = str(customer.id)
+    await db.commit()
+
+    return str(customer.id)
+
+
+def _customer_params(user: User) -> dict:
     if not settings.stripe_secret_key:
         raise RuntimeError("Stripe neconfigurat: lipsește STRIPE_SECRET_KEY.")
 
     stripe.api_key = settings.stripe_secret_key
 
     full_name = f"{(user.first_name or '').strip()} {(user.last_name or '').strip()}".strip() or None
-
-    customer = stripe.Customer.create(
-        email=str(user.email),
-        name=full_name,
-        metadata={
+    return {
+        "email": str(user.email),
+        "name": full_name,
+        "metadata": {
             "app_user_id": str(user.id),
             "app": "smssend-by-swg",
         },
-    )
-
-    user.stripe_customer_id = str(customer.id)
-    db.commit()
-    db.refresh(user)
-
-    return str(customer.id)
+    }
@@ -0,0 +1,44 @@
+# FILE: app/services/email_outbox.py
+# Scop:
+#   - enqueue_email: pune un email în tabela email_outbox; trimiterea efectivă o face services/email_sender.py.
+#   - Register / forgot-password răspund imediat după commit, fără să aștepte serverul SMTP.
+#
+# Reguli:
+#   - commit=False => rândul intră în tranzacția apelantului (userul / tokenul și emailul lor apar împreună
+#     sau deloc). După commit, apelantul cheamă email_sender.wake() ca trimiterea să plece fără să aștepte poll-ul.
+#   - În PROD fără SMTP_HOST / SMTP_FROM => RuntimeError la enqueue (ca înainte la trimitere):
+#     nu creăm conturi care nu pot fi verificate niciodată.
+#
+# Debug:
+#   - SELECT status, attempts, last_error FROM email_outbox ORDER BY id DESC;
+
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import EmailOutbox
+
+
+def smtp_configured() -> bool:
+    return bool(settings.smtp_host and settings.smtp_from)
+
+
+def enqueue_email(db: Session, *, to_email: str, subject: str, body: str, commit: bool = True) -> EmailOutbox:
+    if not settings.debug and not smtp_configured():
+        raise RuntimeError("SMTP_HOST / SMTP_FROM lipsesc. Nu pot trimite email în producție.")
+
+    now = datetime.utcnow()
+    row = EmailOutbox(
+        to_email=to_email,
+        subject=subject[:255],
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(row)
+    if commit:
+        db.commit()
+    return row
@@ -1,44 +1,382 @@
 # FILE: app/services/email_sender.py
 # Scop:
-#   - Trimitere email SMTP (TLS) pentru verificare email și resetare parolă.
+#   - Trimitere email în fundal din email_outbox (services/email_outbox.py): verificare email, resetare parolă.
+#   - O singură conexiune SMTP (STARTTLS + AUTH o dată), refolosită pentru toate mesajele din coadă;
+#     se închide după EMAIL_SMTP_IDLE_SECONDS fără trimiteri și se redeschide la nevoie.
+#
+# Reguli:
+#   - Claim: UPDATE condiționat (status + next_attempt_at <= acum) => 'sending' cu lease EMAIL_SEND_LEASE_SECONDS.
+#     Doi workeri nu trimit același rând; un rând rămas în 'sending' (crash) e reluat după expirarea lease-ului.
+#   - Eroare temporară (conexiune, 4xx) => 'pending' cu backoff exponențial
+#     (EMAIL_RETRY_BASE_SECONDS * 2^(încercări-1), plafonat la EMAIL_RETRY_MAX_SECONDS, cu jitter).
+#   - Eroare permanentă (5xx) sau EMAIL_MAX_ATTEMPTS atins => 'failed' (rămâne pentru investigație).
+#   - Trimis => 'sent' și body = NULL (conține linkul de verificare / codul de reset); la fel la 'failed'.
+#   - Conexiunea refolosită a căzut (server a închis-o între mesaje / 421) => reconectare și o reîncercare imediată.
+#   - At-least-once: un crash între SMTP OK și UPDATE => mesajul poate pleca de două ori.
 #
 # Debug:
-#   - În DEBUG, dacă SMTP_* nu sunt setate, logăm DOAR faptul că am “trimis” (nu blocăm dev).
-#   - În PROD, dacă SMTP_HOST/SMTP_FROM lipsesc => ridicăm excepție (altfel funcția e falsă).
+#   - În DEBUG, dacă SMTP_* nu sunt setate, logăm DOAR faptul că am “trimis” (body neafișat) și marcăm 'sent'.
+#   - Local: python scripts/dev/fake_smtp.py --port 2525 + SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_TLS=false.
+#   - GET /api/metrics (admin) => email_sender: trimise, reîncercări, eșuate, conexiuni deschise / refolosite.
 
+import atexit
 import logging
+import random
 import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update
 
 from ..config import settings
+from ..database import engine
+from ..models import EmailOutbox
+from .email_outbox import smtp_configured
+from .request_timing import external_call
 
 logger = logging.getLogger(__name__)
 
+_t = EmailOutbox.__table__
+
+
+class PermanentEmailError(Exception):
+    pass
+
+
+class SmtpTransport:
+    """
+    Conexiune SMTP persistentă. Nu e thread-safe: o folosește doar thread-ul EmailSender.
+    """
+
+    def __init__(self, *, host: str, port: int, user: str, password: str, use_tls: bool, timeout: float, idle_seconds: int):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_seconds = max(0, int(idle_seconds))
+
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+        self.connections = 0
+        self.reconnects = 0
+        self.messages = 0
+
+    @classmethod
+    def from_settings(cls) -> "SmtpTransport":
+        return cls(
+            host=settings.smtp_host,
+            port=settings.smtp_port,
+            user=settings.smtp_user,
+            password=settings.smtp_password,
+            use_tls=settings.smtp_tls,
+            timeout=settings.email_smtp_timeout_seconds,
+            idle_seconds=settings.email_smtp_idle_seconds,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+    def send(self, from_addr: str, to_addr: str, message: str) -> None:
+        with external_call("smtp"):
+            self._send(from_addr, to_addr, message)
+
+    def _send(self, from_addr: str, to_addr: str, message: str) -> None:
+        reused = self._server is not None
+        try:
+            self._send_once(from_addr, to_addr, message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+            self.close()
+            if not reused:
+                raise
+            # serverul a închis conexiunea inactivă între mesaje: o redeschidem și reîncercăm o dată
+            logger.info("SMTP: conexiunea refolosită a căzut (%s), reconectez", e)
+            self.reconnects += 1
+            self._send_once(from_addr, to_addr, message)
+
+    def close_if_idle(self) -> None:
+        if self._server is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+            self.close()
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        return server
+
+    def _send_once(self, from_addr: str, to_addr: str, message: str) -> None:
+        if self._server is None:
+            self._server = self._connect()
+        self._last_used = time.monotonic()  # și un 4xx / 5xx înseamnă conexiune activă (nu e inactivă)
+        try:
+            self._server.sendmail(from_addr, [to_addr], message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            raise
+        except smtplib.SMTPRecipientsRefused as e:
+            self._reset()
+            codes = [code for code, _ in e.recipients.values()]
+            if codes and all(code >= 500 for code in codes):
+                raise PermanentEmailError(f"destinatar respins: {codes}") from e
+            raise
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code == 421:
+                # serverul închide conexiunea (ex. timeout de inactivitate); smtplib a închis-o deja
+                raise smtplib.SMTPServerDisconnected(f"421 {e.smtp_error!r}") from e
+            self._reset()
+            if e.smtp_code >= 500:
+                raise PermanentEmailError(f"{e.smtp_code} {e.smtp_error!r}") from e
+            raise
+        self.messages += 1
 
-def send_email(*, to_email: str, subject: str, body: str) -> None:
-    if settings.debug and not settings.smtp_host:
-        logger.warning("DEBUG: SMTP neconfigurat. Email către=%s subiect=%s (body neafișat)", to_email, subject)
-        return
+    def _reset(self) -> None:
+        # tranzacția SMTP eșuată nu trebuie să strice conexiunea pentru mesajul următor
+        try:
+            if self._server is not None:
+                self._server.rset()
+        except Exception:
+            self.close()
 
-    if not settings.smtp_host or not settings.smtp_from:
-        raise RuntimeError("SMTP_HOST / SMTP_FROM lipsesc. Nu pot trimite email în producție.")
 
+def build_message(*, to_email: str, subject: str, body: str) -> str:
     msg = MIMEText(body, _charset="utf-8")
     msg["Subject"] = subject
     msg["From"] = settings.smtp_from
     msg["To"] = to_email
+    msg["Date"] = formatdate(localtime=False)
+    msg["Message-ID"] = make_msgid()
+    return msg.as_string()
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    base = max(1, settings.email_retry_base_seconds)
+    delay = min(float(settings.email_retry_max_seconds), base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.9, 1.1)
+
+
+class EmailSender:
+    """
+    Thread de fundal care golește email_outbox. wake() după commit => trimitere fără să aștepte poll-ul.
+    """
+
+    def __init__(self, *, enabled: bool, poll_seconds: float, batch_size: int, max_attempts: int, lease_seconds: int):
+        self.enabled = enabled
+        self.poll_seconds = max(0.1, float(poll_seconds))
+        self.batch_size = max(1, int(batch_size))
+        self.max_attempts = max(1, int(max_attempts))
+        self.lease_seconds = max(1, int(lease_seconds))
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+        self._transport: Optional[SmtpTransport] = None
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name="email-sender", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=timeout)
+        # ce n-a plecat rămâne 'pending' în DB (durabil) pentru pornirea următoare
 
-    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=12)
-    try:
-        if settings.smtp_tls:
-            server.starttls()
+    # -------------------------
+    # API public
+    # -------------------------
+    def wake(self) -> None:
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self.start()  # scripturi / teste: pornire leneșă
+        self._wake.set()
 
-        if settings.smtp_user:
-            server.login(settings.smtp_user, settings.smtp_password)
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Trimite un lot de rânduri scadente (sincron, în thread-ul apelantului). Întoarce câte au fost revendicate.
+        """
+        claimed = self._claim(now or datetime.utcnow())
+        for row in claimed:
+            if self._stopping.is_set():
+                self._release(row[0])
+                continue
+            self._deliver(*row)
+        return len(claimed)
 
-        server.sendmail(settings.smtp_from, [to_email], msg.as_string())
-    finally:
+    def stats(self) -> dict:
+        transport = self._transport
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": self._thread is not None,
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "smtp_connected": bool(transport and transport.connected),
+                "smtp_connections": transport.connections if transport else 0,
+                "smtp_reconnects": transport.reconnects if transport else 0,
+                "smtp_messages": transport.messages if transport else 0,
+            }
+
+    # -------------------------
+    # Intern
+    # -------------------------
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                while self.run_once() >= self.batch_size and not self._stopping.is_set():
+                    pass
+            except Exception as e:
+                # DB indisponibilă etc.: reîncercăm la următorul poll
+                logger.exception("Email sender: golirea outbox-ului a eșuat")
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = str(e)[:200]
+            if self._transport is not None:
+                self._transport.close_if_idle()
+        if self._transport is not None:
+            self._transport.close()
+
+    def _claim(self, now: datetime) -> List[Tuple[int, str, str, Optional[str], int]]:
+        due = (_t.c.status.in_(("pending", "sending"))) & (_t.c.next_attempt_at <= now)
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        claimed = []
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(_t.c.id, _t.c.to_email, _t.c.subject, _t.c.body, _t.c.attempts)
+                .where(due)
+                .order_by(_t.c.next_attempt_at, _t.c.id)
+                .limit(self.batch_size)
+            ).all()
+            for row in rows:
+                # condiționat: alt worker poate revendica rândul între SELECT și UPDATE
+                res = conn.execute(
+                    update(_t)
+                    .where((_t.c.id == row.id) & due)
+                    .values(status="sending", attempts=_t.c.attempts + 1, next_attempt_at=lease_until)
+                )
+                if res.rowcount == 1:
+                    claimed.append((row.id, row.to_email, row.subject, row.body, row.attempts + 1))
+        return claimed
+
+    def _deliver(self, row_id: int, to_email: str, subject: str, body: Optional[str], attempts: int) -> None:
         try:
-            server.quit()
-        except Exception:
-            pass
+            if settings.debug and not smtp_configured():
+                logger.warning("DEBUG: SMTP neconfigurat. Email către=%s subiect=%s (body neafișat)", to_email, subject)
+            else:
+                if self._transport is None:
+                    self._transport = SmtpTransport.from_settings()
+                self._transport.send(
+                    settings.smtp_from, to_email, build_message(to_email=to_email, subject=subject, body=body or "")
+                )
+        except PermanentEmailError as e:
+            self._fail(row_id, attempts, str(e), permanent=True)
+            return
+        except Exception as e:
+            if self._transport is not None and not isinstance(e, smtplib.SMTPResponseException):
+                self._transport.close()
+            self._fail(row_id, attempts, f"{type(e).__name__}: {e}", permanent=False)
+            return
+
+        with engine.begin() as conn:
+            conn.execute(
+                update(_t).where(_t.c.id == row_id).values(status="sent", sent_at=datetime.utcnow(), body=None, last_error=None)
+            )
+        with self._lock:
+            self.sent += 1
+
+    def _fail(self, row_id: int, attempts: int, error: str, *, permanent: bool) -> None:
+        error = error[:500]
+        give_up = permanent or attempts >= self.max_attempts
+        if give_up:
+            values = {"status": "failed", "last_error": error, "body": None}
+            logger.error("Email %s: eșuat definitiv după %d încercări: %s", row_id, attempts, error)
+        else:
+            delay = retry_delay_seconds(attempts)
+            values = {
+                "status": "pending",
+                "last_error": error,
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay),
+            }
+            logger.warning("Email %s: încercarea %d a eșuat (%s), reîncerc în %.0fs", row_id, attempts, error, delay)
+
+        with engine.begin() as conn:
+            conn.execute(update(_t).where(_t.c.id == row_id).values(**values))
+        with self._lock:
+            if give_up:
+                self.failed += 1
+            else:
+                self.retried += 1
+            self.last_error = error[:200]
+
+    def _release(self, row_id: int) -> None:
+        # oprire în mijlocul lotului: rândul revine imediat în coadă, fără să consume o încercare
+        with engine.begin() as conn:
+            conn.execute(
+                update(_t)
+                .where(_t.c.id == row_id)
+                .values(status="pending", attempts=_t.c.attempts - 1, next_attempt_at=datetime.utcnow())
+            )
+
+
+email_sender = EmailSender(
+    enabled=settings.email_sender_enabled,
+    poll_seconds=settings.email_outbox_poll_seconds,
+    batch_size=settings.email_batch_size,
+    max_attempts=settings.email_max_attempts,
+    lease_seconds=settings.email_send_lease_seconds,
+)
@@ -0,0 +1,91 @@
+# FILE: app/services/http_client.py
+# Scop:
+#   - Client HTTP async comun (httpx.AsyncClient) pentru apelurile către provideri din rutele `async def`
+#     (SMSAPI sms.do / profile). Un pool de conexiuni keep-alive per worker, nu o conexiune TLS nouă per SMS.
+#   - Cât așteptăm providerul, workerul servește alte request-uri (nu ține un thread din threadpool).
+#
+# Reguli:
+#   - Clientul e creat leneș, la primul apel, pe event loop-ul curent; dacă loop-ul se schimbă
+#     (TestClient, scripturi cu asyncio.run) creăm altul — un AsyncClient nu poate fi folosit între loop-uri.
+#   - Timeout-ul se dă per apel (fiecare provider are setarea lui); limitele de pool vin din
+#     HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE / HTTP_KEEPALIVE_EXPIRY_SECONDS.
+#   - aclose() din lifespan (app/main.py) închide conexiunile la shutdown.
+#
+# Debug:
+#   - GET /api/metrics (admin) => http_client: request-uri, erori de transport, clienți creați.
+#   - "clients_created" care crește continuu în prod => ceva rulează apeluri pe loop-uri noi (asyncio.run în request).
+
+import asyncio
+import threading
+from typing import Optional
+
+import httpx
+
+from ..config import settings
+
+
+class AsyncHttpClient:
+    def __init__(self, *, max_connections: int, max_keepalive: int, keepalive_expiry: float):
+        self.limits = httpx.Limits(
+            max_connections=max(1, int(max_connections)),
+            max_keepalive_connections=max(0, int(max_keepalive)),
+            keepalive_expiry=max(0.0, float(keepalive_expiry)),
+        )
+
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.clients_created = 0
+        self.requests = 0
+        self.errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._client is None or self._loop is not loop or self._client.is_closed:
+                self._client = httpx.AsyncClient(limits=self.limits, follow_redirects=False)
+                self._loop = loop
+                self.clients_created += 1
+            return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+        with self._lock:
+            self.requests += 1
+        try:
+            return await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive": self.limits.max_keepalive_connections,
+                "open": self._client is not None and not self._client.is_closed,
+                "clients_created": self.clients_created,
+                "requests": self.requests,
+                "errors": self.errors,
+            }
+
+
+http_client = AsyncHttpClient(
+    max_connections=settings.http_max_connections,
+    max_keepalive=settings.http_max_keepalive,
+    keepalive_expiry=settings.http_keepalive_expiry_seconds,
+)
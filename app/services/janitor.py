@@ -0,0 +1,266 @@
+# FILE: app/services/janitor.py
+# Scop:
+#   - Curățenie periodică pentru tabelele care cresc la fiecare login / refresh / reset:
+#       * refresh_tokens            : expirate sau revocate (rotite) de mai mult de JANITOR_GRACE_HOURS;
+#       * email_verification_tokens : expirate sau folosite;
+#       * password_reset_tokens     : expirate sau folosite;
+#       * rate_limits               : chei fără activitate (și neblocate);
+#       * sms_quota_reservations    : rezervările 'pending' expirate trec întâi în 'expired'
+#                                     (expire_stale_reservations eliberează cota), apoi ștergem cele decontate;
+#       * email_outbox              : emailuri trimise ('failed' rămân pentru investigație).
+#   - Indexurile pe care le folosesc lookup-urile calde (token_hash, key) rămân mici.
+#
+# Reguli:
+#   - Loturi mici (JANITOR_BATCH_SIZE), o tranzacție scurtă per lot (SELECT pk ... LIMIT + DELETE ... IN),
+#     pauză între loturi (JANITOR_PAUSE_MS) => nu ținem lock-uri lungi (SQLite: un singur writer).
+#   - Fiecare criteriu are interogarea lui, pe o coloană indexată (fără OR care ar scana tabela).
+#   - Grația: păstrăm rândurile o vreme după expirare / folosire (investigații, audit).
+#   - Un token revocat / expirat respins de aplicație e respins la fel și după ștergere (401).
+#
+# Rulare:
+#   - Thread de fundal per worker uvicorn (pornit în lifespan, app/main.py) la JANITOR_INTERVAL_SECONDS.
+#     Cu N workeri rulează de N ori: inofensiv (DELETE-urile sunt idempotente), dar poți pune
+#     JANITOR_INTERVAL_SECONDS=0 și cron pe scripts/maintenance/janitor.py.
+#
+# Debug:
+#   - python scripts/maintenance/janitor.py --dry-run  => câte rânduri s-ar șterge, pe tabel / criteriu.
+#   - GET /api/metrics (admin) => janitor: ultima rulare, rânduri șterse per tabel.
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import WriteSessionLocal
+from ..models import (
+    EmailOutbox,
+    EmailVerificationToken,
+    PasswordResetToken,
+    RateLimitState,
+    RefreshToken,
+    SmsQuotaReservation,
+)
+from .billing.quota_reserve import expire_stale_reservations
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _PurgeRule:
+    table: str
+    reason: str
+    model: type
+    where: Callable[[datetime, datetime], object]  # (now, cutoff) -> condiție
+
+
+PURGE_RULES: List[_PurgeRule] = [
+    _PurgeRule("refresh_tokens", "expired", RefreshToken, lambda now, cutoff: RefreshToken.expires_at < cutoff),
+    _PurgeRule("refresh_tokens", "revoked", RefreshToken, lambda now, cutoff: RefreshToken.revoked_at < cutoff),
+    _PurgeRule(
+        "email_verification_tokens",
+        "expired",
+        EmailVerificationToken,
+        lambda now, cutoff: EmailVerificationToken.expires_at < cutoff,
+    ),
+    _PurgeRule(
+        "email_verification_tokens",
+        "used",
+        EmailVerificationToken,
+        lambda now, cutoff: EmailVerificationToken.used_at < cutoff,
+    ),
+    _PurgeRule(
+        "password_reset_tokens", "expired", PasswordResetToken, lambda now, cutoff: PasswordResetToken.expires_at < cutoff
+    ),
+    _PurgeRule("password_reset_tokens", "used", PasswordResetToken, lambda now, cutoff: PasswordResetToken.used_at < cutoff),
+    _PurgeRule(
+        "rate_limits",
+        "idle",
+        RateLimitState,
+        lambda now, cutoff: (RateLimitState.updated_at < cutoff)
+        & or_(RateLimitState.blocked_until.is_(None), RateLimitState.blocked_until < now),
+    ),
+    _PurgeRule(
+        "sms_quota_reservations",
+        "settled",
+        SmsQuotaReservation,
+        lambda now, cutoff: (SmsQuotaReservation.expires_at < cutoff) & (SmsQuotaReservation.status != "pending"),
+    ),
+    _PurgeRule("email_outbox", "sent", EmailOutbox, lambda now, cutoff: EmailOutbox.sent_at < cutoff),
+]
+
+
+@dataclass
+class JanitorResult:
+    started_at: datetime
+    cutoff: datetime
+    dry_run: bool = False
+    deleted: Dict[str, int] = field(default_factory=dict)  # "tabel:criteriu" -> rânduri (sau de șters, la dry-run)
+    expired_reservations: int = 0
+    batches: int = 0
+    incomplete: List[str] = field(default_factory=list)  # criterii oprite de max_batches (continuă la rularea următoare)
+    duration_seconds: float = 0.0
+
+    @property
+    def total_deleted(self) -> int:
+        return sum(self.deleted.values())
+
+    def per_table(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for name, n in self.deleted.items():
+            table = name.split(":", 1)[0]
+            out[table] = out.get(table, 0) + n
+        return out
+
+
+def run_janitor(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    grace_hours: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    dry_run: bool = False,
+) -> JanitorResult:
+    """
+    O rulare completă: expiră rezervările 'pending' vechi, apoi șterge în loturi pe fiecare criteriu.
+    max_batches > 0 limitează loturile per criteriu (restul rămâne pentru rularea următoare).
+    """
+    now = now or datetime.utcnow()
+    grace = settings.janitor_grace_hours if grace_hours is None else grace_hours
+    batch_size = max(1, batch_size or settings.janitor_batch_size)
+    max_batches = settings.janitor_max_batches if max_batches is None else max_batches
+    pause_seconds = settings.janitor_pause_ms / 1000.0 if pause_seconds is None else pause_seconds
+
+    result = JanitorResult(started_at=now, cutoff=now - timedelta(hours=max(0, grace)), dry_run=dry_run)
+    t0 = time.perf_counter()
+
+    if not dry_run:
+        while True:
+            n = expire_stale_reservations(db, now=now, batch_size=batch_size)
+            result.expired_reservations += n
+            if n < batch_size:
+                break
+
+    for rule in PURGE_RULES:
+        name = f"{rule.table}:{rule.reason}"
+        condition = rule.where(now, result.cutoff)
+        if dry_run:
+            result.deleted[name] = int(db.execute(select(func.count()).select_from(rule.model).where(condition)).scalar() or 0)
+            continue
+
+        pk = list(rule.model.__table__.primary_key.columns)[0]
+        deleted = batches = 0
+        while True:
+            ids = db.execute(select(pk).where(condition).order_by(pk).limit(batch_size)).scalars().all()
+            if not ids:
+                break
+            db.execute(delete(rule.model.__table__).where(pk.in_(ids)))
+            db.commit()
+
+            deleted += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            if max_batches and batches >= max_batches:
+                result.incomplete.append(name)
+                break
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)  # lăsăm scrierile aplicației să treacă între loturi
+
+        result.deleted[name] = deleted
+        result.batches += batches
+
+    db.rollback()  # închidem tranzacția de citire (dry-run / ultimul SELECT gol)
+    result.duration_seconds = time.perf_counter() - t0
+    return result
+
+
+class Janitor:
+    """
+    Thread de fundal: run_janitor la fiecare interval (cu jitter, ca workerii să nu pornească simultan).
+    """
+
+    def __init__(self, *, interval_seconds: int):
+        self.interval_seconds = max(0, int(interval_seconds))
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.runs = 0
+        self.errors = 0
+        self.last: Optional[JanitorResult] = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def run_once(self) -> Optional[JanitorResult]:
+        db = WriteSessionLocal()
+        try:
+            result = run_janitor(db)
+        except Exception:
+            logger.exception("Janitor: rularea a eșuat")
+            db.rollback()
+            with self._lock:
+                self.errors += 1
+            return None
+        finally:
+            db.close()
+
+        with self._lock:
+            self.runs += 1
+            self.last = result
+        if result.total_deleted or result.expired_reservations:
+            logger.info(
+                "Janitor: șterse %s (total %d), rezervări expirate %d, %d loturi în %.2fs%s",
+                result.per_table(),
+                result.total_deleted,
+                result.expired_reservations,
+                result.batches,
+                result.duration_seconds,
+                f", incomplet: {result.incomplete}" if result.incomplete else "",
+            )
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            last = self.last
+            return {
+                "interval_seconds": self.interval_seconds,
+                "running": self._thread is not None,
+                "runs": self.runs,
+                "errors": self.errors,
+                "last_run_at": last.started_at.isoformat() if last else None,
+                "last_duration_seconds": round(last.duration_seconds, 3) if last else None,
+                "last_deleted": last.per_table() if last else {},
+                "last_expired_reservations": last.expired_reservations if last else 0,
+                "last_incomplete": list(last.incomplete) if last else [],
+            }
+
+    def _loop(self) -> None:
+        # prima rulare după un interval parțial aleator: workerii nu pornesc toți odată
+        delay = random.uniform(0.1, 1.0) * self.interval_seconds
+        while not self._stop.wait(delay):
+            self.run_once()
+            delay = self.interval_seconds * random.uniform(0.9, 1.1)
+
+
+janitor = Janitor(interval_seconds=settings.janitor_interval_seconds)
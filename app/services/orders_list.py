@@ -0,0 +1,92 @@
+# FILE: app/services/orders_list.py
+# Scop:
+#   - Pagina de comenzi din dashboard (GET /api/orders) + info SMS per rând, cu număr FIX de query-uri
+#     (count + pagină + 2 agregări), indiferent de page_size:
+#       * sms_sent           = există SmsLog 'success' pentru comandă;
+#       * previous_sms_count = SMS-uri 'success' pentru ACELAȘI telefon + ACELAȘI PNK, minus cel curent.
+#   - Toate query-urile au `user_id = :tenant` pe FIECARE tabel din FROM (inclusiv în join-ul
+#     sms_logs -> orders), ca PostgreSQL să poată face partition pruning pe orders / sms_logs
+#     partiționate pe user_id (services/partitioning.py).
+#
+# Debug:
+#   - python scripts/maintenance/partition_tenant_tables.py verify => planurile acestor query-uri
+#     trebuie să atingă o singură partiție per tabel.
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from ..models import Order, SmsLog
+
+
+@dataclass(frozen=True)
+class OrderRow:
+    order: Order
+    sms_sent: bool
+    previous_sms_count: int
+
+
+def orders_count_stmt(user_id: int):
+    return select(func.count()).select_from(Order).where(Order.user_id == user_id)
+
+
+def orders_page_stmt(user_id: int, page: int, page_size: int):
+    return (
+        select(Order)
+        .where(Order.user_id == user_id)
+        .order_by(Order.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+
+
+def sent_order_ids_stmt(user_id: int, order_ids: Iterable[int]):
+    return (
+        select(SmsLog.order_id)
+        .where(SmsLog.user_id == user_id, SmsLog.status == "success", SmsLog.order_id.in_(list(order_ids)))
+        .distinct()
+    )
+
+
+def success_counts_stmt(user_id: int, phones: Iterable[str], pnks: Iterable[str]):
+    """
+    (telefon, PNK, câte SMS-uri 'success'); join-ul include și user_id => pruning pe ambele tabele.
+    """
+    return (
+        select(SmsLog.phone, Order.pnk, func.count())
+        .join(Order, and_(SmsLog.order_id == Order.id, SmsLog.user_id == Order.user_id))
+        .where(
+            SmsLog.user_id == user_id,
+            SmsLog.status == "success",
+            SmsLog.phone.in_(list(phones)),
+            Order.pnk.in_(list(pnks)),
+        )
+        .group_by(SmsLog.phone, Order.pnk)
+    )
+
+
+def list_orders_page(db: Session, user_id: int, *, page: int, page_size: int) -> Tuple[int, List[OrderRow]]:
+    total = db.execute(orders_count_stmt(user_id)).scalar() or 0
+    orders = db.execute(orders_page_stmt(user_id, page, page_size)).scalars().all()
+    if not orders:
+        return total, []
+
+    sent: Set[int] = set(db.execute(sent_order_ids_stmt(user_id, [o.id for o in orders])).scalars().all())
+
+    pairs = {(str(o.phone_number), o.pnk) for o in orders if o.phone_number and o.pnk}
+    counts: Dict[Tuple[str, str], int] = {}
+    if pairs:
+        rows = db.execute(success_counts_stmt(user_id, {p for p, _ in pairs}, {k for _, k in pairs})).all()
+        counts = {(phone, pnk): n for phone, pnk, n in rows}
+
+    out: List[OrderRow] = []
+    for o in orders:
+        sms_sent = o.id in sent
+        previous = 0
+        if o.phone_number and o.pnk:
+            # dacă pentru comanda curentă avem sms_sent=True, "previous" = total - 1
+            previous = max(0, counts.get((str(o.phone_number), o.pnk), 0) - (1 if sms_sent else 0))
+        out.append(OrderRow(order=o, sms_sent=sms_sent, previous_sms_count=previous))
+    return total, out
@@ -0,0 +1,315 @@
+# FILE: app/services/partitioning.py
+# Scop:
+#   - Partiționare declarativă PostgreSQL pe user_id pentru orders + sms_logs (opțională, pentru DB-uri
+#     dominate de câțiva selleri mari): DELETE-ul de la re-import, count-urile și paginile unui tenant
+#     ating doar partiția lui, nu indexuri comune de zeci de milioane de rânduri.
+#   - Două layout-uri:
+#       * hash : PARTITION BY HASH (user_id), <tabel>_h0 .. _h{N-1};
+#       * list : tenanții mari în partiții dedicate (<tabel>_t<user_id>), restul în <tabel>_default,
+#                sub-partiționată HASH (<tabel>_default_h*). Tenanți mutați ulterior: add_tenant_sql().
+#   - Migrarea = SQL generat aici, rulat de scripts/maintenance/partition_tenant_tables.py
+#     (proiectul nu are framework de migrații; ca la ALTER TABLE-urile din models.py).
+#   - verify_pruning(): EXPLAIN pe query-urile tenant-scoped ale aplicației => o singură partiție per tabel.
+#
+# Reguli:
+#   - Doar PostgreSQL >= 12 (pg_partition_root / pg_partition_tree); SQLite rămâne neschimbat.
+#   - PK devine (user_id, id) (cheia de partiționare trebuie să fie în orice UNIQUE). ORM-ul rămâne cu
+#     `id` ca PK: id-urile vin în continuare din aceeași secvență, deci sunt unice global.
+#   - Fără FK sms_logs -> orders: re-importul șterge comenzile tenantului și păstrează logurile
+#     (vezi services/sms/send_history.py). Pe tabelul nepartiționat FK-ul creat de create_all face
+#     DELETE-ul de la re-import să eșueze pe PostgreSQL pentru orice tenant cu SMS-uri.
+#   - apply: o singură tranzacție cu ACCESS EXCLUSIVE pe ambele tabele (copiere completă => fereastră de
+#     mentenanță); tabelele vechi rămân ca <tabel>_unpartitioned până la --drop-old.
+#   - add-tenant: EXCLUSIVE (citirile merg, scrierile așteaptă) cât copiem rândurile tenantului.
+#   - Orice query nou pe orders / sms_logs trebuie să aibă `user_id = :tenant` pe FIECARE tabel
+#     (inclusiv în join) — altfel planul scanează toate partițiile. Adaugă-l în tenant_statements().
+#
+# Limitări:
+#   - Callback-ul DLR (UPDATE pe message_id) și purjarea retenției (created_at) nu au user_id =>
+#     ating toate partițiile (câte un index scan per partiție).
+#   - add-tenant verifică partiția default la ATTACH (scan pe toate partițiile _default_h*).
+#   - Prepared statements (asyncpg) pot trece pe plan generic => pruning la execuție ("Subplans Removed"),
+#     nu la planificare; rezultatul e același.
+#
+# Debug:
+#   - python scripts/maintenance/partition_tenant_tables.py status  => partiții + rânduri estimate.
+#   - python scripts/maintenance/partition_tenant_tables.py verify  => exit 1 dacă un plan nu face pruning.
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.engine import Connection
+
+from ..models import Order
+from .orders_list import orders_count_stmt, orders_page_stmt, sent_order_ids_stmt, success_counts_stmt
+from .retention import send_history_batch_stmt
+
+# ordinea contează: sms_logs referă orders (order_id)
+TENANT_TABLES = ("orders", "sms_logs")
+OLD_SUFFIX = "_unpartitioned"
+
+_STRATEGIES = {"h": "hash", "l": "list", "r": "range"}
+
+
+@dataclass
+class PartitionInfo:
+    table: str
+    partition: str
+    parent: str
+    bound: str
+    rows: int
+
+
+@dataclass
+class PruneCheck:
+    user_id: int
+    name: str
+    leaves: Dict[str, List[str]] = field(default_factory=dict)  # tabel -> partițiile din plan
+
+    @property
+    def ok(self) -> bool:
+        return all(len(v) <= 1 for v in self.leaves.values())
+
+
+def check_postgres(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError(f"Partiționarea cere PostgreSQL (dialect curent: {conn.dialect.name}).")
+    if (conn.dialect.server_version_info or (0,)) < (12,):
+        raise RuntimeError("Partiționarea cere PostgreSQL >= 12.")
+
+
+def partition_strategy(conn: Connection, table: str) -> Optional[str]:
+    row = conn.execute(
+        text("SELECT partstrat FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"), {"t": table}
+    ).first()
+    return _STRATEGIES.get(row[0]) if row else None
+
+
+def _table_exists(conn: Connection, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is not None
+
+
+def _indexes(conn: Connection, table: str) -> List[tuple]:
+    """(nume, CREATE INDEX ..., unique, primary) pentru indexurile tabelului."""
+    return conn.execute(
+        text(
+            "SELECT i.relname, pg_get_indexdef(i.oid), x.indisunique, x.indisprimary "
+            "FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE x.indrelid = to_regclass(:t) ORDER BY i.relname"
+        ),
+        {"t": table},
+    ).all()
+
+
+def _hash_partitions_ddl(parent: str, prefix: str, modulus: int) -> List[str]:
+    return [
+        f"CREATE TABLE {prefix}_h{i} PARTITION OF {parent} FOR VALUES WITH (MODULUS {modulus}, REMAINDER {i})"
+        for i in range(modulus)
+    ]
+
+
+def _partitions_ddl(table: str, hash_partitions: int, dedicated: Sequence[int]) -> List[str]:
+    if not dedicated:
+        return _hash_partitions_ddl(table, table, hash_partitions)
+    out = [f"CREATE TABLE {table}_t{uid} PARTITION OF {table} FOR VALUES IN ({uid})" for uid in dedicated]
+    out.append(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT PARTITION BY HASH (user_id)")
+    out += _hash_partitions_ddl(f"{table}_default", f"{table}_default", hash_partitions)
+    return out
+
+
+def apply_sql(
+    conn: Connection,
+    *,
+    hash_partitions: int,
+    dedicated_tenants: Sequence[int] = (),
+    drop_old: bool = False,
+) -> List[str]:
+    """
+    SQL-ul migrării (de rulat într-o singură tranzacție). Citește catalogul ca să păstreze
+    indexurile existente (inclusiv cele create manual) și secvențele id-urilor.
+    """
+    check_postgres(conn)
+    if hash_partitions < 1:
+        raise ValueError("hash_partitions trebuie să fie >= 1")
+    dedicated = sorted({int(u) for u in dedicated_tenants})
+
+    for table in TENANT_TABLES:
+        if not _table_exists(conn, table):
+            raise RuntimeError(f"{table} nu există (pornește aplicația o dată / create_all).")
+        if partition_strategy(conn, table):
+            raise RuntimeError(f"{table} este deja partiționat.")
+        if _table_exists(conn, table + OLD_SUFFIX):
+            raise RuntimeError(f"{table}{OLD_SUFFIX} există deja (o migrare anterioară neterminată?).")
+
+    strategy = "LIST" if dedicated else "HASH"
+    sql = [f"LOCK TABLE {', '.join(TENANT_TABLES)} IN ACCESS EXCLUSIVE MODE"]
+    create: List[str] = []
+    finish: List[str] = []
+
+    for table in TENANT_TABLES:
+        old = table + OLD_SUFFIX
+        seq = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+
+        # numele indexurilor sunt globale în schemă => le eliberăm pentru tabelul nou
+        sql.append(f"ALTER TABLE {table} RENAME TO {old}")
+        for name, indexdef, unique, primary in _indexes(conn, table):
+            if primary:
+                sql.append(f"ALTER TABLE {old} RENAME CONSTRAINT {name} TO {old}_pkey")
+                continue
+            if unique:
+                raise RuntimeError(f"Indexul UNIQUE {name} nu conține user_id; nu poate exista pe un tabel partiționat.")
+            sql.append(f"ALTER INDEX {name} RENAME TO {name}{OLD_SUFFIX}")
+            finish.append(indexdef)  # "CREATE INDEX ... ON public.<tabel>" => pe tabelul nou
+
+        create.append(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY {strategy} (user_id)"
+        )
+        create += _partitions_ddl(table, hash_partitions, dedicated)
+        create.append(f"INSERT INTO {table} SELECT * FROM {old}")
+        create.append(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (user_id, id)")
+        if seq:
+            # altfel DROP pe tabelul vechi ar lua secvența (și default-ul id-ului) cu el
+            finish.append(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+
+    finish += [
+        "ALTER TABLE orders ADD CONSTRAINT orders_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)",
+        "ALTER TABLE sms_logs ADD CONSTRAINT sms_logs_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)",
+    ]
+    finish += [f"ANALYZE {table}" for table in TENANT_TABLES]
+    if drop_old:
+        finish += [f"DROP TABLE {table}{OLD_SUFFIX}" for table in reversed(TENANT_TABLES)]
+
+    return sql + create + finish
+
+
+def add_tenant_sql(conn: Connection, user_id: int) -> List[str]:
+    """
+    Mută un tenant din partiția default într-o partiție dedicată (layout list).
+    """
+    check_postgres(conn)
+    uid = int(user_id)
+    for table in TENANT_TABLES:
+        strategy = partition_strategy(conn, table)
+        if strategy != "list":
+            raise RuntimeError(f"{table}: layout {strategy or 'nepartiționat'}; partiții dedicate cer layout list (apply --dedicated).")
+        if _table_exists(conn, f"{table}_t{uid}"):
+            raise RuntimeError(f"{table}_t{uid} există deja.")
+
+    sql = [f"LOCK TABLE {', '.join(TENANT_TABLES)} IN EXCLUSIVE MODE"]
+    for table in TENANT_TABLES:
+        sql += [
+            f"CREATE TABLE {table}_t{uid} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+            f"INSERT INTO {table}_t{uid} SELECT * FROM {table} WHERE user_id = {uid}",
+        ]
+    sql += [f"DELETE FROM {table} WHERE user_id = {uid}" for table in reversed(TENANT_TABLES)]
+    # ATTACH creează / atașează indexurile, PK-ul și FK-urile pe partiția nouă
+    sql += [f"ALTER TABLE {table} ATTACH PARTITION {table}_t{uid} FOR VALUES IN ({uid})" for table in TENANT_TABLES]
+    sql += [f"ANALYZE {table}_t{uid}" for table in TENANT_TABLES]
+    return sql
+
+
+def run_sql(conn: Connection, statements: Sequence[str]) -> None:
+    for stmt in statements:
+        conn.exec_driver_sql(stmt)
+
+
+def partitions(conn: Connection) -> List[PartitionInfo]:
+    check_postgres(conn)
+    out: List[PartitionInfo] = []
+    for table in TENANT_TABLES:
+        if not partition_strategy(conn, table):
+            continue
+        rows = conn.execute(
+            text(
+                "SELECT c.relname, p.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+                "FROM pg_partition_tree(to_regclass(:t)) t "
+                "JOIN pg_class c ON c.oid = t.relid JOIN pg_class p ON p.oid = t.parentrelid "
+                "WHERE t.isleaf ORDER BY c.relname"
+            ),
+            {"t": table},
+        ).all()
+        out += [PartitionInfo(table, name, parent, bound, max(0, n)) for name, parent, bound, n in rows]
+    return out
+
+
+def dedicated_tenants(conn: Connection) -> List[int]:
+    """Tenanții cu partiție dedicată în orders (layout list)."""
+    if partition_strategy(conn, "orders") != "list":
+        return []
+    rows = conn.execute(
+        text(
+            "SELECT substr(c.relname, length('orders_t') + 1) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('orders') AND c.relname ~ '^orders_t[0-9]+$'"
+        )
+    ).all()
+    return sorted(int(r[0]) for r in rows)
+
+
+def tenant_statements(user_id: int) -> List[tuple]:
+    """
+    Query-urile tenant-scoped ale aplicației pe orders / sms_logs (nume, statement).
+    Valorile din IN / id sunt ilustrative: contează doar filtrul pe user_id.
+    """
+    return [
+        ("orders: total listă", orders_count_stmt(user_id)),
+        ("orders: pagină listă", orders_page_stmt(user_id, 1, 50)),
+        ("sms_logs: comenzi cu SMS", sent_order_ids_stmt(user_id, [1, 2, 3])),
+        ("sms_logs+orders: istoric telefon+PNK", success_counts_stmt(user_id, ["0700000000"], ["PNK"])),
+        ("orders: comandă pentru trimitere SMS", select(Order).where(Order.id == 1, Order.user_id == user_id)),
+        ("orders: ștergere la re-import", delete(Order).where(Order.user_id == user_id)),
+        ("sms_logs+orders: backfill istoric", send_history_batch_stmt(user_id, 0, 1000)),
+    ]
+
+
+def explain_json(conn: Connection, stmt, *, analyze: bool = False) -> dict:
+    """
+    Planul JSON al unui statement SQLAlchemy (parametri randați literal => pruning la planificare).
+    analyze=True EXECUTĂ statement-ul: apelantul face rollback pentru DELETE.
+    """
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = conn.exec_driver_sql(f"EXPLAIN ({options}) {sql}").scalar()
+    doc = json.loads(raw) if isinstance(raw, str) else raw
+    return doc[0]
+
+
+def _relations(plan: dict) -> List[str]:
+    out = [plan["Relation Name"]] if "Relation Name" in plan else []
+    for child in plan.get("Plans", []):
+        out += _relations(child)
+    return out
+
+
+def plan_leaves(conn: Connection, plan: dict) -> Dict[str, List[str]]:
+    """Partițiile (frunze) din plan, grupate pe tabelul rădăcină."""
+    names = sorted(set(_relations(plan["Plan"])))
+    if not names:
+        return {}
+    rows = conn.execute(
+        text(
+            "SELECT r.relname, c.relname FROM pg_class c JOIN pg_class r ON r.oid = pg_partition_root(c.oid) "
+            "WHERE c.relname = ANY(:names) AND c.relispartition AND pg_table_is_visible(c.oid)"
+        ),
+        {"names": names},
+    ).all()
+    out: Dict[str, List[str]] = {}
+    for root, leaf in rows:
+        out.setdefault(root, []).append(leaf)
+    return {root: sorted(leaves) for root, leaves in out.items()}
+
+
+def verify_pruning(conn: Connection, user_ids: Sequence[int]) -> List[PruneCheck]:
+    check_postgres(conn)
+    for table in TENANT_TABLES:
+        if not partition_strategy(conn, table):
+            raise RuntimeError(f"{table} nu este partiționat (rulează întâi apply).")
+
+    checks: List[PruneCheck] = []
+    for uid in user_ids:
+        for name, stmt in tenant_statements(uid):
+            checks.append(PruneCheck(user_id=uid, name=name, leaves=plan_leaves(conn, explain_json(conn, stmt))))
+    return checks
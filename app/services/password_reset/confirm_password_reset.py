@@ -19,9 +19,11 @@ from sqlalchemy.orm import Session
 
 from ...config import settings
 from ...models import User, PasswordResetToken
-from ...security import hash_token, hash_password
+from ...security import hash_token, current_password_scheme
 from ..audit import create_audit_log
-from ..rate_limit import enforce_rate_limit_or_raise
+from ..auth.password_hasher import password_hasher
+from ..auth.user_cache import user_cache
+from ..rate_limit import RateLimitRule, enforce_rate_limits_or_raise
 
 
 def _validate_new_password_or_raise(password: str, *, email: str) -> None:
@@ -60,20 +62,23 @@ def confirm_password_reset(
     email_norm = (email or "").strip().lower()
     code_norm = (code or "").strip().upper()
 
-    # rate limit: IP + email
-    enforce_rate_limit_or_raise(
+    # rate limit: IP + email (un singur statement)
+    enforce_rate_limits_or_raise(
         db,
-        key=f"reset:ip:{ip}",
-        max_count=settings.reset_password_max_attempts_ip,
-        window_seconds=settings.reset_password_window_seconds_ip,
-        block_seconds=settings.reset_password_block_seconds_ip,
-    )
-    enforce_rate_limit_or_raise(
-        db,
-        key=f"reset:email:{email_norm}",
-        max_count=settings.reset_password_max_attempts_email,
-        window_seconds=settings.reset_password_window_seconds_email,
-        block_seconds=settings.reset_password_block_seconds_email,
+        [
+            RateLimitRule(
+                key=f"reset:ip:{ip}",
+                max_count=settings.reset_password_max_attempts_ip,
+                window_seconds=settings.reset_password_window_seconds_ip,
+                block_seconds=settings.reset_password_block_seconds_ip,
+            ),
+            RateLimitRule(
+                key=f"reset:email:{email_norm}",
+                max_count=settings.reset_password_max_attempts_email,
+                window_seconds=settings.reset_password_window_seconds_email,
+                block_seconds=settings.reset_password_block_seconds_email,
+            ),
+        ],
     )
 
     if not code_norm or len(code_norm) < 6 or len(code_norm) > 32:
@@ -93,7 +98,9 @@ def confirm_password_reset(
 
     user = q.first()
     if not user or not getattr(user, "is_active", True):
-        create_audit_log(db, "PWD_RESET_CONFIRM_FAIL", None, request, details={"email": email_norm, "ip": ip})
+        create_audit_log(
+            db, "PWD_RESET_CONFIRM_FAIL", None, request, details={"email": email_norm, "ip": ip}, sync=True
+        )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cod invalid sau expirat.")
 
     now = datetime.utcnow()
@@ -107,11 +114,14 @@ def confirm_password_reset(
     ).first()
 
     if not tok:
-        create_audit_log(db, "PWD_RESET_CONFIRM_FAIL", user.id, request, details={"reason": "token_invalid", "ip": ip})
+        create_audit_log(
+            db, "PWD_RESET_CONFIRM_FAIL", user.id, request, details={"reason": "token_invalid", "ip": ip}, sync=True
+        )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cod invalid sau expirat.")
 
     # schimbare parolă + token one-time
-    user.password_hash = hash_password(password)
+    user.password_hash = password_hasher.hash_password(password)
+    user.password_scheme = current_password_scheme()
     tok.used_at = now
 
     # dacă ai câmpuri de lockout, le resetăm fără să crape pe model vechi
@@ -131,6 +141,7 @@ def confirm_password_reset(
         pass
 
     db.commit()
+    user_cache.invalidate(user.id)
 
-    create_audit_log(db, "PWD_RESET_SUCCESS", user.id, request, details={"ip": ip})
+    create_audit_log(db, "PWD_RESET_SUCCESS", user.id, request, details={"ip": ip}, sync=True)
     return {"ok": True, "message": "Parola a fost schimbată. Te poți autentifica."}
@@ -1,7 +1,7 @@
 # FILE: app/services/password_reset/request_password_reset.py
 # Scop:
 #   - POST /api/auth/forgot-password
-#   - Generează cod scurt (8 chars), stochează hash, trimite pe email.
+#   - Generează cod scurt (8 chars), stochează hash, pune emailul în email_outbox (trimis în fundal).
 #
 # Security:
 #   - Răspuns anti-enumerare: același mesaj indiferent dacă userul există.
@@ -9,7 +9,7 @@
 #   - Un singur token activ per user (ștergem nefolositele).
 #
 # Debug:
-#   - Dacă userul nu primește email: verifică SMTP_* sau logul în DEBUG.
+#   - Dacă userul nu primește email: verifică SMTP_*, email_outbox (status / last_error) sau logul în DEBUG.
 #   - Dacă token nu se găsește: verifică TOKEN_PEPPER și tabela password_reset_tokens.
 
 import secrets
@@ -22,7 +22,8 @@ from ...config import settings
 from ...models import User, PasswordResetToken
 from ...security import hash_token
 from ..audit import create_audit_log
-from ..email_sender import send_email
+from ..email_outbox import enqueue_email
+from ..email_sender import email_sender
 from ..rate_limit import enforce_rate_limit_or_raise
 
 _RESET_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
@@ -81,7 +82,6 @@ def request_password_reset(db: Session, *, email: str, request: Request) -> dict
         used_at=None,
     )
     db.add(row)
-    db.commit()
 
     subject = "Resetare parolă - SMSsend By SWG"
     body = (
@@ -90,7 +90,10 @@ def request_password_reset(db: Session, *, email: str, request: Request) -> dict
         f"Codul tău (valabil {settings.password_reset_expire_minutes} minute): {code}\n\n"
         "Dacă nu ai cerut tu această resetare, ignoră acest email.\n"
     )
-    send_email(to_email=user.email, subject=subject, body=body)
+    # tokenul și emailul în același commit; răspundem fără să așteptăm SMTP-ul
+    enqueue_email(db, to_email=user.email, subject=subject, body=body, commit=False)
+    db.commit()
+    email_sender.wake()
 
     create_audit_log(db, "PWD_RESET_REQUEST", user.id, request, details={"ip": ip})
     return generic
@@ -1,67 +1,286 @@
 # FILE: app/services/rate_limit.py
 # Scop:
-#   - Rate limiting DB-backed, compatibil cu multi-worker și Postgres.
+#   - Motorul unic de rate limiting (login / register / reset parolă), cu backend configurabil:
+#       * "db"     (implicit): tabela rate_limits, compatibil multi-worker / multi-node, SQLite + Postgres;
+#       * "memory": fereastră glisantă in-process, pentru deploy pe un singur proces (fără scrieri în DB).
+#   - Mai multe chei într-o singură verificare (ex. IP + email la login) => UN statement, UN round trip.
+#
+# Backend "db":
+#   - INSERT ... VALUES (cheie1), (cheie2) ON CONFLICT (key) DO UPDATE ... RETURNING
+#     => incrementul e atomic în DB (nu mai pierdem hit-uri între workeri, nu mai există cursa la primul rând).
+#   - Regulile per cheie (fereastră / prag / blocare) intră în UPDATE ca CASE rate_limits.key WHEN ... .
+#   - Rulează pe o conexiune proprie, cu commit imediat: contoarele rămân persistate chiar dacă request-ul
+#     face rollback, iar lock-ul de scriere (SQLite) / lock-ul pe rând (Postgres) NU e ținut în timpul
+#     verificării Argon2. Apelează verificarea ÎNAINTE de orice scriere din request (SQLite: un singur writer).
+#
+# Backend "memory":
+#   - Jurnal de timestamp-uri per cheie (plafonat la prag + 1) + blocare; LRU cu RATE_LIMIT_MEMORY_MAX_KEYS chei.
+#   - Per proces: cu N workeri uvicorn limita efectivă e N × prag. Doar pentru un singur worker.
 #
 # Debug:
-#   - Dacă pare că nu limitează, verifică tabela `rate_limits` și valorile `key`.
-#   - Dacă primești erori de concurență pe Postgres, următorul nivel e UPSERT atomic.
+#   - Dacă pare că nu limitează: verifică RATE_LIMIT_BACKEND, tabela `rate_limits` și valorile `key`.
+#   - GET /api/metrics (admin) => rate_limit: verificări / respinse per backend.
 
+import math
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Deque, Dict, Sequence
+
 from fastapi import HTTPException, status
+from sqlalchemy import and_, case, literal, select
 from sqlalchemy.orm import Session
 
+from ..config import settings
+from ..database import dialect_insert
 from ..models import RateLimitState
 
 
-def enforce_rate_limit_or_raise(
-    db: Session,
-    *,
-    key: str,
-    max_count: int,
-    window_seconds: int,
-    block_seconds: int,
-) -> None:
-    now = datetime.utcnow()
-
-    state = db.query(RateLimitState).filter(RateLimitState.key == key).first()
-    if not state:
-        state = RateLimitState(
-            key=key,
-            window_started_at=now,
-            count=1,
-            blocked_until=None,
-            updated_at=now,
+@dataclass(frozen=True)
+class RateLimitRule:
+    key: str
+    max_count: int
+    window_seconds: int
+    block_seconds: int
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    key: str
+    count: int
+    retry_after: int = 0  # secunde; 0 => permis
+
+    @property
+    def allowed(self) -> bool:
+        return self.retry_after <= 0
+
+
+class RateLimitBackend(ABC):
+    """
+    Interfața backend-urilor: un hit pe fiecare regulă, decizie per cheie.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def hit(self, db: Session, rules: Sequence[RateLimitRule], now: datetime) -> Dict[str, RateLimitDecision]:
+        ...
+
+
+# -------------------------
+# Backend DB (rate_limits)
+# -------------------------
+class DbRateLimitBackend(RateLimitBackend):
+    name = "db"
+
+    def hit(self, db: Session, rules: Sequence[RateLimitRule], now: datetime) -> Dict[str, RateLimitDecision]:
+        engine = db.get_bind()
+        with engine.begin() as conn:
+            stmt = dialect_insert(RateLimitState.__table__)
+            if hasattr(stmt, "on_conflict_do_update"):
+                rows = conn.execute(self._upsert(stmt, rules, now)).all()
+            else:
+                rows = [self._locked_update(conn, rule, now) for rule in rules]
+
+        out = {}
+        for key, count, blocked_until in rows:
+            retry_after = 0
+            if blocked_until is not None and blocked_until > now:
+                retry_after = max(1, math.ceil((blocked_until - now).total_seconds()))
+            out[key] = RateLimitDecision(key=key, count=int(count), retry_after=retry_after)
+        return out
+
+    @staticmethod
+    def _upsert(stmt, rules: Sequence[RateLimitRule], now: datetime):
+        t = RateLimitState.__table__
+
+        def per_key(values):
+            return case({r.key: literal(v) for r, v in zip(rules, values)}, value=t.c.key)
+
+        blocked = and_(t.c.blocked_until.is_not(None), t.c.blocked_until > now)
+        expired = t.c.window_started_at <= per_key([now - timedelta(seconds=r.window_seconds) for r in rules])
+        next_count = case((expired, 1), else_=t.c.count + 1)
+        block_until = per_key([now + timedelta(seconds=r.block_seconds) for r in rules])
+
+        stmt = stmt.values(
+            [
+                {
+                    "key": r.key,
+                    "window_started_at": now,
+                    "count": 1,
+                    "blocked_until": (now + timedelta(seconds=r.block_seconds)) if r.max_count < 1 else None,
+                    "updated_at": now,
+                }
+                for r in rules
+            ]
         )
-        db.add(state)
-        db.commit()
-        return
+        return stmt.on_conflict_do_update(
+            index_elements=[t.c.key],
+            set_={
+                # blocat => rândul rămâne neschimbat; fereastră expirată => reset; altfel +1
+                "count": case((blocked, t.c.count), else_=next_count),
+                "window_started_at": case((blocked, t.c.window_started_at), (expired, now), else_=t.c.window_started_at),
+                "blocked_until": case(
+                    (blocked, t.c.blocked_until),
+                    (next_count > per_key([r.max_count for r in rules]), block_until),
+                    else_=None,
+                ),
+                "updated_at": now,
+            },
+        ).returning(t.c.key, t.c.count, t.c.blocked_until)
 
-    # blocat încă
-    if state.blocked_until and state.blocked_until > now:
-        retry_after = int((state.blocked_until - now).total_seconds())
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Prea multe cereri. Reîncearcă mai târziu.",
-            headers={"Retry-After": str(max(1, retry_after))},
+    @staticmethod
+    def _locked_update(conn, rule: RateLimitRule, now: datetime):
+        # fallback pentru dialecte fără ON CONFLICT: SELECT ... FOR UPDATE + UPDATE / INSERT
+        t = RateLimitState.__table__
+        row = conn.execute(select(t).where(t.c.key == rule.key).with_for_update()).mappings().first()
+        if row is None:
+            blocked_until = (now + timedelta(seconds=rule.block_seconds)) if rule.max_count < 1 else None
+            conn.execute(
+                t.insert().values(key=rule.key, window_started_at=now, count=1, blocked_until=blocked_until, updated_at=now)
+            )
+            return rule.key, 1, blocked_until
+        if row["blocked_until"] is not None and row["blocked_until"] > now:
+            return rule.key, row["count"], row["blocked_until"]
+
+        expired = row["window_started_at"] <= now - timedelta(seconds=rule.window_seconds)
+        count = 1 if expired else row["count"] + 1
+        window_started_at = now if expired else row["window_started_at"]
+        blocked_until = (now + timedelta(seconds=rule.block_seconds)) if count > rule.max_count else None
+        conn.execute(
+            t.update()
+            .where(t.c.key == rule.key)
+            .values(count=count, window_started_at=window_started_at, blocked_until=blocked_until, updated_at=now)
         )
+        return rule.key, count, blocked_until
+
+
+# -------------------------
+# Backend in-process (fereastră glisantă)
+# -------------------------
+@dataclass
+class _MemoryKey:
+    hits: Deque[float] = field(default_factory=deque)
+    blocked_until: float = 0.0
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    name = "memory"
+
+    def __init__(self, *, max_keys: int = 100000):
+        self.max_keys = max(1, int(max_keys))
+        self._lock = threading.Lock()
+        self._keys: "OrderedDict[str, _MemoryKey]" = OrderedDict()
+
+    def hit(self, db: Session, rules: Sequence[RateLimitRule], now: datetime) -> Dict[str, RateLimitDecision]:
+        mono = time.monotonic()
+        out = {}
+        with self._lock:
+            for rule in rules:
+                state = self._keys.get(rule.key)
+                if state is None:
+                    state = self._keys[rule.key] = _MemoryKey()
+                    while len(self._keys) > self.max_keys:
+                        self._keys.popitem(last=False)
+                else:
+                    self._keys.move_to_end(rule.key)
+
+                if state.blocked_until > mono:
+                    out[rule.key] = RateLimitDecision(
+                        key=rule.key, count=len(state.hits), retry_after=max(1, math.ceil(state.blocked_until - mono))
+                    )
+                    continue
+
+                cutoff = mono - rule.window_seconds
+                while state.hits and state.hits[0] <= cutoff:
+                    state.hits.popleft()
+                state.hits.append(mono)
+                count = len(state.hits)
+                while len(state.hits) > rule.max_count + 1:
+                    state.hits.popleft()
+
+                retry_after = 0
+                if count > rule.max_count:
+                    state.blocked_until = mono + rule.block_seconds
+                    state.hits.clear()
+                    retry_after = max(1, int(rule.block_seconds))
+                out[rule.key] = RateLimitDecision(key=rule.key, count=count, retry_after=retry_after)
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+# -------------------------
+# API public
+# -------------------------
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.denied = 0
+
+    def check(self, db: Session, rules: Sequence[RateLimitRule]) -> Dict[str, RateLimitDecision]:
+        # o cheie o singură dată per statement (Postgres refuză același rând de două ori în ON CONFLICT)
+        unique = list({r.key: r for r in reversed(rules)}.values())[::-1]
+        if not unique:
+            return {}
+        decisions = self.backend.hit(db, unique, datetime.utcnow())
+        with self._lock:
+            self.checks += 1
+            if any(not d.allowed for d in decisions.values()):
+                self.denied += 1
+        return decisions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.backend.name, "checks": self.checks, "denied": self.denied}
 
-    # reset window dacă a trecut
-    window_end = state.window_started_at + timedelta(seconds=window_seconds)
-    if now >= window_end:
-        state.window_started_at = now
-        state.count = 0
-        state.blocked_until = None
 
-    state.count += 1
-    state.updated_at = now
+def _make_backend(name: str) -> RateLimitBackend:
+    if name == "memory":
+        return MemoryRateLimitBackend(max_keys=settings.rate_limit_memory_max_keys)
+    if name == "db":
+        return DbRateLimitBackend()
+    # la import (pornirea aplicației): o greșeală de tipar nu trebuie să schimbe tăcut backend-ul
+    raise RuntimeError(f"RATE_LIMIT_BACKEND invalid: {name!r} (valori: db | memory).")
 
-    if state.count > max_count:
-        state.blocked_until = now + timedelta(seconds=block_seconds)
-        db.commit()
+
+rate_limiter = RateLimiter(_make_backend(settings.rate_limit_backend))
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    rate_limiter.backend = backend
+
+
+def enforce_rate_limits_or_raise(db: Session, rules: Sequence[RateLimitRule]) -> None:
+    """
+    Un hit pe fiecare regulă (un singur statement pe backend-ul DB); 429 + Retry-After dacă oricare e depășită.
+    """
+    decisions = rate_limiter.check(db, rules)
+    retry_after = max((d.retry_after for d in decisions.values()), default=0)
+    if retry_after > 0:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Prea multe cereri. Reîncearcă mai târziu.",
-            headers={"Retry-After": str(max(1, block_seconds))},
+            headers={"Retry-After": str(retry_after)},
         )
 
-    db.commit()
+
+def enforce_rate_limit_or_raise(
+    db: Session,
+    *,
+    key: str,
+    max_count: int,
+    window_seconds: int,
+    block_seconds: int,
+) -> None:
+    enforce_rate_limits_or_raise(
+        db,
+        [RateLimitRule(key=key, max_count=max_count, window_seconds=window_seconds, block_seconds=block_seconds)],
+    )
@@ -0,0 +1,222 @@
+# FILE: app/services/request_timing.py
+# Scop:
+#   - Unde își petrece timpul un request: câte query-uri + timp DB, timp la provideri externi
+#     (SMSAPI / Stripe / SMTP), timp total în handler. Colectat per request într-un ContextVar,
+#     raportat de middleware/request_timing.py (header Server-Timing / log structurat).
+#   - Slow-query log: statement-urile peste SLOW_QUERY_MS, cu ruta care le-a emis.
+#
+# Reguli:
+#   - DB: evenimentele before/after_cursor_execute pe clasa Engine => toate engine-urile (primar, write,
+#     replică, async_engine.sync_engine), instalate o dată din app/main.py (install()).
+#   - Provideri: `with external_call("smsapi"):` în jurul apelului; în afara unui request (thread-uri
+#     de fundal: email_sender, janitor) ContextVar-ul e gol => se numără doar în stats(), fără request.
+#   - ContextVar-ul ajunge și în threadpool-ul rutelor sync (anyio copiază contextul) și în greenlet-urile
+#     SQLAlchemy async; thread-urile pornite manual (ThreadPoolExecutor) NU îl moștenesc.
+#   - Parametrii query-urilor nu se loghează niciodată (telefoane / emailuri); doar SQL-ul, trunchiat.
+#
+# Debug:
+#   - DEBUG=true (sau SERVER_TIMING_HEADER=true pe staging) => DevTools > Network > Timing arată db / smsapi / app.
+#   - grep "slow query" în log => ruta + durata + SQL; GET /api/metrics (admin) => request_timing.
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+logger = logging.getLogger("app.request_timing")
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_QUERY_START = "request_timing_query_start"
+_SQL_MAX_CHARS = 1000
+
+
+class RequestTimings:
+    """Contoarele unui request (un obiect per request, în ContextVar)."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.handler_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.slow_queries = 0
+        self.external: Dict[str, float] = {}  # provider -> ms
+        self.external_calls: Dict[str, int] = {}
+
+    @property
+    def route(self) -> str:
+        # ruta FastAPI ("/api/sms/order/{order_id}") e în scope după routing; înainte, path-ul brut
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+    def finish(self, status: int) -> None:
+        if self.handler_ms is None:
+            self.handler_ms = (time.perf_counter() - self.started) * 1000.0
+            self.status = status
+
+    def add_query(self, ms: float) -> None:
+        self.db_queries += 1
+        self.db_ms += ms
+
+    def add_external(self, name: str, ms: float) -> None:
+        self.external[name] = self.external.get(name, 0.0) + ms
+        self.external_calls[name] = self.external_calls.get(name, 0) + 1
+
+    def app_ms(self) -> float:
+        # timp în codul nostru (logică, serializare, așteptare în cozi); apeluri concurente => poate fi 0
+        return max(0.0, (self.handler_ms or 0.0) - self.db_ms - sum(self.external.values()))
+
+    def server_timing(self) -> str:
+        parts = [f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"']
+        parts += [f"{name};dur={ms:.1f}" for name, ms in sorted(self.external.items())]
+        parts.append(f"app;dur={self.app_ms():.1f}")
+        parts.append(f"total;dur={(self.handler_ms or 0.0):.1f}")
+        return ", ".join(parts)
+
+    def log_fields(self) -> dict:
+        fields = {
+            "method": self.scope.get("method", ""),
+            "route": self.route,
+            "status": self.status,
+            "total_ms": round(self.handler_ms or 0.0, 1),
+            "db_ms": round(self.db_ms, 1),
+            "db_queries": self.db_queries,
+            "app_ms": round(self.app_ms(), 1),
+        }
+        for name, ms in sorted(self.external.items()):
+            fields[f"{name}_ms"] = round(ms, 1)
+            fields[f"{name}_calls"] = self.external_calls[name]
+        if self.slow_queries:
+            fields["slow_queries"] = self.slow_queries
+        return fields
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimingRecorder:
+    def __init__(self, *, enabled: bool, slow_query_ms: float, log_requests: bool, log_min_ms: float):
+        self.enabled = enabled
+        self.slow_query_ms = max(0.0, float(slow_query_ms))
+        self.log_requests = log_requests
+        self.log_min_ms = max(0.0, float(log_min_ms))
+
+        self._lock = threading.Lock()
+        self._installed = False
+
+        self.requests = 0
+        self.queries = 0
+        self.query_ms = 0.0
+        self.slow_queries = 0
+        self.external_calls: Dict[str, int] = {}
+        self.external_ms: Dict[str, float] = {}
+
+    # --- request ---
+
+    def begin(self, scope: dict) -> tuple:
+        timings = RequestTimings(scope)
+        return timings, _current.set(timings)
+
+    def end(self, timings: RequestTimings, token) -> None:
+        _current.reset(token)
+        timings.finish(500)  # excepție înainte de răspuns (no-op dacă răspunsul a pornit)
+        with self._lock:
+            self.requests += 1
+        if self.log_requests and (timings.handler_ms or 0.0) >= self.log_min_ms:
+            fields = timings.log_fields()
+            # logfmt în mesaj (formatter-ul e text) + aceleași câmpuri în `extra` pentru handler-e JSON
+            logger.info("request %s", " ".join(f"{k}={v}" for k, v in fields.items()), extra={"timing": fields})
+
+    # --- provideri externi ---
+
+    @contextmanager
+    def external_call(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self.external_calls[name] = self.external_calls.get(name, 0) + 1
+                self.external_ms[name] = self.external_ms.get(name, 0.0) + ms
+            timings = _current.get()
+            if timings is not None:
+                timings.add_external(name, ms)
+
+    # --- DB (evenimente SQLAlchemy) ---
+
+    def install(self) -> None:
+        with self._lock:
+            if self._installed or not self.enabled:
+                return
+            self._installed = True
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        starts = conn.info.get(_QUERY_START)
+        if not starts:
+            return
+        ms = (time.perf_counter() - starts.pop()) * 1000.0
+        timings = _current.get()
+        slow = self.slow_query_ms > 0 and ms >= self.slow_query_ms
+
+        with self._lock:
+            self.queries += 1
+            self.query_ms += ms
+            if slow:
+                self.slow_queries += 1
+
+        if timings is not None:
+            timings.add_query(ms)
+        if slow:
+            if timings is not None:
+                timings.slow_queries += 1
+            route = f"{timings.scope.get('method', '')} {timings.route}" if timings is not None else "-"
+            sql = " ".join(statement.split())[:_SQL_MAX_CHARS]
+            slow_query_logger.warning("slow query %.1f ms route=%s: %s", ms, route, sql)
+
+    def _handle_error(self, context) -> None:
+        # after_cursor_execute nu mai vine => scoatem startul, altfel rămâne pe conexiune
+        conn = context.connection
+        starts = conn.info.get(_QUERY_START) if conn is not None else None
+        if starts:
+            starts.pop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "slow_query_ms": self.slow_query_ms,
+                "requests": self.requests,
+                "queries": self.queries,
+                "query_ms": round(self.query_ms, 1),
+                "slow_queries": self.slow_queries,
+                "external_calls": dict(self.external_calls),
+                "external_ms": {k: round(v, 1) for k, v in self.external_ms.items()},
+            }
+
+
+request_timing = RequestTimingRecorder(
+    enabled=settings.request_timing_enabled,
+    slow_query_ms=settings.slow_query_ms,
+    log_requests=settings.request_timing_log,
+    log_min_ms=settings.request_timing_log_min_ms,
+)
+
+
+def external_call(name: str):
+    """`with external_call("smsapi"): ...` — timp la provider, pe request-ul curent + în stats()."""
+    return request_timing.external_call(name)
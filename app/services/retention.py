@@ -0,0 +1,285 @@
+# FILE: app/services/retention.py
+# Scop:
+#   - Retenție pentru tabelele append-only: sms_logs și audit_logs.
+#   - Rândurile mai vechi decât fereastra tabelului (SMS_LOG_RETENTION_DAYS / AUDIT_LOG_RETENTION_DAYS)
+#     se arhivează pe lună (JSONL gzip) și apoi se șterg în loturi mici (câte o tranzacție per lot),
+#     ca să nu ținem lock-uri lungi pe o tabelă în care aplicația scrie continuu.
+#
+# Reguli:
+#   - Arhivă înainte de ștergere, lot cu lot: scriem + flush în fișierul lunii, abia apoi DELETE + commit.
+#     Crash între cele două => lotul apare de două ori în arhivă la rularea următoare (at-least-once), nu se pierde.
+#   - Fișiere: <RETENTION_ARCHIVE_DIR>/<tabel>/<tabel>-YYYY-MM.jsonl.gz; o rulare nouă adaugă un membru gzip
+#     (gzip -dc / zcat citesc fișierul întreg).
+#   - sms_logs: garda anti-duplicat citește din sms_send_history (+ sms_logs până la backfill);
+#     NU ștergem sms_logs cât timp istoricul vreunui tenant cu loguri expirate nu le acoperă (backfill_send_history).
+#   - Statisticile din dashboard vin din sms_daily_stats, deci nu se schimbă după purjare.
+#
+# GDPR:
+#   - Arhivele conțin telefoane / IP-uri / user-agent: directorul e creat cu permisiuni 0700;
+#     ștergerea definitivă = ștergerea fișierelor lunii.
+#
+# Debug:
+#   - python scripts/maintenance/retention.py status  => câte rânduri ar fi arhivate/șterse, pe lună.
+
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, delete, func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import dialect_insert
+from ..models import AuditLog, Order, SmsLog, SmsSendHistory
+from .sms.send_history import history_covers_logs, phone_key
+
+RETENTION_TABLES = {
+    "sms_logs": SmsLog,
+    "audit_logs": AuditLog,
+}
+
+
+@dataclass
+class RetentionResult:
+    table: str
+    cutoff: Optional[datetime]
+    archived: int = 0
+    deleted: int = 0
+    batches: int = 0
+    files: List[str] = field(default_factory=list)
+    per_month: Dict[str, int] = field(default_factory=dict)
+
+
+def retention_days(table: str) -> int:
+    if table == "sms_logs":
+        return settings.sms_log_retention_days
+    if table == "audit_logs":
+        return settings.audit_log_retention_days
+    raise ValueError(f"Tabel fără retenție: {table}")
+
+
+def retention_cutoff(table: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    days = retention_days(table)
+    if days <= 0:
+        return None
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def archive_path(table: str, month: str) -> Path:
+    return Path(settings.retention_archive_dir) / table / f"{table}-{month}.jsonl.gz"
+
+
+def _month_of(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m") if value else "unknown"
+
+
+def _json_row(row) -> str:
+    return json.dumps(dict(row), ensure_ascii=False, default=str)
+
+
+def pending_by_month(db: Session, table: str, now: Optional[datetime] = None) -> RetentionResult:
+    """
+    Ce ar șterge o purjare acum: număr de rânduri mai vechi decât cutoff, grupate pe lună.
+    """
+    cutoff = retention_cutoff(table, now)
+    result = RetentionResult(table=table, cutoff=cutoff)
+    if cutoff is None:
+        return result
+
+    t = RETENTION_TABLES[table].__table__
+    if db.get_bind().dialect.name == "sqlite":
+        month = func.strftime("%Y-%m", t.c.created_at)
+    else:
+        month = func.to_char(t.c.created_at, "YYYY-MM")
+    rows = db.execute(
+        select(month.label("month"), func.count().label("n"))
+        .where(t.c.created_at < cutoff)
+        .group_by(month)
+        .order_by(month)
+    ).all()
+    result.per_month = {m: int(n) for m, n in rows}
+    return result
+
+
+def purge_table(
+    db: Session,
+    table: str,
+    *,
+    now: Optional[datetime] = None,
+    archive: bool = True,
+    batch_size: Optional[int] = None,
+    max_batches: int = 0,
+    pause_seconds: float = 0.0,
+) -> RetentionResult:
+    """
+    Arhivează + șterge în loturi rândurile mai vechi decât fereastra tabelului.
+    max_batches > 0 limitează munca per rulare (cron frecvent, loturi mici).
+    """
+    cutoff = retention_cutoff(table, now)
+    result = RetentionResult(table=table, cutoff=cutoff)
+    if cutoff is None:
+        return result
+
+    if table == "sms_logs":
+        _require_send_history(db, cutoff)
+
+    t = RETENTION_TABLES[table].__table__
+    batch_size = max(1, batch_size or settings.retention_batch_size)
+    files: Dict[str, gzip.GzipFile] = {}
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(t)
+                .where(t.c.created_at < cutoff, t.c.id > last_id)
+                .order_by(t.c.id)
+                .limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+
+            if archive:
+                for row in rows:
+                    month = _month_of(row["created_at"])
+                    fh = files.get(month)
+                    if fh is None:
+                        fh = files[month] = _open_archive(table, month)
+                        result.files.append(str(archive_path(table, month)))
+                    fh.write((_json_row(row) + "\n").encode("utf-8"))
+                    result.per_month[month] = result.per_month.get(month, 0) + 1
+                for fh in files.values():
+                    fh.flush()
+                result.archived += len(rows)
+
+            ids = [row["id"] for row in rows]
+            db.execute(delete(t).where(t.c.id.in_(ids)))
+            db.commit()
+
+            result.deleted += len(ids)
+            result.batches += 1
+            last_id = ids[-1]
+
+            if max_batches and result.batches >= max_batches:
+                break
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)  # lăsăm scrierile aplicației să treacă între loturi
+    finally:
+        for fh in files.values():
+            fh.close()
+    return result
+
+
+def _open_archive(table: str, month: str) -> gzip.GzipFile:
+    path = archive_path(table, month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.chmod(path.parent, 0o700)
+    # "ab" => membru gzip nou la final; fișierul rămâne valid pentru zcat
+    return gzip.open(path, "ab")
+
+
+def _require_send_history(db: Session, cutoff: datetime) -> None:
+    # per tenant: un singur rând în sms_send_history (orice trimitere nouă scrie unul) nu înseamnă backfill
+    user_ids = [
+        uid
+        for (uid,) in db.execute(
+            select(SmsLog.user_id).where(SmsLog.created_at < cutoff, SmsLog.status == "success").distinct()
+        ).all()
+    ]
+    missing = [uid for uid in user_ids if not history_covers_logs(db, uid)]
+    if missing:
+        shown = ", ".join(str(uid) for uid in missing[:20]) + (" ..." if len(missing) > 20 else "")
+        raise RuntimeError(
+            f"sms_send_history nu acoperă sms_logs pentru {len(missing)} tenanți ({shown}): rulează întâi "
+            "`retention.py backfill-history`, altfel garda anti-duplicat pierde trimiterile vechi."
+        )
+
+
+def send_history_batch_stmt(user_id: int, last_id: int, batch_size: int):
+    # user_id și în join => pruning pe ambele tabele când sunt partiționate (services/partitioning.py)
+    return (
+        select(SmsLog.id, SmsLog.phone, Order.pnk, SmsLog.created_at)
+        .join(Order, and_(SmsLog.order_id == Order.id, SmsLog.user_id == Order.user_id))
+        .where(SmsLog.user_id == user_id, SmsLog.status == "success", SmsLog.id > last_id)
+        .order_by(SmsLog.id)
+        .limit(batch_size)
+    )
+
+
+def backfill_send_history(db: Session, *, user_id: Optional[int] = None, batch_size: int = 5000) -> int:
+    """
+    Populează sms_send_history din sms_logs (succes) + orders (PNK). Idempotent:
+    contoarele se agregă per tenant din tot istoricul, iar upsert-ul păstrează maximul.
+    Comenzile șterse la re-import nu mai au PNK => acele loguri nu pot fi recuperate.
+    """
+    user_ids = [user_id] if user_id is not None else [
+        uid for (uid,) in db.execute(select(SmsLog.user_id).where(SmsLog.status == "success").distinct()).all()
+    ]
+
+    table = SmsSendHistory.__table__
+    total = 0
+    for uid in user_ids:
+        agg: Dict[tuple, dict] = {}
+        last_id = 0
+        while True:
+            rows = db.execute(send_history_batch_stmt(uid, last_id, batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, phone, pnk, created_at in rows:
+                if not phone or not pnk:
+                    continue
+                sent_at = created_at or datetime.utcnow()
+                key = (phone_key(phone), pnk)
+                cur = agg.get(key)
+                if cur is None:
+                    agg[key] = {
+                        "user_id": uid,
+                        "phone_key": key[0],
+                        "pnk": pnk,
+                        "sent_count": 1,
+                        "first_sent_at": sent_at,
+                        "last_sent_at": sent_at,
+                    }
+                else:
+                    cur["sent_count"] += 1
+                    cur["first_sent_at"] = min(cur["first_sent_at"], sent_at)
+                    cur["last_sent_at"] = max(cur["last_sent_at"], sent_at)
+
+        if not agg:
+            continue
+        params = list(agg.values())
+        stmt = dialect_insert(table)
+        if hasattr(stmt, "on_conflict_do_update"):
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.phone_key, table.c.pnk],
+                set_={
+                    "sent_count": case(
+                        (excluded.sent_count > table.c.sent_count, excluded.sent_count),
+                        else_=table.c.sent_count,
+                    ),
+                    "first_sent_at": func.min(table.c.first_sent_at, excluded.first_sent_at)
+                    if db.get_bind().dialect.name == "sqlite"
+                    else func.least(table.c.first_sent_at, excluded.first_sent_at),
+                },
+            )
+            for i in range(0, len(params), batch_size):
+                db.execute(stmt, params[i:i + batch_size])
+        else:
+            existing = {
+                (k, pnk)
+                for k, pnk in db.execute(
+                    select(table.c.phone_key, table.c.pnk).where(table.c.user_id == uid)
+                ).all()
+            }
+            missing = [p for p in params if (p["phone_key"], p["pnk"]) not in existing]
+            if missing:
+                db.execute(table.insert(), missing)
+        db.commit()
+        total += len(params)
+    return total
@@ -0,0 +1,3 @@
+# FILE: app/services/sms/__init__.py
+# Pachet pentru serviciile SMS (scheduler, cache sold, rapoarte livrare...).
+# Trimiterea efectivă rămâne în app/services/sms_service.py.
@@ -0,0 +1,231 @@
+# FILE: app/services/sms/balance_cache.py
+# Scop:
+#   - Cache per token SMSAPI pentru soldul (points) din /profile, cu TTL scurt.
+#   - Single-flight: cererile concurente pentru același token împart UN singur apel upstream.
+#   - Stale-while-revalidate: dacă avem o valoare expirată (dar nu prea veche), o servim imediat
+#     și pornim refresh-ul în fundal (nu blocăm workerul 10s).
+#   - După fiecare trimitere reușită scădem local punctele raportate de sms.do.
+#   - aget(): aceeași logică pentru rutele async (fetch = corutină pe services/http_client.py); zborurile
+#     sunt comune cu get(), iar cei care așteaptă din async nu țin thread (future pe loop-ul lor).
+#
+# Observații:
+#   - Cheia e un digest al token-ului (nu ținem token-ul brut ca cheie / în metrici).
+#   - Erorile NU se cache-uiesc (următorul request reîncearcă), dar cei care așteaptă același zbor
+#     primesc aceeași eroare.
+#   - Cache-ul e per proces (per worker uvicorn).
+#
+# Debug:
+#   - Dacă soldul pare "înghețat", verifică SMS_BALANCE_TTL_SECONDS / SMS_BALANCE_MAX_STALE_SECONDS.
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ...config import settings
+
+# (ok, points, error)
+BalanceResult = Tuple[bool, Optional[float], Optional[str]]
+
+
+@dataclass
+class _Entry:
+    points: float
+    fetched_at: float
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: BalanceResult = (False, None, "Sold indisponibil momentan.")
+    waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(default_factory=list)
+
+
+class SmsBalanceCache:
+    def __init__(self, *, ttl_seconds: float, max_stale_seconds: float, max_entries: int = 5000):
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_stale_seconds = max(self.ttl_seconds, float(max_stale_seconds))
+        self.max_entries = max(1, int(max_entries))
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._tasks: Set[asyncio.Task] = set()  # refresh-uri async în fundal (referință până se termină)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str, fetch: Callable[[str], BalanceResult], *, wait_timeout: float = 15.0) -> Tuple[BalanceResult, bool]:
+        """
+        Returnează ((ok, points, error), stale).
+        `fetch(token)` face apelul real la SMSAPI; e apelat maxim o dată per token simultan.
+        """
+        key = self._key(token)
+        cached, stale, flight, leader, refresh = self._lookup(key)
+        if refresh is not None:
+            threading.Thread(
+                target=self._run_flight,
+                args=(key, token, fetch, refresh),
+                name="sms-balance-refresh",
+                daemon=True,
+            ).start()
+        if cached is not None:
+            return cached, stale
+
+        if leader:
+            self._run_flight(key, token, fetch, flight)
+        else:
+            flight.done.wait(timeout=wait_timeout)
+        return flight.result, False
+
+    async def aget(
+        self,
+        token: str,
+        fetch: Callable[[str], Awaitable[BalanceResult]],
+        *,
+        wait_timeout: float = 15.0,
+    ) -> Tuple[BalanceResult, bool]:
+        """
+        Ca get(), pentru rute async: `fetch(token)` e o corutină, refresh-ul "stale" e un task pe loop-ul curent.
+        """
+        key = self._key(token)
+        cached, stale, flight, leader, refresh = self._lookup(key)
+        if refresh is not None:
+            task = asyncio.get_running_loop().create_task(self._arun_flight(key, token, fetch, refresh))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if cached is not None:
+            return cached, stale
+
+        if leader:
+            await self._arun_flight(key, token, fetch, flight)
+            return flight.result, False
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._lock:
+            if flight.done.is_set():
+                return flight.result, False
+            flight.waiters.append((loop, fut))
+        try:
+            await asyncio.wait_for(fut, timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            pass
+        return flight.result, False
+
+    def apply_spent(self, token: str, points_spent: float) -> None:
+        """
+        Scade local punctele consumate de o trimitere (din răspunsul sms.do).
+        Nu reîmprospătează vârsta intrării: la expirarea TTL tot citim valoarea reală.
+        """
+        if not points_spent:
+            return
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.points = round(entry.points - float(points_spent), 4)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+    def _lookup(self, key: str) -> Tuple[Optional[BalanceResult], bool, Optional[_Flight], bool, Optional[_Flight]]:
+        """
+        Sub lock: (rezultat din cache | None, stale, zborul de așteptat, suntem leader, zbor de refresh de pornit).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return (True, entry.points, None), False, None, False, None
+                if age < self.max_stale_seconds:
+                    self.stale_hits += 1
+                    refresh = None
+                    if key not in self._flights:
+                        refresh = self._flights[key] = _Flight()
+                    return (True, entry.points, None), True, None, False, refresh
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            return None, False, flight, leader, None
+
+    def _run_flight(self, key: str, token: str, fetch: Callable[[str], BalanceResult], flight: _Flight) -> None:
+        result = flight.result
+        try:
+            result = fetch(token)
+        except Exception as exc:  # fetch nu ar trebui să arunce, dar nu lăsăm waiterii agățați
+            result = (False, None, str(exc))
+        finally:
+            self._finish_flight(key, flight, result)
+
+    async def _arun_flight(
+        self, key: str, token: str, fetch: Callable[[str], Awaitable[BalanceResult]], flight: _Flight
+    ) -> None:
+        result = flight.result
+        try:
+            result = await fetch(token)
+        except Exception as exc:
+            result = (False, None, str(exc))
+        finally:
+            # și la CancelledError (clientul leader s-a deconectat): altfel zborul rămâne în _flights
+            # și toți următorii așteaptă wait_timeout
+            self._finish_flight(key, flight, result)
+
+    def _finish_flight(self, key: str, flight: _Flight, result: BalanceResult) -> None:
+        with self._lock:
+            ok, points, _ = result
+            if ok and points is not None:
+                self._entries[key] = _Entry(points=points, fetched_at=time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            flight.result = result
+            self._flights.pop(key, None)
+            flight.done.set()
+            waiters, flight.waiters = flight.waiters, []
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, fut)
+            except RuntimeError:  # loop-ul celui care aștepta s-a închis între timp
+                pass
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+sms_balance_cache = SmsBalanceCache(
+    ttl_seconds=settings.sms_balance_ttl_seconds,
+    max_stale_seconds=settings.sms_balance_max_stale_seconds,
+)
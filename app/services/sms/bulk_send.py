@@ -0,0 +1,162 @@
+# FILE: app/services/sms/bulk_send.py
+# Scop:
+#   - Trimitere SMS de recenzie pentru mai multe comenzi deodată (POST /api/sms/bulk).
+#   - Toate verificările se fac în bulk (3 query-uri, nu 3 per comandă):
+#       * comenzile userului, mapările PNK → URL, perechile (telefon, PNK) deja trimise (sms_send_history).
+#   - Comenzile eligibile se grupează după textul mesajului (același PNK => același text)
+#     și se trimit câte UN apel SMSAPI per grup (spart în bucăți de SMS_BATCH_MAX_RECIPIENTS).
+#   - dry_run=True: doar eligibilitate + segmente estimate (cost), fără trimitere.
+#   - Cota lunară: rezervăm toate comenzile eligibile dintr-o dată (402 dacă nu încap),
+#     la final decontăm doar cele reușite.
+#
+# Reguli (aceleași ca la trimiterea simplă):
+#   - fără PNK / fără telefon / fără link de recenzie => skip cu motiv;
+#   - anti-duplicat telefon + PNK, inclusiv în interiorul aceluiași batch.
+#
+# Debug:
+#   - Răspunsul conține rezultat per comandă (ok / skipped / error + motiv).
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from ...config import settings
+from ...models import Order, ProductLink, User
+from ..sms_service import resolve_sms_account, send_sms_batch
+from ..billing.quota_reserve import commit_sms_quota, reserve_sms_quota
+from .review_message import render_review_message
+from .scheduler import bucket_key_for, sms_scheduler
+from .send_history import already_sent_pairs, phone_key
+
+
+@dataclass
+class BulkItemResult:
+    order_id: int
+    status: str  # success | error | skipped | ready (dry_run)
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    segments: Optional[int] = None
+
+
+def _chunks(items: list, size: int) -> List[list]:
+    size = max(1, int(size))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def send_review_sms_bulk(db: Session, *, user: User, order_ids: List[int], dry_run: bool = False) -> List[BulkItemResult]:
+    results: Dict[int, BulkItemResult] = {}
+
+    unique_ids = list(dict.fromkeys(order_ids))
+    orders = (
+        db.query(Order)
+        .filter(Order.user_id == user.id, Order.id.in_(unique_ids))
+        .all()
+    ) if unique_ids else []
+    found = {o.id: o for o in orders}
+    for oid in unique_ids:
+        if oid not in found:
+            results[oid] = BulkItemResult(order_id=oid, status="skipped", error="Comanda nu există.")
+
+    pnks = {o.pnk for o in orders if o.pnk}
+    links = {
+        link.pnk: link.review_url
+        for link in db.query(ProductLink).filter(ProductLink.user_id == user.id, ProductLink.pnk.in_(pnks)).all()
+    } if pnks else {}
+
+    phones = {str(o.phone_number or o.delivery_phone) for o in orders if (o.phone_number or o.delivery_phone)}
+    sent_pairs = already_sent_pairs(db, user.id, phones, pnks)
+
+    # grupare după textul mesajului (randat o dată per URL de recenzie)
+    groups: Dict[str, List[Tuple[Order, str]]] = defaultdict(list)
+    group_keys: Dict[str, set] = defaultdict(set)  # text -> phone_key-uri deja în grup
+    segments_by_text: Dict[str, int] = {}
+    rendered_by_url = {}
+    for o in orders:
+        phone = o.phone_number or o.delivery_phone
+        if not o.pnk:
+            results[o.id] = BulkItemResult(order_id=o.id, status="skipped", error="Comanda nu are PNK.")
+            continue
+        if not phone:
+            results[o.id] = BulkItemResult(order_id=o.id, status="skipped", error="Comanda nu are număr de telefon.")
+            continue
+        review_url = links.get(o.pnk)
+        if not review_url:
+            results[o.id] = BulkItemResult(
+                order_id=o.id, status="skipped", error=f"Nu există link de recenzie pentru PNK {o.pnk}."
+            )
+            continue
+        pair = (phone_key(str(phone)), o.pnk)
+        if pair in sent_pairs:
+            results[o.id] = BulkItemResult(
+                order_id=o.id, status="skipped", error="Clientul a primit deja SMS de recenzie pentru acest produs."
+            )
+            continue
+
+        rendered = rendered_by_url.get(review_url)
+        if rendered is None:
+            rendered = rendered_by_url[review_url] = render_review_message(user, review_url=review_url)
+        # același telefon de două ori în `to=` => SMSAPI trimite / raportează o dată, iar răspunsul nu
+        # mai poate fi mapat pe ambele comenzi (PNK-uri diferite, același URL de recenzie)
+        if pair[0] in group_keys[rendered.text]:
+            results[o.id] = BulkItemResult(
+                order_id=o.id, status="skipped", error="Clientul primește deja acest mesaj pentru altă comandă din lot."
+            )
+            continue
+        group_keys[rendered.text].add(pair[0])
+        sent_pairs.add(pair)  # anti-duplicat și în interiorul batch-ului
+        groups[rendered.text].append((o, str(phone)))
+        segments_by_text[rendered.text] = rendered.segments
+
+    if dry_run:
+        for text, items in groups.items():
+            for o, _ in items:
+                results[o.id] = BulkItemResult(order_id=o.id, status="ready", segments=segments_by_text[text])
+        return [results[oid] for oid in unique_ids]
+
+    reservation = reserve_sms_quota(db, user.id, sum(len(items) for items in groups.values()))
+    try:
+        _send_groups(db, user, groups, segments_by_text, results)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        commit_sms_quota(db, reservation, used=sum(1 for r in results.values() if r.status == "success"))
+
+    return [results[oid] for oid in unique_ids]
+
+
+def _send_groups(
+    db: Session,
+    user: User,
+    groups: Dict[str, List[Tuple[Order, str]]],
+    segments_by_text: Dict[str, int],
+    results: Dict[int, BulkItemResult],
+) -> None:
+    token, sender = resolve_sms_account(user)
+    bucket_key = bucket_key_for(token, sender)
+
+    throttled: Optional[str] = None
+    for text, items in groups.items():
+        for chunk in _chunks(items, settings.sms_batch_max_recipients):
+            if throttled is None:
+                try:
+                    sms_scheduler.acquire(tenant_id=user.id, bucket_key=bucket_key)
+                except HTTPException as exc:
+                    # coada e plină / timeout: nu mai încercăm restul, raportăm per comandă
+                    throttled = str(exc.detail)
+            if throttled is not None:
+                for o, _ in chunk:
+                    results[o.id] = BulkItemResult(order_id=o.id, status="error", error=throttled, segments=segments_by_text[text])
+                continue
+
+            for r in send_sms_batch(db, user, chunk, text):
+                results[r.order_id] = BulkItemResult(
+                    order_id=r.order_id,
+                    status="success" if r.success else "error",
+                    message_id=r.info if r.success else None,
+                    error=None if r.success else r.info,
+                    segments=segments_by_text[text],
+                )
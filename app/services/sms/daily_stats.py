@@ -0,0 +1,170 @@
+# FILE: app/services/sms/daily_stats.py
+# Scop:
+#   - Rollup zilnic SMS per tenant + PNK (tabel sms_daily_stats), întreținut incremental la trimitere.
+#   - Dashboard-ul citește totaluri + serie zilnică din rollup într-UN singur query,
+#     deci costul nu crește odată cu istoricul din sms_logs.
+#
+# Reguli:
+#   - record_sms_results() NU face commit: rulează în aceeași tranzacție cu inserarea SmsLog
+#     (rollup-ul nu poate diverge de log dacă commit-ul eșuează).
+#   - Upsert atomic (INSERT ... ON CONFLICT DO UPDATE cu incremente), sigur între workeri.
+#   - Ziua = data UTC a created_at din SmsLog.
+#
+# Debug:
+#   - Totaluri diferite față de sms_logs => rulează scripts/maintenance/backfill_sms_daily_stats.py
+#     pentru tenantul respectiv (recalculează din sms_logs).
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, String, and_, case, cast, func, literal, null, select, union_all, update
+from sqlalchemy.orm import Session
+
+from ...database import dialect_insert
+from ...models import SmsDailyStat
+
+# (pnk, success, sent_at) per SMS trimis
+SmsResultEntry = Tuple[Optional[str], bool, datetime]
+
+
+@dataclass(frozen=True)
+class SmsDailyPoint:
+    day: date
+    pnk: Optional[str]
+    success: int
+    error: int
+    last_sent_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class SmsStatsSummary:
+    total_sent_success: int
+    total_sent_error: int
+    last_sent_at: Optional[datetime]
+    series: List[SmsDailyPoint]
+
+
+def _aggregate(entries: Iterable[SmsResultEntry]) -> Dict[Tuple[date, str], list]:
+    agg: Dict[Tuple[date, str], list] = defaultdict(lambda: [0, 0, None])
+    for pnk, success, sent_at in entries:
+        row = agg[(sent_at.date(), pnk or "")]
+        row[0 if success else 1] += 1
+        if row[2] is None or sent_at > row[2]:
+            row[2] = sent_at
+    return agg
+
+
+def record_sms_results(db: Session, user_id: int, entries: Iterable[SmsResultEntry]) -> None:
+    """
+    Incrementează rollup-ul pentru rezultatele date (un statement executemany, fără commit).
+    """
+    agg = _aggregate(entries)
+    if not agg:
+        return
+
+    params = [
+        {"user_id": user_id, "day": day, "pnk": pnk, "success_count": s, "error_count": e, "last_sent_at": last}
+        for (day, pnk), (s, e, last) in agg.items()
+    ]
+
+    table = SmsDailyStat.__table__
+    stmt = dialect_insert(table)
+    if not hasattr(stmt, "on_conflict_do_update"):
+        _record_fallback(db, table, params)
+        return
+
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day, table.c.pnk],
+        set_={
+            "success_count": table.c.success_count + excluded.success_count,
+            "error_count": table.c.error_count + excluded.error_count,
+            "last_sent_at": case(
+                (table.c.last_sent_at.is_(None), excluded.last_sent_at),
+                (excluded.last_sent_at > table.c.last_sent_at, excluded.last_sent_at),
+                else_=table.c.last_sent_at,
+            ),
+        },
+    )
+    db.execute(stmt, params)
+
+
+def _record_fallback(db: Session, table, params: List[dict]) -> None:
+    """
+    Dialecte fără ON CONFLICT: UPDATE incremental, iar dacă nu există rândul => INSERT.
+    """
+    for p in params:
+        res = db.execute(
+            update(table)
+            .where(and_(table.c.user_id == p["user_id"], table.c.day == p["day"], table.c.pnk == p["pnk"]))
+            .values(
+                success_count=table.c.success_count + p["success_count"],
+                error_count=table.c.error_count + p["error_count"],
+                last_sent_at=p["last_sent_at"],
+            )
+        )
+        if not res.rowcount:
+            db.execute(table.insert().values(**p))
+
+
+def get_sms_stats(db: Session, user_id: int, *, days: int = 0, by_pnk: bool = False) -> SmsStatsSummary:
+    """
+    Totaluri all-time + (opțional) serie zilnică pe ultimele `days` zile, într-un singur query (UNION ALL).
+    by_pnk=False => serie agregată pe zi (pnk=None).
+    """
+    t = SmsDailyStat.__table__
+    where_user = t.c.user_id == user_id
+
+    totals_q = select(
+        literal("T").label("kind"),
+        cast(null(), Date).label("day"),
+        cast(null(), String).label("pnk"),
+        func.coalesce(func.sum(t.c.success_count), 0).label("success"),
+        func.coalesce(func.sum(t.c.error_count), 0).label("error"),
+        func.max(t.c.last_sent_at).label("last_sent_at"),
+    ).where(where_user)
+
+    query = totals_q
+    if days > 0:
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        pnk_col = t.c.pnk if by_pnk else cast(null(), String)
+        group_by = [t.c.day, t.c.pnk] if by_pnk else [t.c.day]
+        series_q = (
+            select(
+                literal("D").label("kind"),
+                t.c.day,
+                pnk_col.label("pnk"),
+                func.sum(t.c.success_count).label("success"),
+                func.sum(t.c.error_count).label("error"),
+                func.max(t.c.last_sent_at).label("last_sent_at"),
+            )
+            .where(where_user, t.c.day >= since)
+            .group_by(*group_by)
+        )
+        u = union_all(totals_q, series_q).subquery()
+        query = select(u).order_by(u.c.kind.desc(), u.c.day, u.c.pnk)
+
+    totals = None
+    series: List[SmsDailyPoint] = []
+    for row in db.execute(query).mappings():
+        if row["kind"] == "T":
+            totals = row
+            continue
+        series.append(
+            SmsDailyPoint(
+                day=row["day"],
+                pnk=row["pnk"],
+                success=int(row["success"] or 0),
+                error=int(row["error"] or 0),
+                last_sent_at=row["last_sent_at"],
+            )
+        )
+
+    return SmsStatsSummary(
+        total_sent_success=int(totals["success"] or 0) if totals else 0,
+        total_sent_error=int(totals["error"] or 0) if totals else 0,
+        last_sent_at=totals["last_sent_at"] if totals else None,
+        series=series,
+    )
@@ -0,0 +1,131 @@
+# FILE: app/services/sms/delivery_reports.py
+# Scop:
+#   - Ingestie rapoarte de livrare (DLR) trimise de SMSAPI pe callback.
+#   - SMSAPI poate grupa mai multe rapoarte într-un singur apel: valorile vin separate prin virgulă
+#     (MsgId=a,b,c&status=404,405,404&done_date=...).
+#   - Update-urile se aplică printr-UN singur statement executemany (fără load ORM rând cu rând).
+#
+# Reguli:
+#   - Potrivirea se face pe sms_logs.message_id (indexat).
+#   - Nu suprascriem un status mai nou cu unul mai vechi (done_date monoton).
+#
+# Debug:
+#   - Dacă statusurile nu apar: verifică URL-ul de callback din panoul SMSAPI (cu ?key=...)
+#     și că message_id din sms_logs nu e gol (submit-uri vechi/eșuate nu au id).
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Mapping
+
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+
+from ...models import SmsLog
+
+logger = logging.getLogger(__name__)
+
+# Coduri status SMSAPI => nume (folosite dacă lipsește status_name din callback)
+SMSAPI_STATUS_CODES: Dict[str, str] = {
+    "401": "not_found",
+    "402": "expired",
+    "403": "sent",
+    "404": "delivered",
+    "405": "undelivered",
+    "406": "failed",
+    "407": "rejected",
+    "408": "unknown",
+    "409": "queue",
+    "410": "accepted",
+    "411": "renewal",
+    "412": "stop",
+}
+
+MAX_REPORTS_PER_CALLBACK = 10000
+
+
+@dataclass(frozen=True)
+class DeliveryReport:
+    message_id: str
+    status: str
+    status_at: datetime
+
+
+def _split(params: Mapping[str, str], name: str) -> List[str]:
+    raw = params.get(name) or ""
+    return [p.strip() for p in str(raw).split(",")]
+
+
+def _status_at(raw: str, fallback: datetime) -> datetime:
+    try:
+        return datetime.utcfromtimestamp(int(raw))
+    except Exception:
+        return fallback
+
+
+def parse_delivery_reports(params: Mapping[str, str]) -> List[DeliveryReport]:
+    """
+    Transformă parametrii callback-ului (query sau form) în rapoarte.
+    Intrările fără MsgId sau fără status sunt ignorate.
+    """
+    now = datetime.utcnow()
+    ids = _split(params, "MsgId")[:MAX_REPORTS_PER_CALLBACK]
+    codes = _split(params, "status")
+    names = _split(params, "status_name")
+    done = _split(params, "done_date")
+
+    reports: List[DeliveryReport] = []
+    for i, msg_id in enumerate(ids):
+        if not msg_id or len(msg_id) > 128:
+            continue
+        name = names[i].lower() if i < len(names) and names[i] else ""
+        code = codes[i] if i < len(codes) else ""
+        status_value = (name or SMSAPI_STATUS_CODES.get(code) or code)[:32]
+        if not status_value:
+            continue
+        reports.append(
+            DeliveryReport(
+                message_id=msg_id,
+                status=status_value,
+                status_at=_status_at(done[i] if i < len(done) else "", now),
+            )
+        )
+    return reports
+
+
+def apply_delivery_reports(db: Session, reports: List[DeliveryReport]) -> int:
+    """
+    Aplică rapoartele în bulk: un UPDATE parametrizat, executat o dată cu toate seturile de parametri.
+    Returnează numărul de rapoarte procesate (după deduplicare pe message_id).
+    """
+    if not reports:
+        return 0
+
+    # același message_id de mai multe ori în batch => păstrăm raportul cel mai nou
+    latest: Dict[str, DeliveryReport] = {}
+    for r in reports:
+        cur = latest.get(r.message_id)
+        if cur is None or r.status_at >= cur.status_at:
+            latest[r.message_id] = r
+
+    table = SmsLog.__table__
+    stmt = (
+        update(table)
+        .where(table.c.message_id == bindparam("b_message_id"))
+        .where(
+            or_(
+                table.c.delivery_status_at.is_(None),
+                table.c.delivery_status_at <= bindparam("b_status_at"),
+            )
+        )
+        .values(delivery_status=bindparam("b_status"), delivery_status_at=bindparam("b_status_at"))
+    )
+    params = [
+        {"b_message_id": r.message_id, "b_status": r.status, "b_status_at": r.status_at}
+        for r in latest.values()
+    ]
+    db.execute(stmt, params)
+    db.commit()
+
+    logger.info("DLR SMSAPI: %s rapoarte aplicate", len(params))
+    return len(params)
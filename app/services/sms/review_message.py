@@ -0,0 +1,29 @@
+# FILE: app/services/sms/review_message.py
+# Scop:
+#   - Textul SMS-ului de recenzie, într-un singur loc (trimitere simplă + bulk + preview).
+#   - Template per tenant (users.sms_template) sau cel implicit; mod transliterare per tenant.
+#   - Pentru același PNK textul e identic între destinatari => bulk-ul grupează după text.
+
+from typing import Union
+
+from ...config import settings
+from ...models import User
+from ..auth.user_cache import CachedUser
+from .template import RenderedSms, render_sms
+
+DEFAULT_REVIEW_TEMPLATE = (
+    "Bună ziua, suntem echipa de la {company} și vă mulțumim pentru comanda dvs. "
+    "Recent ați cumpărat un produs de la noi și ne-ar ajuta mult feedback-ul dvs. despre produs. "
+    "Puteți lăsa o recenzie aici: [%goto:{review_url}%] "
+    "Acest mesaj este trimis punctual doar clienților care au plasat comenzi, nu este o campanie generală de marketing."
+)
+
+
+def render_review_message(user: Union[User, CachedUser], *, review_url: str) -> RenderedSms:
+    return render_sms(
+        user.sms_template or DEFAULT_REVIEW_TEMPLATE,
+        company=user.sms_company_name or "",
+        review_url=review_url,
+        mode=user.sms_transliteration or settings.sms_transliteration_default,
+        target_segments=settings.sms_target_segments,
+    )
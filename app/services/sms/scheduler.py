@@ -0,0 +1,290 @@
+# FILE: app/services/sms/scheduler.py
+# Scop:
+#   - Scheduler în fața send_sms_for_order: rată token-bucket per cont SMSAPI (token + sender)
+#     și round-robin între tenanți (useri), ca o campanie mare să nu-i blocheze pe cei mici.
+#   - Coadă limitată per tenant => un singur tenant nu poate ocupa tot threadpool-ul.
+#   - Metrici per tenant: adâncime coadă, timp de așteptare (mediu / max), total acordate/respinse.
+#
+# Cum funcționează:
+#   - Fiecare cerere intră într-o coadă per tenant (bilet).
+#   - La orice schimbare de stare (bilet nou, timeout, refill) rulăm _dispatch_locked():
+#       * parcurgem tenanții în ordine round-robin;
+#       * fiecare tenant primește maxim UN bilet per tură, dacă bucket-ul contului lui are token-uri.
+#   - Nu avem thread de fundal: cei care așteaptă se trezesc singuri la următorul refill.
+#   - acquire_async (rute async): același bilet în aceeași coadă; în loc de Condition.wait doarme cu
+#     asyncio.sleep până la următorul refill și verifică dacă a fost servit (nu ține thread).
+#
+# Limitări:
+#   - Starea e per proces (per worker uvicorn). Cu N workeri, rata efectivă per cont e N × SMS_RATE_PER_SECOND;
+#     setează rata împărțită la numărul de workeri.
+#
+# Debug:
+#   - GET /api/sms/queue => starea cozii pentru userul curent.
+#   - GET /api/metrics (admin) => snapshot complet (toți tenanții + bucket-uri).
+#   - Dacă primești 429 "Coada SMS este plină", crește SMS_MAX_QUEUE_PER_TENANT sau rata.
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict
+
+from fastapi import HTTPException, status
+
+from ...config import settings
+from ..token_bucket import TokenBucket
+
+
+def bucket_key_for(token: str, sender: str) -> str:
+    """
+    Cheia bucket-ului = contul SMSAPI (token + sender).
+    Nu ținem token-ul brut în memorie/metrici, doar un digest scurt.
+    """
+    digest = hashlib.sha256(f"{token}|{sender}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+@dataclass
+class _Ticket:
+    tenant_id: int
+    bucket_key: str
+    cost: float
+    enqueued_at: float
+    granted: bool = False
+
+
+@dataclass
+class _TenantStats:
+    granted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    queue: Deque[_Ticket] = field(default_factory=deque)
+
+
+class SmsScheduler:
+    def __init__(
+        self,
+        *,
+        rate_per_second: float,
+        burst: float,
+        max_queue_per_tenant: int,
+        wait_timeout_seconds: float,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_queue_per_tenant = max(1, int(max_queue_per_tenant))
+        self.wait_timeout_seconds = max(0.1, float(wait_timeout_seconds))
+
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._tenants: Dict[int, _TenantStats] = {}
+        self._rr: Deque[int] = deque()  # tenanți cu bilete în așteptare, ordinea round-robin
+
+    # -------------------------
+    # API public
+    # -------------------------
+    def acquire(self, *, tenant_id: int, bucket_key: str, cost: float = 1.0) -> float:
+        """
+        Blochează până când tenantul primește rândul și contul are token-uri.
+        Ridică 429 dacă tenantul are coada plină, 503 dacă expiră așteptarea.
+        Returnează timpul de așteptare (secunde).
+        """
+        deadline = time.monotonic() + self.wait_timeout_seconds
+
+        with self._cond:
+            ticket = self._enqueue_locked(tenant_id, bucket_key, cost)
+            while not ticket.granted:
+                now = time.monotonic()
+                if now >= deadline:
+                    self._timeout_locked(ticket)
+                self._cond.wait(timeout=min(deadline - now, self._next_wakeup_locked()))
+                self._dispatch_locked()
+
+            return time.monotonic() - ticket.enqueued_at
+
+    async def acquire_async(self, *, tenant_id: int, bucket_key: str, cost: float = 1.0) -> float:
+        """
+        Ca acquire(), pentru rute async: aceeași coadă / aceleași bucket-uri, dar așteptarea e
+        asyncio.sleep până la următorul refill (lock-ul se ține doar cât reevaluăm coada).
+        """
+        deadline = time.monotonic() + self.wait_timeout_seconds
+
+        with self._cond:
+            ticket = self._enqueue_locked(tenant_id, bucket_key, cost)
+        while True:
+            with self._cond:
+                if ticket.granted:
+                    return time.monotonic() - ticket.enqueued_at
+                now = time.monotonic()
+                if now >= deadline:
+                    self._timeout_locked(ticket)
+                pause = min(deadline - now, self._next_wakeup_locked())
+            try:
+                await asyncio.sleep(pause)
+            except asyncio.CancelledError:
+                # clientul s-a deconectat: biletul nu mai are cine să-l folosească => nu blocăm coada tenantului
+                with self._cond:
+                    self._drop_locked(ticket)
+                    self._dispatch_locked()
+                raise
+            with self._cond:
+                self._dispatch_locked()
+
+    def penalize(self, bucket_key: str, retry_after_seconds: float) -> None:
+        """
+        Provider-ul a răspuns 429 pentru acest cont => oprim bucket-ul cât cere Retry-After.
+        """
+        with self._cond:
+            self._bucket_locked(bucket_key).pause(retry_after_seconds)
+
+    def tenant_snapshot(self, tenant_id: int) -> dict:
+        with self._cond:
+            stats = self._tenants.get(tenant_id)
+            return self._tenant_dict_locked(stats or _TenantStats())
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "rate_per_second": self.rate_per_second,
+                "burst": self.burst,
+                "max_queue_per_tenant": self.max_queue_per_tenant,
+                "tenants": {str(tid): self._tenant_dict_locked(s) for tid, s in self._tenants.items()},
+                "buckets": {
+                    key: {
+                        "tokens": round(b.tokens, 3),
+                        "paused_for_seconds": round(max(0.0, b.paused_until - now), 3),
+                    }
+                    for key, b in self._buckets.items()
+                },
+            }
+
+    # -------------------------
+    # Intern (apelat DOAR cu lock-ul ținut)
+    # -------------------------
+    def _bucket_locked(self, bucket_key: str) -> TokenBucket:
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.rate_per_second, capacity=self.burst)
+            self._buckets[bucket_key] = bucket
+        return bucket
+
+    def _enqueue_locked(self, tenant_id: int, bucket_key: str, cost: float) -> _Ticket:
+        """
+        Bilet nou în coada tenantului (429 dacă e plină) + o tură de dispatch.
+        """
+        stats = self._tenants.setdefault(tenant_id, _TenantStats())
+        if len(stats.queue) >= self.max_queue_per_tenant:
+            stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Coada SMS este plină. Reîncearcă în câteva secunde.",
+                headers={"Retry-After": str(self._retry_after_locked(bucket_key, len(stats.queue)))},
+            )
+
+        ticket = _Ticket(tenant_id=tenant_id, bucket_key=bucket_key, cost=cost, enqueued_at=time.monotonic())
+        stats.queue.append(ticket)
+        if tenant_id not in self._rr:
+            self._rr.append(tenant_id)
+
+        self._dispatch_locked()
+        return ticket
+
+    def _timeout_locked(self, ticket: _Ticket) -> None:
+        """
+        Așteptarea a expirat: scoatem biletul și ridicăm 503.
+        """
+        stats = self._tenants[ticket.tenant_id]
+        self._drop_locked(ticket)
+        stats.timed_out += 1
+        self._dispatch_locked()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviciul SMS este ocupat. Reîncearcă în câteva secunde.",
+            headers={"Retry-After": str(self._retry_after_locked(ticket.bucket_key, len(stats.queue)))},
+        )
+
+    def _dispatch_locked(self) -> None:
+        """
+        Acordă bilete în ordine round-robin: maxim unul per tenant per tură.
+        Ne oprim când o tură completă nu a acordat nimic.
+        """
+        granted_any = False
+        progress = True
+        while progress and self._rr:
+            progress = False
+            now = time.monotonic()
+            for tenant_id in list(self._rr):
+                stats = self._tenants[tenant_id]
+                if not stats.queue:
+                    continue
+                head = stats.queue[0]
+                if self._bucket_locked(head.bucket_key).try_take(head.cost, now):
+                    # tenantul servit trece la coada rotației => următorul acordare începe cu altcineva
+                    self._rr.remove(tenant_id)
+                    self._rr.append(tenant_id)
+                    stats.queue.popleft()
+                    head.granted = True
+                    waited = now - head.enqueued_at
+                    stats.granted += 1
+                    stats.wait_total += waited
+                    stats.wait_max = max(stats.wait_max, waited)
+                    progress = True
+                    granted_any = True
+
+            self._rr = deque(tid for tid in self._rr if self._tenants[tid].queue)
+
+        if granted_any:
+            self._cond.notify_all()
+
+    def _drop_locked(self, ticket: _Ticket) -> None:
+        stats = self._tenants.get(ticket.tenant_id)
+        if stats and ticket in stats.queue:
+            stats.queue.remove(ticket)
+        if stats and not stats.queue and ticket.tenant_id in self._rr:
+            self._rr.remove(ticket.tenant_id)
+
+    def _next_wakeup_locked(self) -> float:
+        """
+        Cât dormim până la următorul refill relevant (minim 5ms, maxim 1s).
+        """
+        now = time.monotonic()
+        waits = [
+            self._bucket_locked(s.queue[0].bucket_key).seconds_until(s.queue[0].cost, now)
+            for s in (self._tenants[tid] for tid in self._rr)
+            if s.queue
+        ]
+        if not waits:
+            return 1.0
+        return min(1.0, max(0.005, min(waits)))
+
+    def _retry_after_locked(self, bucket_key: str, queued: int) -> int:
+        bucket = self._bucket_locked(bucket_key)
+        estimate = bucket.seconds_until(1.0) + queued / bucket.rate
+        return max(1, int(estimate + 0.999))
+
+    @staticmethod
+    def _tenant_dict_locked(stats: _TenantStats) -> dict:
+        now = time.monotonic()
+        oldest_wait = (now - stats.queue[0].enqueued_at) if stats.queue else 0.0
+        return {
+            "queue_depth": len(stats.queue),
+            "oldest_wait_seconds": round(oldest_wait, 3),
+            "granted": stats.granted,
+            "rejected": stats.rejected,
+            "timed_out": stats.timed_out,
+            "avg_wait_seconds": round(stats.wait_total / stats.granted, 4) if stats.granted else 0.0,
+            "max_wait_seconds": round(stats.wait_max, 4),
+        }
+
+
+sms_scheduler = SmsScheduler(
+    rate_per_second=settings.sms_rate_per_second,
+    burst=settings.sms_rate_burst,
+    max_queue_per_tenant=settings.sms_max_queue_per_tenant,
+    wait_timeout_seconds=settings.sms_queue_timeout_seconds,
+)
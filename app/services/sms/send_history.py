@@ -0,0 +1,159 @@
+# FILE: app/services/sms/send_history.py
+# Scop:
+#   - Istoricul compact „clientul X a primit SMS de recenzie pentru PNK Y” (tabel sms_send_history),
+#     folosit de garda anti-duplicat (trimitere simplă + bulk).
+#   - Supraviețuiește retenției pe sms_logs (rândurile vechi se arhivează și se șterg)
+#     și re-importului de comenzi (import-ul șterge comenzile, deci join-ul sms_logs → orders se pierde).
+#
+# Reguli:
+#   - Cheia = (user_id, phone_key, pnk); phone_key = ultimele 9 cifre (0712.. / +40712.. / 40712.. sunt egale).
+#   - record_sent_reviews() NU face commit: rulează în tranzacția care scrie SmsLog.
+#   - Cât timp istoricul unui tenant nu acoperă sms_logs (DB existentă, backfill nerulat), garda citește
+#     și join-ul vechi sms_logs ⋈ orders => corectitudinea nu depinde de un pas manual.
+#
+# Debug:
+#   - DB existentă: după deploy rulează o dată
+#       python scripts/maintenance/retention.py backfill-history
+#     => scoate query-ul de fallback de pe trimiteri (și e obligatoriu înainte de purjarea sms_logs).
+
+import threading
+from datetime import datetime
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.orm import Session
+
+from ...database import dialect_insert
+from ...models import Order, SmsLog, SmsSendHistory
+
+# tenanții al căror istoric acoperă sms_logs (odată adevărat, rămâne adevărat => cache per proces)
+_covered_tenants: Set[int] = set()
+_covered_lock = threading.Lock()
+
+
+def phone_key(phone: str) -> str:
+    """
+    Cheie de potrivire pentru telefon: ultimele 9 cifre.
+    SMSAPI întoarce numărul normalizat (ex. 40712345678), în comenzi avem 0712345678 / +40...
+    """
+    digits = "".join(ch for ch in str(phone) if ch.isdigit())
+    return digits[-9:]
+
+
+def record_sent_reviews(db: Session, user_id: int, sent: Iterable[Tuple[str, str, datetime]]) -> None:
+    """
+    sent = [(phone, pnk, sent_at)] pentru SMS-urile reușite. Upsert: incrementează sent_count.
+    """
+    params = {}
+    for phone, pnk, sent_at in sent:
+        if not phone or not pnk:
+            continue
+        key = (phone_key(phone), pnk)
+        cur = params.get(key)
+        if cur is None:
+            params[key] = {
+                "user_id": user_id,
+                "phone_key": key[0],
+                "pnk": pnk,
+                "sent_count": 1,
+                "first_sent_at": sent_at,
+                "last_sent_at": sent_at,
+            }
+        else:
+            cur["sent_count"] += 1
+            cur["last_sent_at"] = max(cur["last_sent_at"], sent_at)
+    if not params:
+        return
+
+    table = SmsSendHistory.__table__
+    stmt = dialect_insert(table)
+    if not hasattr(stmt, "on_conflict_do_update"):
+        for p in params.values():
+            res = db.execute(
+                update(table)
+                .where(and_(table.c.user_id == user_id, table.c.phone_key == p["phone_key"], table.c.pnk == p["pnk"]))
+                .values(sent_count=table.c.sent_count + p["sent_count"], last_sent_at=p["last_sent_at"])
+            )
+            if not res.rowcount:
+                db.execute(table.insert().values(**p))
+        return
+
+    excluded = stmt.excluded
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.phone_key, table.c.pnk],
+            set_={
+                "sent_count": table.c.sent_count + excluded.sent_count,
+                "last_sent_at": case(
+                    (excluded.last_sent_at > table.c.last_sent_at, excluded.last_sent_at),
+                    else_=table.c.last_sent_at,
+                ),
+            },
+        ),
+        list(params.values()),
+    )
+
+
+def _sent_logs_stmt(user_id: int):
+    # aceleași rânduri pe care le citește backfill-ul (retention.send_history_batch_stmt)
+    return (
+        select(SmsLog.phone, Order.pnk)
+        .join(Order, and_(SmsLog.order_id == Order.id, SmsLog.user_id == Order.user_id))
+        .where(
+            SmsLog.user_id == user_id,
+            SmsLog.status == "success",
+            SmsLog.phone.isnot(None),
+            SmsLog.phone != "",
+            Order.pnk.isnot(None),
+            Order.pnk != "",
+        )
+    )
+
+
+def history_covers_logs(db: Session, user_id: int) -> bool:
+    """
+    True dacă sms_send_history are toate trimiterile reușite ale tenantului din sms_logs: niciun log
+    mai vechi decât primul rând din istoric. Backfill-ul pune first_sent_at = cel mai vechi log, iar
+    trimiterile noi scriu istoricul în tranzacția logului (același created_at) => după backfill rămâne True.
+    """
+    if user_id in _covered_tenants:
+        return True
+    t = SmsSendHistory.__table__
+    first = db.execute(select(func.min(t.c.first_sent_at)).where(t.c.user_id == user_id)).scalar()
+    older = _sent_logs_stmt(user_id)
+    if first is not None:
+        older = older.where(SmsLog.created_at < first)
+    if db.execute(older.limit(1)).first() is not None:
+        return False
+    with _covered_lock:
+        _covered_tenants.add(user_id)
+    return True
+
+
+def already_sent_pairs(db: Session, user_id: int, phones: Set[str], pnks: Set[str]) -> Set[Tuple[str, str]]:
+    """
+    Perechi (phone_key, PNK) din mulțimile date care au primit deja SMS de recenzie.
+    Fallback pe sms_logs ⋈ orders cât timp istoricul tenantului nu e populat (history_covers_logs).
+    """
+    keys = {phone_key(p) for p in phones if p}
+    if not keys or not pnks:
+        return set()
+    t = SmsSendHistory.__table__
+    rows = db.execute(
+        select(t.c.phone_key, t.c.pnk).where(
+            t.c.user_id == user_id,
+            t.c.phone_key.in_(keys),
+            t.c.pnk.in_(pnks),
+        )
+    ).all()
+    pairs = {(k, pnk) for k, pnk in rows}
+
+    if not history_covers_logs(db, user_id):
+        # telefonul din log e normalizat de SMSAPI (40712...) => potrivire pe phone_key, în Python
+        legacy = db.execute(_sent_logs_stmt(user_id).where(Order.pnk.in_(pnks)).distinct()).all()
+        pairs |= {(phone_key(p), pnk) for p, pnk in legacy if phone_key(p) in keys}
+    return pairs
+
+
+def has_sent_review(db: Session, user_id: int, phone: str, pnk: str) -> bool:
+    return bool(already_sent_pairs(db, user_id, {phone}, {pnk}))
@@ -0,0 +1,161 @@
+# FILE: app/services/sms/template.py
+# Scop:
+#   - Compilator de template-uri SMS per tenant: template-ul se parsează O dată (cache),
+#     apoi doar substituim {company} / {review_url}.
+#   - Numărare segmente facturabile: GSM-7 (160 / 153 pe segment) vs UCS-2 (70 / 67 pe segment).
+#   - Transliterare (ă→a, ș→s, ț→t, ghilimele „” → "...) ca mesajul să rămână GSM-7.
+#
+# Moduri transliterare:
+#   - "off":    textul pleacă exact cum e (diacriticele => UCS-2).
+#   - "auto":   transliterăm DOAR dacă varianta UCS-2 depășește SMS_TARGET_SEGMENTS.
+#   - "always": transliterăm mereu.
+#
+# Observații:
+#   - [%goto:URL%] e înlocuit de SMSAPI cu un link scurt; la numărare estimăm lungimea lui (GOTO_LINK_LENGTH).
+#   - Acoladele literale se scriu dublat: {{ și }}.
+#
+# Debug:
+#   - POST /api/sms/bulk cu dry_run=true sau GET /api/sms/preview => segmente estimate înainte de trimitere.
+
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+TEMPLATE_FIELDS = ("company", "review_url")
+TRANSLITERATION_MODES = ("off", "auto", "always")
+
+# Lungimea estimată a linkului scurt generat de SMSAPI pentru [%goto:...%]
+GOTO_LINK_LENGTH = 22
+
+_GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+_GSM7_EXTENDED = set("^{}\\[~]|€\f")
+
+_TRANSLIT: Dict[str, str] = {
+    "ă": "a", "â": "a", "î": "i", "ș": "s", "ş": "s", "ț": "t", "ţ": "t",
+    "Ă": "A", "Â": "A", "Î": "I", "Ș": "S", "Ş": "S", "Ț": "T", "Ţ": "T",
+    "„": '"', "”": '"', "“": '"', "«": '"', "»": '"',
+    "‘": "'", "’": "'", "‚": "'",
+    "–": "-", "—": "-", "…": "...", " ": " ",
+}
+
+_GOTO_RE = re.compile(r"\[%goto:[^%]*%\]")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    # alternanță literal / câmp: ("lit", "text") sau ("field", "company")
+    parts: Tuple[Tuple[str, str], ...]
+
+    def render(self, **values: str) -> str:
+        return "".join(values[v] if kind == "field" else v for kind, v in self.parts)
+
+
+@dataclass(frozen=True)
+class RenderedSms:
+    text: str
+    encoding: str  # gsm7 | ucs2
+    length: int  # septeți GSM-7 sau unități UTF-16
+    segments: int
+    transliterated: bool
+
+
+@lru_cache(maxsize=512)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Parsează template-ul o singură dată. ValueError pentru placeholder necunoscut / acolade nebalansate.
+    """
+    parts = []
+    literal = []
+    i = 0
+    n = len(template)
+    while i < n:
+        ch = template[i]
+        if ch == "{" and i + 1 < n and template[i + 1] == "{":
+            literal.append("{")
+            i += 2
+        elif ch == "}" and i + 1 < n and template[i + 1] == "}":
+            literal.append("}")
+            i += 2
+        elif ch == "{":
+            end = template.find("}", i)
+            if end == -1:
+                raise ValueError("Template invalid: acoladă '{' neînchisă.")
+            name = template[i + 1:end].strip()
+            if name not in TEMPLATE_FIELDS:
+                raise ValueError(f"Template invalid: câmp necunoscut {{{name}}}. Permise: {{company}}, {{review_url}}.")
+            if literal:
+                parts.append(("lit", "".join(literal)))
+                literal = []
+            parts.append(("field", name))
+            i = end + 1
+        elif ch == "}":
+            raise ValueError("Template invalid: acoladă '}' fără pereche (folosește '}}').")
+        else:
+            literal.append(ch)
+            i += 1
+    if literal:
+        parts.append(("lit", "".join(literal)))
+    return CompiledTemplate(parts=tuple(parts))
+
+
+def validate_template(template: str) -> None:
+    compiled = compile_template(template)
+    if ("field", "review_url") not in compiled.parts:
+        raise ValueError("Template invalid: trebuie să conțină {review_url}.")
+
+
+def transliterate(text: str) -> str:
+    """
+    Aduce textul în setul GSM-7: diacritice românești + tipografie, apoi NFKD pentru restul.
+    Caracterele rămase în afara GSM-7 devin '?'.
+    """
+    out = []
+    for ch in text:
+        if ch in _GSM7_BASIC or ch in _GSM7_EXTENDED:
+            out.append(ch)
+            continue
+        mapped = _TRANSLIT.get(ch)
+        if mapped is None:
+            decomposed = unicodedata.normalize("NFKD", ch)
+            mapped = "".join(c for c in decomposed if not unicodedata.combining(c))
+        out.append("".join(c if (c in _GSM7_BASIC or c in _GSM7_EXTENDED) else "?" for c in mapped))
+    return "".join(out)
+
+
+def count_segments(text: str) -> Tuple[str, int, int]:
+    """
+    (encoding, length, segments) pentru textul așa cum îl vede operatorul
+    (cu [%goto:...%] înlocuit de lungimea estimată a linkului scurt).
+    """
+    billed = _GOTO_RE.sub("x" * GOTO_LINK_LENGTH, text)
+
+    if all(ch in _GSM7_BASIC or ch in _GSM7_EXTENDED for ch in billed):
+        septets = sum(2 if ch in _GSM7_EXTENDED else 1 for ch in billed)
+        segments = 1 if septets <= 160 else math.ceil(septets / 153)
+        return "gsm7", septets, segments
+
+    units = len(billed.encode("utf-16-le")) // 2
+    segments = 1 if units <= 70 else math.ceil(units / 67)
+    return "ucs2", units, segments
+
+
+def render_sms(template: str, *, company: str, review_url: str, mode: str = "off", target_segments: int = 0) -> RenderedSms:
+    """
+    Randează template-ul (compilat din cache) și aplică modul de transliterare.
+    """
+    text = compile_template(template).render(company=company, review_url=review_url)
+    encoding, length, segments = count_segments(text)
+
+    translit = mode == "always" or (mode == "auto" and encoding == "ucs2" and segments > max(1, target_segments))
+    if translit and encoding == "ucs2":
+        text = transliterate(text)
+        encoding, length, segments = count_segments(text)
+        return RenderedSms(text=text, encoding=encoding, length=length, segments=segments, transliterated=True)
+
+    return RenderedSms(text=text, encoding=encoding, length=length, segments=segments, transliterated=False)
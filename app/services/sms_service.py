@@ -2,40 +2,68 @@
 # Scop:
 #   - Trimite SMS via SMSAPI.ro.
 #   - Folosește token + sender per user (din DB), cu fallback global din .env dacă există.
+#   - Trimitere bulk: același text către mai mulți destinatari într-un singur apel sms.do
+#     (id-urile per destinatar sunt mapate înapoi pe SmsLog după număr).
 #   - Obține soldul (points) din SMSAPI /profile pentru dashboard.
+#   - URL-ul SMSAPI e configurabil (SMSAPI_BASE_URL) => local / load-test cu scripts/dev/fake_smsapi.py.
+#   - Soldul trece prin cache-ul per token (services/sms/balance_cache.py): TTL scurt + single-flight;
+#     după fiecare trimitere reușită scădem local punctele raportate de sms.do.
+#   - La 429 de la SMSAPI oprim bucket-ul contului în scheduler (vezi services/sms/scheduler.py).
+#   - Fiecare SmsLog incrementează și rollup-ul zilnic (services/sms/daily_stats.py), în același commit.
+#   - SMS-urile reușite intră și în istoricul anti-duplicat (services/sms/send_history.py), tot în același commit.
+#   - Variante async (send_sms_for_order_async, get_sms_balance_for_user_async) pentru rutele `async def`:
+#     apelul SMSAPI trece prin clientul comun services/http_client.py, scrierile refolosesc aceleași
+#     funcții sync prin AsyncSession.run_sync (un singur loc pentru regulile de persistență).
 #
 # GDPR:
 #   - Nu logăm textul complet al mesajului.
 #   - Nu expunem token-ul în răspunsuri sau loguri.
 
 import logging
-from typing import Tuple, Optional
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional, Union
 
 import requests
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..config import settings
 from ..models import SmsLog, Order, User
+from .auth.user_cache import CachedUser
+from .http_client import http_client
+from .request_timing import external_call
+from .sms.balance_cache import sms_balance_cache
+from .sms.daily_stats import record_sms_results
+from .sms.send_history import phone_key, record_sent_reviews
+from .sms.scheduler import sms_scheduler, bucket_key_for
 
 logger = logging.getLogger(__name__)
 
+# Dacă SMSAPI dă 429 fără Retry-After, pauza implicită pentru contul respectiv.
+_DEFAULT_RETRY_AFTER_SECONDS = 2.0
 
-def send_sms_for_order(db: Session, user: User, order: Order, message_text: str) -> Tuple[bool, str]:
+
+def resolve_sms_account(user: User) -> Tuple[str, str]:
+    """
+    Contul SMSAPI efectiv: token + sender din setările userului, cu fallback global din .env.
+    """
     token = user.smsapi_token or settings.smsapi_token
     sender = user.smsapi_sender or settings.smsapi_sender
+    return token or "", sender or ""
 
-    if not token:
-        return False, "Lipsește token-ul SMSAPI în contul tău (Setări SMS)."
-    if not sender:
-        return False, "Lipsește expeditorul SMS (sender) în contul tău (Setări SMS)."
 
-    phone = order.phone_number or order.delivery_phone
-    if not phone:
-        return False, "Comanda nu are număr de telefon."
+def _parse_retry_after(value: Optional[str]) -> float:
+    try:
+        return max(0.0, float(value)) if value else _DEFAULT_RETRY_AFTER_SECONDS
+    except Exception:
+        return _DEFAULT_RETRY_AFTER_SECONDS
 
-    url = "https://api.smsapi.ro/sms.do"
+
+def _sms_payload(token: str, sender: str, recipients: List[str], message_text: str) -> Tuple[str, dict, dict]:
+    url = f"{settings.smsapi_base_url}/sms.do"
     payload = {
-        "to": str(phone),
+        "to": ",".join(str(r) for r in recipients),
         "message": message_text,
         "from": sender,
         "format": "json",
@@ -43,59 +71,261 @@ def send_sms_for_order(db: Session, user: User, order: Order, message_text: str)
     headers = {
         "Authorization": f"Bearer {token}",
     }
+    return url, payload, headers
 
-    success = False
-    msg_id = ""
-    error_msg = ""
 
+def _submit_result(user: Union[User, CachedUser], token: str, sender: str, resp) -> Tuple[Optional[list], str]:
+    """
+    Interpretează răspunsul sms.do (requests.Response sau httpx.Response).
+    """
+    if resp.status_code == 429:
+        retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+        sms_scheduler.penalize(bucket_key_for(token, sender), retry_after)
+        logger.warning("SMSAPI 429 pentru user_id=%s, pauză %.1fs", user.id, retry_after)
+        return None, "SMSAPI: prea multe cereri (429). Reîncearcă în câteva secunde."
     try:
-        resp = requests.post(url, data=payload, headers=headers, timeout=10)
         data = resp.json()
     except Exception as e:
         logger.error("Eroare la apelul SMSAPI: %s", e)
-        error_msg = str(e)
-    else:
-        if data.get("error"):
-            error_msg = data.get("message", "Eroare SMSAPI")
-        else:
-            lst = data.get("list") or []
-            msg_id = lst[0].get("id") if lst else ""
-            success = True
+        return None, str(e)
+    if data.get("error"):
+        return None, data.get("message", "Eroare SMSAPI")
+    return data.get("list") or [], ""
+
+
+def _submit_sms(user: User, token: str, sender: str, recipients: List[str], message_text: str) -> Tuple[Optional[list], str]:
+    """
+    Un apel SMSAPI sms.do (unul sau mai mulți destinatari, separați prin virgulă).
+    Returnează (list, "") la succes sau (None, eroare).
+    """
+    url, payload, headers = _sms_payload(token, sender, recipients, message_text)
+    try:
+        with external_call("smsapi"):
+            resp = requests.post(url, data=payload, headers=headers, timeout=settings.smsapi_timeout_seconds)
+    except Exception as e:
+        logger.error("Eroare la apelul SMSAPI: %s", e)
+        return None, str(e)
+    return _submit_result(user, token, sender, resp)
+
+
+async def _submit_sms_async(
+    user: Union[User, CachedUser], token: str, sender: str, recipients: List[str], message_text: str
+) -> Tuple[Optional[list], str]:
+    """
+    Ca _submit_sms, pe clientul HTTP async comun (nu ține thread cât așteptăm SMSAPI).
+    """
+    url, payload, headers = _sms_payload(token, sender, recipients, message_text)
+    try:
+        with external_call("smsapi"):
+            resp = await http_client.post(url, data=payload, headers=headers, timeout=settings.smsapi_timeout_seconds)
+    except Exception as e:
+        logger.error("Eroare la apelul SMSAPI: %s", e)
+        return None, str(e)
+    return _submit_result(user, token, sender, resp)
+
+
+def _check_sms_account(user: Union[User, CachedUser], order: Order) -> Tuple[str, str, str, str]:
+    """
+    (token, sender, telefon, eroare) — eroare nevidă => nu trimitem.
+    """
+    token, sender = resolve_sms_account(user)
+    if not token:
+        return token, sender, "", "Lipsește token-ul SMSAPI în contul tău (Setări SMS)."
+    if not sender:
+        return token, sender, "", "Lipsește expeditorul SMS (sender) în contul tău (Setări SMS)."
+
+    phone = order.phone_number or order.delivery_phone
+    if not phone:
+        return token, sender, "", "Comanda nu are număr de telefon."
+    return token, sender, str(phone), ""
+
+
+def _record_order_send(db: Session, user_id: int, order: Order, phone: str, lst: Optional[list], error_msg: str) -> str:
+    """
+    SmsLog + rollup zilnic + istoric anti-duplicat pentru o trimitere, un commit. Returnează message_id.
+    """
+    success = lst is not None
+    msg_id = (lst[0].get("id") or "") if lst else ""
+    now = datetime.utcnow()
 
     sms_log = SmsLog(
-        user_id=user.id,
+        user_id=user_id,
         order_id=order.id,
-        phone=str(phone),
+        phone=phone,
         message_id=msg_id,
         status="success" if success else "error",
         error_message=error_msg,
+        created_at=now,
     )
     db.add(sms_log)
+    record_sms_results(db, user_id, [(order.pnk, success, now)])
+    if success:
+        record_sent_reviews(db, user_id, [(phone, order.pnk, now)])
     db.commit()
+    return msg_id
 
-    if success:
+
+def send_sms_for_order(db: Session, user: User, order: Order, message_text: str) -> Tuple[bool, str]:
+    token, sender, phone, error = _check_sms_account(user, order)
+    if error:
+        return False, error
+
+    lst, error_msg = _submit_sms(user, token, sender, [phone], message_text)
+    msg_id = _record_order_send(db, user.id, order, phone, lst, error_msg)
+
+    if lst is not None:
+        sms_balance_cache.apply_spent(token, _sum_points(lst))
         return True, msg_id
     else:
         return False, error_msg or "Eroare la trimiterea SMS-ului."
 
 
-def get_sms_balance_for_user(user: User) -> Tuple[bool, Optional[float], Optional[str]]:
+async def send_sms_for_order_async(
+    db: AsyncSession, user: Union[User, CachedUser], order: Order, message_text: str
+) -> Tuple[bool, str]:
+    """
+    Ca send_sms_for_order, pentru rute async. Apelantul trebuie să fi închis tranzacția înainte
+    (conexiunea nu stă ocupată cât așteptăm SMSAPI); scrierea rezultatului deschide una nouă.
+    """
+    token, sender, phone, error = _check_sms_account(user, order)
+    if error:
+        return False, error
+
+    lst, error_msg = await _submit_sms_async(user, token, sender, [phone], message_text)
+    msg_id = await db.run_sync(_record_order_send, user.id, order, phone, lst, error_msg)
+
+    if lst is not None:
+        sms_balance_cache.apply_spent(token, _sum_points(lst))
+        return True, msg_id
+    else:
+        return False, error_msg or "Eroare la trimiterea SMS-ului."
+
+
+@dataclass(frozen=True)
+class BatchSendResult:
+    order_id: int
+    success: bool
+    info: str  # message_id la succes, mesaj de eroare altfel
+
+
+def send_sms_batch(db: Session, user: User, items: List[Tuple[Order, str]], message_text: str) -> List[BatchSendResult]:
+    """
+    Trimite ACELAȘI text către mai mulți destinatari printr-un singur apel sms.do.
+    items = [(order, phone)], cu telefoane unice (după phone_key) în batch; dublurile nu se trimit
+    (rezultat eșuat, fără SmsLog) — bulk_send le filtrează înainte, ca "skipped".
+    Id-urile per destinatar din răspuns sunt mapate înapoi pe comenzi după număr;
+    un SmsLog per comandă, un singur commit.
+    """
+    token, sender = resolve_sms_account(user)
+    if not token or not sender:
+        error = "Lipsește token-ul sau expeditorul SMSAPI în contul tău (Setări SMS)."
+        return [BatchSendResult(order_id=o.id, success=False, info=error) for o, _ in items]
+
+    # un număr o singură dată în `to=`: răspunsul e mapat pe telefon, dublurile ar primi același message_id
+    first_by_key: Dict[str, int] = {}
+    for idx, (order, phone) in enumerate(items):
+        first_by_key.setdefault(phone_key(phone), idx)
+    duplicates = {idx for idx in range(len(items)) if first_by_key[phone_key(items[idx][1])] != idx}
+    if duplicates:
+        unique = [item for idx, item in enumerate(items) if idx not in duplicates]
+        results = {r.order_id: r for r in send_sms_batch(db, user, unique, message_text)} if unique else {}
+        return [
+            results.get(o.id) or BatchSendResult(order_id=o.id, success=False, info="Telefon duplicat în batch.")
+            for o, _ in items
+        ]
+
+    lst, error_msg = _submit_sms(user, token, sender, [p for _, p in items], message_text)
+
+    by_key: Dict[str, dict] = {}
+    for entry in lst or []:
+        number = entry.get("number") or entry.get("submitted_number") or ""
+        if number:
+            by_key[phone_key(number)] = entry
+
+    now = datetime.utcnow()
+    results: List[BatchSendResult] = []
+    logs: List[SmsLog] = []
+    for idx, (order, phone) in enumerate(items):
+        entry = by_key.get(phone_key(phone))
+        # fallback: răspunsul fără "number" păstrează ordinea destinatarilor
+        if entry is None and lst and not by_key and len(lst) == len(items):
+            entry = lst[idx]
+
+        if lst is None:
+            ok, msg_id, err = False, "", error_msg
+        elif entry is None or not entry.get("id"):
+            ok, msg_id, err = False, "", "Număr respins de SMSAPI."
+        else:
+            ok, msg_id, err = True, str(entry.get("id")), ""
+
+        logs.append(
+            SmsLog(
+                user_id=user.id,
+                order_id=order.id,
+                phone=str(phone),
+                message_id=msg_id,
+                status="success" if ok else "error",
+                error_message=err,
+                created_at=now,
+            )
+        )
+        results.append(BatchSendResult(order_id=order.id, success=ok, info=msg_id if ok else (err or "Eroare la trimiterea SMS-ului.")))
+
+    db.add_all(logs)
+    record_sms_results(db, user.id, [(o.pnk, r.success, now) for (o, _), r in zip(items, results)])
+    record_sent_reviews(db, user.id, [(p, o.pnk, now) for (o, p), r in zip(items, results) if r.success])
+    db.commit()
+
+    if lst:
+        sms_balance_cache.apply_spent(token, _sum_points(lst))
+    return results
+
+
+def _sum_points(items: list) -> float:
+    """
+    Punctele consumate, așa cum le raportează sms.do per mesaj (list[].points).
+    """
+    total = 0.0
+    for item in items:
+        try:
+            total += float(item.get("points") or 0)
+        except Exception:
+            continue
+    return total
+
+
+def get_sms_balance_for_user(user: Union[User, CachedUser]) -> Tuple[bool, Optional[float], Optional[str]]:
     """
     Obține soldul (points) pentru contul SMSAPI al userului.
     - Folosește token-ul userului; dacă nu are, fallback la global (dacă există).
+    - Servit din cache (TTL scurt, single-flight, stale-while-revalidate).
     - Returnează (ok, points, error).
     """
     token = user.smsapi_token or settings.smsapi_token
     if not token:
         return False, None, "Lipsește token-ul SMSAPI (Setări SMS)."
 
-    url = "https://api.smsapi.ro/profile"
-    headers = {
-        "Authorization": f"Bearer {token}",
-    }
+    result, _stale = sms_balance_cache.get(token, _fetch_sms_balance)
+    return result
+
+
+async def get_sms_balance_for_user_async(user: Union[User, CachedUser]) -> Tuple[bool, Optional[float], Optional[str]]:
+    """
+    Ca get_sms_balance_for_user, pentru rute async (același cache, apel upstream pe clientul async).
+    """
+    token = user.smsapi_token or settings.smsapi_token
+    if not token:
+        return False, None, "Lipsește token-ul SMSAPI (Setări SMS)."
 
+    result, _stale = await sms_balance_cache.aget(token, _fetch_sms_balance_async)
+    return result
+
+
+def _profile_result(resp) -> Tuple[bool, Optional[float], Optional[str]]:
+    """
+    Interpretează răspunsul /profile (requests.Response sau httpx.Response).
+    """
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
         data = resp.json()
     except Exception as e:
         logger.error("Eroare la apelul SMSAPI /profile: %s", e)
@@ -112,3 +342,39 @@ def get_sms_balance_for_user(user: User) -> Tuple[bool, Optional[float], Optiona
         points_val = None
 
     return True, points_val, None
+
+
+def _fetch_sms_balance(token: str) -> Tuple[bool, Optional[float], Optional[str]]:
+    """
+    Apelul real SMSAPI /profile (blocant, timeout SMSAPI_TIMEOUT_SECONDS). Folosit DOAR prin cache.
+    """
+    url = f"{settings.smsapi_base_url}/profile"
+    headers = {
+        "Authorization": f"Bearer {token}",
+    }
+
+    try:
+        with external_call("smsapi"):
+            resp = requests.get(url, headers=headers, timeout=settings.smsapi_timeout_seconds)
+    except Exception as e:
+        logger.error("Eroare la apelul SMSAPI /profile: %s", e)
+        return False, None, str(e)
+    return _profile_result(resp)
+
+
+async def _fetch_sms_balance_async(token: str) -> Tuple[bool, Optional[float], Optional[str]]:
+    """
+    Ca _fetch_sms_balance, pe clientul HTTP async comun. Folosit DOAR prin cache (aget).
+    """
+    url = f"{settings.smsapi_base_url}/profile"
+    headers = {
+        "Authorization": f"Bearer {token}",
+    }
+
+    try:
+        with external_call("smsapi"):
+            resp = await http_client.get(url, headers=headers, timeout=settings.smsapi_timeout_seconds)
+    except Exception as e:
+        logger.error("Eroare la apelul SMSAPI /profile: %s", e)
+        return False, None, str(e)
+    return _profile_result(resp)
@@ -0,0 +1,66 @@
+# FILE: app/services/token_bucket.py
+# Scop:
+#   - Token bucket simplu, in-process (rată constantă + burst).
+#   - Folosit ca bloc de bază de scheduler-ul SMS (rată per token/sender SMSAPI)
+#     și de throttle-ul global (middleware/request_throttle.py, per IP / user).
+#
+# Observații:
+#   - NU este thread-safe singur; apelantul ține lock-ul (scheduler-ul are deja unul).
+#   - Timpul vine din time.monotonic() (nu e afectat de schimbări de ceas pe VPS).
+#
+# Debug:
+#   - Dacă pare că nu se mai eliberează token-uri, verifică `paused_until`
+#     (setat la 429 de la provider) și rata configurată (rate > 0).
+
+import time
+
+
+class TokenBucket:
+    def __init__(self, *, rate: float, capacity: float):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def try_take(self, cost: float = 1.0, now: float | None = None) -> bool:
+        """
+        Consumă `cost` token-uri dacă sunt disponibile.
+        Un cost mai mare decât capacitatea e plafonat (altfel cererea n-ar trece niciodată).
+        """
+        now = time.monotonic() if now is None else now
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        cost = min(float(cost), self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def seconds_until(self, cost: float = 1.0, now: float | None = None) -> float:
+        """
+        Cât trebuie așteptat până când `cost` token-uri devin disponibile.
+        """
+        now = time.monotonic() if now is None else now
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        cost = min(float(cost), self.capacity)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def pause(self, seconds: float, now: float | None = None) -> None:
+        """
+        Blochează bucket-ul (ex: provider-ul a răspuns 429) și golește token-urile.
+        """
+        now = time.monotonic() if now is None else now
+        self.paused_until = max(self.paused_until, now + max(0.0, float(seconds)))
+        self.tokens = 0.0
+        self.updated_at = max(self.updated_at, self.paused_until)
@@ -0,0 +1,37 @@
+# FILE: app/services/unit_of_work.py
+# Scop:
+#   - O singură tranzacție (un commit / un fsync) per request pentru fluxurile de auth
+#     (login / refresh / register), în loc de câte un commit pentru fiecare rate-limit, update și audit.
+#
+# Reguli:
+#   - Ieșire normală => commit.
+#   - Ieșire cu HTTPException (401 / 403 / 429 ...) => TOT commit: contoarele de rate-limit, lockout-ul
+#     și audit-ul de eșec trebuie persistate, altfel brute-force-ul n-ar mai fi numărat.
+#   - Orice altă excepție => rollback.
+#   - Autoflush oprit în interior: scrierile pleacă toate la commit (sau la db.flush() explicit).
+#     Pe SQLite, pysqlite deschide tranzacția abia la primul INSERT/UPDATE, deci lock-ul de scriere
+#     NU e ținut în timpul verificării Argon2 — doar cât durează flush + commit la final.
+#
+# Debug:
+#   - Un query din interior nu vede modificările încă neflush-uite din aceeași sesiune (no_autoflush);
+#     dacă ai nevoie de ele (ex. id-ul unui rând nou), apelează db.flush().
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    with db.no_autoflush:
+        try:
+            yield db
+        except HTTPException:
+            db.commit()
+            raise
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Capacitate concurentă pe rutele dominate de I/O extern: POST /api/sms/order/{id} (+ GET /api/settings/sms/balance)
+cu un SMSAPI lent (scripts/dev/fake_smsapi.py --latency-ms), UN worker uvicorn per țintă.
+
+Compară arbori de cod (același DB seed, aceeași sarcină, aceeași limită de memorie = un proces):
+  - --baseline-root : checkout cu rutele sync (requests + threadpool-ul de 40 al Starlette, Session sync
+                      ținută pe durata apelului SMSAPI), ex.:
+                          git worktree add /tmp/smssend-sync <commit-ul dinaintea căii async>
+  - repo-ul curent  : rute async (AsyncSession + services/http_client.py), conexiunea DB eliberată
+                      cât așteptăm providerul.
+
+Pentru fiecare țintă:
+  1) DB SQLite temporară: tenant de bench + --requests comenzi cu telefoane unice;
+  2) uvicorn app.main:app (1 worker) din rădăcina țintei, SMSAPI_BASE_URL spre fake, throttle / rată SMS
+     ridicate (măsurăm capacitatea rutei, nu limitele de protecție);
+  3) --concurrency clienți simultani (httpx async) până se termină comenzile; --balance-share din cereri
+     sunt GET sold (cache dezactivat => fiecare cerere ajunge la /profile, coalescată single-flight);
+  4) RSS / threaduri ale procesului uvicorn eșantionate din /proc (Linux).
+
+Usage (from repo root):
+  git worktree add /tmp/smssend-sync HEAD~1
+  python scripts/bench/async_capacity.py --baseline-root /tmp/smssend-sync
+  python scripts/bench/async_capacity.py --baseline-root /tmp/smssend-sync --latency-ms 500 --concurrency 400 --requests 2000
+
+Output per țintă: cereri/s, latență p50 / p99, status HTTP, RSS max / threaduri max ale workerului.
+
+Debug:
+  - status 0 = timeout / conexiune refuzată la client (workerul nu mai acceptă); 500 pe baseline la
+    concurență mare = QueuePool limit (pool-ul sync e ocupat de requesturi care așteaptă SMSAPI).
+  - "Aplicația nu a pornit" => rulează comanda uvicorn de mai sus manual în rădăcina țintei.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[2]
+
+BENCH_EMAIL = "bench-async@bench.smssend.ro"
+BENCH_PASSWORD = "BenchAsync!2024"
+
+# Seed rulat într-un subproces cu mediul țintei (DATABASE_URL), din rădăcina curentă
+SEED_CODE = """
+import sys
+from datetime import datetime
+sys.path.insert(0, sys.argv[1])
+from app.database import Base, SessionLocal, engine
+from app import models
+from app.security import hash_password
+Base.metadata.create_all(bind=engine)
+db = SessionLocal()
+u = models.User(email=sys.argv[2], email_normalized=sys.argv[2], password_hash=hash_password(sys.argv[3]),
+    first_name="Bench", last_name="Async", street="-", street_no="-", locality="-", county="-",
+    postal_code="-", country="RO", email_verified_at=datetime.utcnow(),
+    smsapi_token="bench-token", smsapi_sender="BENCH", sms_company_name="Bench SRL")
+db.add(u); db.flush()
+db.add(models.ProductLink(user_id=u.id, pnk="BENCH000", review_url="https://example.invalid/review/BENCH000"))
+db.bulk_save_objects([
+    models.Order(user_id=u.id, order_number=f"B-{i}", pnk="BENCH000", phone_number=f"07{i:08d}")
+    for i in range(int(sys.argv[4]))
+])
+db.commit()
+print(",".join(str(r[0]) for r in db.query(models.Order.id).filter(models.Order.user_id == u.id).order_by(models.Order.id)))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _proc_status(pid: int) -> dict:
+    out = {}
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "Threads"):
+                out[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def _target_env(db_path: str, fake_url: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "DEBUG": "true",
+            "SMSAPI_BASE_URL": fake_url,
+            "THROTTLE_ENABLED": "false",
+            "SMS_RATE_PER_SECOND": "100000",
+            "SMS_RATE_BURST": "100000",
+            "SMS_MAX_QUEUE_PER_TENANT": "100000",
+            "SMS_QUEUE_TIMEOUT_SECONDS": "120",
+            "SMS_BALANCE_TTL_SECONDS": "0",
+            "SMS_BALANCE_MAX_STALE_SECONDS": "0",
+            "JANITOR_INTERVAL_SECONDS": "0",
+            "EMAIL_SENDER_ENABLED": "false",
+            "PASSWORD_HASH_WORKERS": "0",
+        }
+    )
+    return env
+
+
+async def _load(base_url: str, token: str, order_ids: list, args: argparse.Namespace, pid: int) -> dict:
+    statuses: collections.Counter = collections.Counter()
+    latencies: list = []
+    peak = {"VmRSS": 0, "Threads": 0}
+    work: "asyncio.Queue" = asyncio.Queue()
+    for oid in order_ids:
+        work.put_nowait(("send", oid))
+        if args.balance_share > 0 and random.random() < args.balance_share:
+            work.put_nowait(("balance", None))
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=args.timeout) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    kind, oid = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    if kind == "send":
+                        resp = await client.post(f"/api/sms/order/{oid}")
+                    else:
+                        resp = await client.get("/api/settings/sms/balance")
+                    status = resp.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append(time.perf_counter() - t0)
+                statuses[f"{kind}:{status}"] += 1
+
+        async def sampler(stop: asyncio.Event) -> None:
+            while not stop.is_set():
+                for key, value in _proc_status(pid).items():
+                    peak[key] = max(peak[key], value)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=0.2)
+                except asyncio.TimeoutError:
+                    pass
+
+        stop = asyncio.Event()
+        sampling = asyncio.create_task(sampler(stop))
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await sampling
+
+    return {"elapsed": elapsed, "statuses": statuses, "latencies": latencies, "peak": peak}
+
+
+def run_target(name: str, root: Path, fake_url: str, args: argparse.Namespace) -> dict:
+    db_path = str(Path(tempfile.mkdtemp(prefix=f"async-bench-{name}-")) / "bench.db")
+    env = _target_env(db_path, fake_url)
+
+    seeded = subprocess.run(
+        [sys.executable, "-c", SEED_CODE, str(ROOT), BENCH_EMAIL, BENCH_PASSWORD, str(args.requests)],
+        env=env,
+        cwd=str(ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    order_ids = [int(x) for x in seeded.stdout.strip().splitlines()[-1].split(",")]
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=str(root),
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/health", timeout=2)
+                break
+            except httpx.HTTPError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise SystemExit(f"[{name}] Aplicația nu a pornit din {root}")
+                time.sleep(0.3)
+
+        resp = httpx.post(f"{base_url}/api/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}, timeout=30)
+        if resp.status_code != 200:
+            raise SystemExit(f"[{name}] Login eșuat: {resp.status_code} {resp.text[:200]}")
+        token = resp.json()["access_token"]
+
+        idle = _proc_status(server.pid)
+        result = asyncio.run(_load(base_url, token, order_ids, args, server.pid))
+        result["idle"] = idle
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Capacitate concurentă: rute sync (baseline) vs async, SMSAPI lent.")
+    ap.add_argument("--baseline-root", default="", help="Checkout cu rutele sync (git worktree). Gol => doar repo-ul curent.")
+    ap.add_argument("--requests", type=int, default=1000, help="Trimiteri SMS (comenzi unice) per țintă.")
+    ap.add_argument("--concurrency", type=int, default=200, help="Clienți simultani.")
+    ap.add_argument("--balance-share", type=float, default=0.2, help="Fracțiune suplimentară de GET sold.")
+    ap.add_argument("--latency-ms", type=float, default=300.0, help="Latența fake SMSAPI.")
+    ap.add_argument("--timeout", type=float, default=60.0, help="Timeout client per cerere (secunde).")
+    args = ap.parse_args()
+
+    fake_port = _free_port()
+    fake = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "scripts" / "dev" / "fake_smsapi.py"),
+            "--port",
+            str(fake_port),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            "0",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    fake_url = f"http://127.0.0.1:{fake_port}"
+
+    targets = []
+    if args.baseline_root:
+        targets.append(("sync", Path(args.baseline_root).resolve()))
+    targets.append(("async", ROOT))
+
+    try:
+        time.sleep(1.0)
+        for name, root in targets:
+            r = run_target(name, root, fake_url, args)
+            lat, el = r["latencies"], r["elapsed"]
+            ok = sum(v for k, v in r["statuses"].items() if k.endswith(":200"))
+            print(f"[{name}] {root}  ({args.concurrency} clienți, SMSAPI {args.latency_ms:.0f} ms)")
+            print(f"  durată        {el:.1f}s, {len(lat) / el:.1f} cereri/s, {ok / el:.1f} ok/s")
+            print(
+                f"  latență       p50 {_pct(lat, 0.50) * 1000:.0f} ms, p99 {_pct(lat, 0.99) * 1000:.0f} ms, "
+                f"max {max(lat, default=0) * 1000:.0f} ms"
+            )
+            print(f"  status        {dict(sorted(r['statuses'].items()))}")
+            print(
+                f"  worker        RSS idle {r['idle'].get('VmRSS', 0) / 1024:.0f} MiB -> max {r['peak']['VmRSS'] / 1024:.0f} MiB, "
+                f"threaduri max {r['peak']['Threads']}"
+            )
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: costul verificării JWT per request autentificat (security.decode_token).
+
+Variante măsurate (același token, același secret / iss / aud):
+  - jose   fără cache   (comportamentul vechi: HMAC + claim checks la fiecare request)
+  - jose   cu cache     (digest sha256 + lookup LRU)
+  - pyjwt  fără / cu cache, dacă PyJWT e instalat (JWT_BACKEND=pyjwt)
+
+Usage (from repo root):
+  python scripts/bench/jwt_decode.py
+  python scripts/bench/jwt_decode.py --iterations 50000 --tokens 1000
+
+--tokens > 1 rotește mai multe token-uri (mai mulți useri activi); cu --tokens > JWT_CACHE_MAX_ENTRIES
+se vede costul evicțiilor.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+
+def _bench(security, tokens: list, iterations: int) -> float:
+    """
+    Microsecunde per decode_token, după un warmup care umple cache-ul (dacă e activ).
+    """
+    for tok in tokens:
+        assert security.decode_token(tok) is not None
+    n = len(tokens)
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        security.decode_token(tokens[i % n])
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def run(backend: str, cache_entries: int, tokens_n: int, iterations: int) -> float:
+    os.environ["JWT_BACKEND"] = backend
+    os.environ["JWT_CACHE_MAX_ENTRIES"] = str(cache_entries)
+    import app.config
+    import app.security
+
+    importlib.reload(app.config)
+    security = importlib.reload(app.security)
+    tokens = [security.create_access_token({"sub": str(i + 1)}) for i in range(tokens_n)]
+    return _bench(security, tokens, iterations)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Cost decode_token: jose / pyjwt, cu și fără cache.")
+    ap.add_argument("--iterations", type=int, default=20000)
+    ap.add_argument("--tokens", type=int, default=100, help="Token-uri distincte rotite (useri activi).")
+    ap.add_argument("--cache-entries", type=int, default=10000, help="JWT_CACHE_MAX_ENTRIES pentru variantele cu cache.")
+    args = ap.parse_args()
+
+    os.environ.setdefault("DEBUG", "true")
+    os.environ.setdefault("JWT_SECRET", "bench-jwt-secret-" + "x" * 32)
+
+    backends = ["jose"]
+    try:
+        import jwt  # noqa: F401 - PyJWT
+
+        backends.append("pyjwt")
+    except ImportError:
+        print("PyJWT nu e instalat: doar jose (pip install PyJWT pentru comparație).")
+
+    print(f"iterații {args.iterations}, token-uri distincte {args.tokens}")
+    baseline = None
+    for backend in backends:
+        for cache_entries in (0, args.cache_entries):
+            us = run(backend, cache_entries, args.tokens, args.iterations)
+            baseline = baseline or us
+            label = f"{backend:<6} {'cache' if cache_entries else 'fără cache':<10}"
+            print(f"  {label} {us:8.2f} µs/request   ({baseline / us:5.1f}x față de jose fără cache)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark login: logins/sec, latență și commit-uri per login, rulând login_user() in-process pe threaduri
+(fără HTTP), contra unei DB SQLite temporare (sau --database-url).
+
+Compară înainte / după pe același host:
+  git worktree add /tmp/login-before <commit-vechi>
+  python scripts/bench/login_throughput.py --app-root /tmp/login-before --threads 8 --logins 400
+  python scripts/bench/login_throughput.py --threads 8 --logins 400
+  git worktree remove /tmp/login-before
+
+Ce măsoară:
+- logins/s (doar succes), latență p50 / p90 / p99, commit-uri per login (event "commit" pe engine:
+  include și tranzacția proprie a rate limit-ului), erori (ex. "database is locked" pe SQLite).
+- implicit Argon2 minim (t=1, m=1 MiB), ca testul să măsoare calea DB, nu hashing-ul;
+  --real-argon2 păstrează parametrii din config.
+
+Observații:
+- Limitele de rate-limit / lockout sunt ridicate prin env (testul nu le exercită).
+- Fiecare thread are IP propriu; userii se rotesc pe toate thread-urile (același email în paralel e OK:
+  rate limit-ul e un UPSERT atomic).
+- RATE_LIMIT_BACKEND=memory => rate limit fără scrieri în DB (un commit per login).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def _pct(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark login_user (logins/s, commit-uri per login).")
+    ap.add_argument("--app-root", default=str(Path(__file__).resolve().parents[2]), help="Root-ul repo-ului testat.")
+    ap.add_argument("--database-url", default="", help="Implicit: SQLite temporar.")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--logins", type=int, default=400, help="Total login-uri (împărțite pe threaduri).")
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--real-argon2", action="store_true", help="Parametrii Argon2 din config (implicit: minimi).")
+    args = ap.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="login-bench-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench.db"
+    os.environ.setdefault("DEBUG", "true")
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"  # inline: măsurăm calea DB, nu pool-ul de procese
+    for key in ("LOGIN_MAX_ATTEMPTS_IP", "LOGIN_MAX_ATTEMPTS_EMAIL", "LOCKOUT_FAIL_THRESHOLD"):
+        os.environ[key] = "1000000"
+
+    sys.path.insert(0, str(Path(args.app_root).resolve()))
+
+    from passlib.context import CryptContext
+    from sqlalchemy import event
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    import app.security as security
+    from app.database import Base, SessionLocal, engine
+    from app.models import User
+    from app.schemas import LoginIn
+    from app.services.auth.login_user import login_user
+
+    if not args.real_argon2:
+        security.pwd_context = CryptContext(
+            schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1
+        )
+
+    Base.metadata.create_all(bind=engine)
+    password = "Bench-Login-Parola-1"
+    db = SessionLocal()
+    try:
+        password_hash = security.hash_password(password)
+        now = datetime.utcnow()
+        emails = [f"bench-login-{i}@bench.smssend.ro" for i in range(args.users)]
+        existing = {e for (e,) in db.query(User.email_normalized).filter(User.email_normalized.in_(emails)).all()}
+        for email in emails:
+            if email in existing:
+                continue
+            db.add(
+                User(
+                    email=email,
+                    email_normalized=email,
+                    password_hash=password_hash,
+                    first_name="Bench",
+                    last_name="Login",
+                    street="-",
+                    street_no="-",
+                    locality="-",
+                    county="-",
+                    postal_code="-",
+                    country="RO",
+                    email_verified_at=now,
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    commits = [0]
+    lock = threading.Lock()
+
+    def _count_commit(conn) -> None:
+        with lock:
+            commits[0] += 1
+
+    event.listen(engine, "commit", _count_commit)
+    commits[0] = 0
+
+    n_threads = max(1, args.threads)
+    per_thread = max(1, args.logins // n_threads)
+    latencies: list = []
+    errors: dict = {}
+
+    def worker(idx: int) -> None:
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/auth/login",
+            "headers": [(b"user-agent", b"login-bench")],
+            "client": (f"10.0.{idx // 250}.{idx % 250 + 1}", 40000),
+        }
+        for n in range(per_thread):
+            email = emails[(idx + n * n_threads) % len(emails)]
+            s = SessionLocal()
+            t0 = time.perf_counter()
+            try:
+                login_user(s, data=LoginIn(email=email, password=password), request=Request(scope), response=Response())
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as exc:  # noqa: BLE001 - raportăm orice eroare
+                key = f"{type(exc).__name__}: {str(getattr(exc, 'detail', exc))[:80]}"
+                with lock:
+                    errors[key] = errors.get(key, 0) + 1
+            finally:
+                s.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    ok = len(latencies)
+    print(f"app-root:       {args.app_root}")
+    print(f"DB:             {os.environ['DATABASE_URL']}")
+    print(f"argon2:         {'config' if args.real_argon2 else 'minim (t=1, m=1 MiB)'}")
+    print(f"rate limit:     {os.environ.get('RATE_LIMIT_BACKEND', 'db')}")
+    print(f"login-uri:      {ok} reușite / {per_thread * len(threads)} în {elapsed:.2f}s (threaduri {len(threads)})")
+    print(f"throughput:     {ok / elapsed:.1f} logins/s")
+    if latencies:
+        print(
+            f"latență:        p50 {_pct(latencies, 0.5) * 1000:.1f} ms, p90 {_pct(latencies, 0.9) * 1000:.1f} ms, "
+            f"p99 {_pct(latencies, 0.99) * 1000:.1f} ms, medie {statistics.mean(latencies) * 1000:.1f} ms"
+        )
+    print(f"commit-uri:     {commits[0]} total, {commits[0] / max(1, ok + sum(errors.values())):.2f} per login")
+    if errors:
+        print(f"erori:          {errors}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
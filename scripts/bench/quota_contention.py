@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark de contenție pentru cota lunară SMS (services/billing/quota_reserve.py).
+
+Ce face:
+- N procese (ca N workeri uvicorn) fac în buclă reserve(1) -> commit(used=1) pe ACELAȘI tenant,
+  contra bazei din DATABASE_URL (SQLite sau PostgreSQL).
+- Limita e mai mică decât numărul total de încercări => verificăm că nu se depășește niciodată:
+  la final used == limita și reserved == 0.
+
+Usage (from repo root):
+  python scripts/bench/quota_contention.py --workers 8 --attempts 200 --limit 1000
+  DATABASE_URL=postgresql+psycopg2://... python scripts/bench/quota_contention.py --workers 16
+
+Output:
+- rezervări reușite/sec, refuzuri 402, erori DB, latență p50/p99 a unui reserve+commit,
+  și verificarea invariantului (OK / FAIL).
+
+Debug:
+  - "database is locked" pe SQLite => SQLITE_BUSY_TIMEOUT_MS prea mic pentru numărul de workeri.
+  - Pe o mașină cu puține nuclee, N workeri + N procese Postgres se bat pe CPU: rezultatul măsoară CPU-ul,
+    nu contenția pe rândul contorului (compară cu 1 worker înainte de a trage concluzii).
+  - Folosește un user dedicat (bench-quota@example.invalid); contorul lui e resetat la fiecare rulare.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+BENCH_EMAIL = "bench-quota@example.invalid"
+
+
+def _setup() -> int:
+    from sqlalchemy import delete
+
+    from app.database import Base, SessionLocal, engine
+    from app.models import SmsQuotaCounter, SmsQuotaReservation, User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email_normalized == BENCH_EMAIL).first()
+        if not user:
+            user = User(
+                email=BENCH_EMAIL,
+                email_normalized=BENCH_EMAIL,
+                password_hash="!",
+                first_name="Bench",
+                last_name="Quota",
+                street="-",
+                street_no="-",
+                locality="-",
+                county="-",
+                postal_code="-",
+                country="RO",
+                is_active=False,
+            )
+            db.add(user)
+            db.commit()
+        db.execute(delete(SmsQuotaReservation).where(SmsQuotaReservation.user_id == user.id))
+        db.execute(delete(SmsQuotaCounter).where(SmsQuotaCounter.user_id == user.id))
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _worker(user_id: int, attempts: int, limit: int, start_at: float, out: "mp.Queue") -> None:
+    from fastapi import HTTPException
+
+    from app.database import SessionLocal
+    from app.services.billing.quota_reserve import commit_sms_quota, reserve_sms_quota
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+
+    ok = rejected = errors = 0
+    latencies = []
+    db = SessionLocal()
+    try:
+        for _ in range(attempts):
+            t0 = time.perf_counter()
+            try:
+                reservation = reserve_sms_quota(db, user_id, 1, limit=limit)
+                commit_sms_quota(db, reservation, used=1)
+                ok += 1
+            except HTTPException:
+                rejected += 1
+            except Exception:
+                db.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        db.close()
+    out.put((ok, rejected, errors, latencies))
+
+
+def _pct(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Contenție reserve/commit pe cota lunară SMS.")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--attempts", type=int, default=200, help="Încercări per worker.")
+    ap.add_argument("--limit", type=int, default=1000, help="Limita lunară folosită în benchmark.")
+    args = ap.parse_args()
+
+    user_id = _setup()
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    start_at = time.time() + 2.0  # toți workerii pornesc simultan, după import
+    procs = [
+        ctx.Process(target=_worker, args=(user_id, args.attempts, args.limit, start_at, out))
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.time() - start_at
+
+    ok = sum(r[0] for r in results)
+    rejected = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    latencies = [x for r in results for x in r[3]]
+
+    from app.database import SessionLocal, engine
+    from app.services.billing.quota_reserve import get_sms_quota_usage
+
+    db = SessionLocal()
+    try:
+        usage = get_sms_quota_usage(db, user_id, limit=args.limit)
+    finally:
+        db.close()
+
+    expected = min(args.limit, ok + rejected + errors)
+    invariant = usage.used == ok and usage.used <= args.limit and usage.reserved == 0
+
+    print(f"dialect:        {engine.dialect.name}")
+    print(f"workers:        {args.workers} x {args.attempts} încercări, limită {args.limit}")
+    print(f"reușite:        {ok}  ({ok / elapsed:.0f}/s)")
+    print(f"refuzate (402): {rejected}")
+    print(f"erori DB:       {errors}")
+    print(f"latență:        p50 {_pct(latencies, 0.50) * 1000:.1f} ms, p99 {_pct(latencies, 0.99) * 1000:.1f} ms")
+    print(f"contor:         used={usage.used} reserved={usage.reserved} (așteptat used={expected} fără erori)")
+    print("invariant:      " + ("OK" if invariant else "FAIL"))
+    return 0 if invariant else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Load-test pe calea de trimitere SMS: POST /api/sms/order/{id} sau POST /api/sms/bulk,
+contra aplicației pornite cu SMSAPI_BASE_URL spre fake-ul local (scripts/dev/fake_smsapi.py).
+
+Pași (from repo root, același DATABASE_URL ca aplicația):
+  1) python scripts/dev/fake_smsapi.py --port 8025 --latency-ms 120 --rate-limit 50
+  2) SMSAPI_BASE_URL=http://127.0.0.1:8025 uvicorn app.main:app --workers 2 --port 8000
+  3) python scripts/bench/sms_send_load.py --seed 2000 --concurrency 16
+     python scripts/bench/sms_send_load.py --seed 2000 --mode bulk --bulk-size 50 --concurrency 4
+
+Ce raportează:
+- throughput (cereri/s și SMS/s), latență p50 / p90 / p99 / max, histogramă status HTTP;
+- saturare: cereri în zbor (client) + coada scheduler-ului SMS (GET /api/sms/queue, eșantionat):
+  adâncime medie / maximă, % eșantioane cu coada plină, 429 (coadă plină) / 503 (timeout în coadă);
+- opțional contoarele fake-ului (--fake-url): cereri, mesaje, 429 primite de la „SMSAPI”.
+
+Observații:
+- --seed creează (sau refolosește) tenantul de bench cu N comenzi noi, telefoane unice
+  (anti-duplicatul telefon + PNK nu blochează testul). Fiecare comandă se trimite o singură dată.
+- /api/sms/queue arată coada workerului care răspunde la eșantionare; cu mai mulți workeri uvicorn
+  e un eșantion, nu suma.
+
+Debug:
+  - 401 la login: parola din --password diferă de cea a tenantului deja creat (șterge-l sau schimb-o).
+  - Toate cererile 400 "Lipsește token-ul SMSAPI": tenantul nu are token; --seed îl setează.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import queue
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+BENCH_EMAIL = "bench-sms@bench.smssend.ro"
+BENCH_PASSWORD = "BenchSms!2024"
+
+
+def seed(count: int, pnks: int, password: str) -> None:
+    from app.database import Base, SessionLocal, engine
+    from app.models import Order, ProductLink, User
+    from app.security import current_password_scheme, hash_password
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email_normalized == BENCH_EMAIL).first()
+        if not user:
+            user = User(
+                email=BENCH_EMAIL,
+                email_normalized=BENCH_EMAIL,
+                password_hash=hash_password(password),
+                password_scheme=current_password_scheme(),
+                first_name="Bench",
+                last_name="Sms",
+                street="-",
+                street_no="-",
+                locality="-",
+                county="-",
+                postal_code="-",
+                country="RO",
+                email_verified_at=datetime.utcnow(),
+            )
+            db.add(user)
+            db.flush()
+        user.smsapi_token = user.smsapi_token or "bench-token"
+        user.smsapi_sender = user.smsapi_sender or "BENCH"
+        user.sms_company_name = user.sms_company_name or "Bench SRL"
+
+        existing = {link.pnk for link in db.query(ProductLink).filter(ProductLink.user_id == user.id).all()}
+        for i in range(pnks):
+            pnk = f"BENCH{i:03d}"
+            if pnk not in existing:
+                db.add(ProductLink(user_id=user.id, pnk=pnk, review_url=f"https://example.invalid/review/{pnk}"))
+
+        # telefoane unice: pornim după numărul de comenzi existente ale tenantului
+        start = db.query(Order).filter(Order.user_id == user.id).count()
+        db.bulk_save_objects(
+            [
+                Order(
+                    user_id=user.id,
+                    order_number=f"BENCH-{start + i}",
+                    pnk=f"BENCH{(start + i) % pnks:03d}",
+                    phone_number=f"07{(start + i) % 100000000:08d}",
+                    customer_name="Bench",
+                )
+                for i in range(count)
+            ]
+        )
+        db.commit()
+        print(f"[seed] tenant {BENCH_EMAIL} (id={user.id}): +{count} comenzi, {pnks} PNK-uri")
+    finally:
+        db.close()
+
+
+def pending_order_ids() -> list:
+    """
+    Comenzile tenantului de bench fără SmsLog (încă netrimise).
+    """
+    from app.database import SessionLocal
+    from app.models import Order, SmsLog, User
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email_normalized == BENCH_EMAIL).first()
+        if not user:
+            return []
+        sent = db.query(SmsLog.order_id).filter(SmsLog.user_id == user.id)
+        rows = (
+            db.query(Order.id)
+            .filter(Order.user_id == user.id, ~Order.id.in_(sent))
+            .order_by(Order.id)
+            .all()
+        )
+        return [r[0] for r in rows]
+    finally:
+        db.close()
+
+
+def login(base_url: str, password: str, wait_seconds: float = 15.0) -> str:
+    # așteptăm aplicația să pornească (workerii uvicorn) înainte de login
+    deadline = time.time() + wait_seconds
+    while True:
+        try:
+            resp = requests.post(f"{base_url}/api/auth/login", json={"email": BENCH_EMAIL, "password": password}, timeout=30)
+            break
+        except requests.ConnectionError:
+            if time.time() > deadline:
+                raise SystemExit(f"Aplicația nu răspunde la {base_url}")
+            time.sleep(0.5)
+    if resp.status_code != 200:
+        raise SystemExit(f"Login eșuat: {resp.status_code} {resp.text[:200]}")
+    return resp.json()["access_token"]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = collections.Counter()
+        self.sms_ok = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def start(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def done(self, status: int, latency: float, sms_ok: int) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append(latency)
+            self.statuses[status] += 1
+            self.sms_ok += sms_ok
+
+
+def worker(base_url: str, token: str, mode: str, work: "queue.Queue", rec: Recorder) -> None:
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    while True:
+        try:
+            item = work.get_nowait()
+        except queue.Empty:
+            return
+        rec.start()
+        t0 = time.perf_counter()
+        sms_ok = 0
+        try:
+            if mode == "bulk":
+                resp = session.post(f"{base_url}/api/sms/bulk", json={"order_ids": item}, timeout=120)
+                if resp.status_code == 200:
+                    sms_ok = resp.json().get("sent", 0)
+            else:
+                resp = session.post(f"{base_url}/api/sms/order/{item}", timeout=120)
+                sms_ok = 1 if resp.status_code == 200 else 0
+            status = resp.status_code
+        except requests.RequestException:
+            status = 0
+        rec.done(status, time.perf_counter() - t0, sms_ok)
+
+
+def sampler(base_url: str, token: str, stop: threading.Event, samples: list, interval: float) -> None:
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    while not stop.is_set():
+        try:
+            resp = session.get(f"{base_url}/api/sms/queue", timeout=5)
+            if resp.status_code == 200:
+                samples.append(resp.json())
+        except requests.RequestException:
+            pass
+        stop.wait(interval)
+
+
+def _pct(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Load-test trimitere SMS (single / bulk) contra fake SMSAPI.")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--password", default=BENCH_PASSWORD)
+    ap.add_argument("--seed", type=int, default=0, help="Creează N comenzi noi pentru tenantul de bench.")
+    ap.add_argument("--pnks", type=int, default=10, help="Câte PNK-uri distincte la seed.")
+    ap.add_argument("--mode", choices=["single", "bulk"], default="single")
+    ap.add_argument("--bulk-size", type=int, default=50)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--limit", type=int, default=0, help="Maxim N comenzi trimise (0 = toate cele netrimise).")
+    ap.add_argument("--sample-interval", type=float, default=0.25)
+    ap.add_argument("--fake-url", default="", help="Ex: http://127.0.0.1:8025 => afișează /stats de la fake.")
+    args = ap.parse_args()
+
+    if args.seed:
+        seed(args.seed, max(1, args.pnks), args.password)
+
+    ids = pending_order_ids()
+    if args.limit:
+        ids = ids[: args.limit]
+    if not ids:
+        print("Nicio comandă netrimisă pentru tenantul de bench (folosește --seed N).")
+        return 1
+
+    from app.config import settings
+
+    token = login(args.base_url.rstrip("/"), args.password)
+    base_url = args.base_url.rstrip("/")
+
+    work: "queue.Queue" = queue.Queue()
+    if args.mode == "bulk":
+        for i in range(0, len(ids), args.bulk_size):
+            work.put(ids[i:i + args.bulk_size])
+    else:
+        for oid in ids:
+            work.put(oid)
+
+    rec = Recorder()
+    samples: list = []
+    stop = threading.Event()
+    sampler_thread = threading.Thread(target=sampler, args=(base_url, token, stop, samples, args.sample_interval), daemon=True)
+    threads = [
+        threading.Thread(target=worker, args=(base_url, token, args.mode, work, rec), daemon=True)
+        for _ in range(max(1, args.concurrency))
+    ]
+
+    t0 = time.perf_counter()
+    sampler_thread.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    sampler_thread.join()
+
+    lat = rec.latencies
+    depths = [s.get("queue_depth", 0) for s in samples]
+    full = sum(1 for d in depths if d >= settings.sms_max_queue_per_tenant)
+    last = samples[-1] if samples else {}
+
+    print(f"mod:            {args.mode} (concurență {args.concurrency}, {len(ids)} comenzi)")
+    print(f"durată:         {elapsed:.2f}s")
+    print(f"throughput:     {len(lat) / elapsed:.1f} cereri/s, {rec.sms_ok / elapsed:.1f} SMS/s ({rec.sms_ok} reușite)")
+    print(
+        f"latență:        p50 {_pct(lat, 0.50) * 1000:.0f} ms, p90 {_pct(lat, 0.90) * 1000:.0f} ms, "
+        f"p99 {_pct(lat, 0.99) * 1000:.0f} ms, max {max(lat) * 1000:.0f} ms"
+    )
+    print(f"status HTTP:    {dict(sorted(rec.statuses.items()))}")
+    print(f"în zbor:        max {rec.max_in_flight} cereri simultane (client)")
+    if depths:
+        print(
+            f"coadă SMS:      medie {statistics.mean(depths):.1f}, max {max(depths)}, "
+            f"plină {100.0 * full / len(depths):.0f}% din {len(depths)} eșantioane"
+        )
+        print(
+            f"scheduler:      granted={last.get('granted')} rejected(429)={last.get('rejected')} "
+            f"timed_out(503)={last.get('timed_out')} avg_wait={last.get('avg_wait_seconds')}s "
+            f"max_wait={last.get('max_wait_seconds')}s"
+        )
+    if args.fake_url:
+        try:
+            print(f"fake SMSAPI:    {requests.get(args.fake_url.rstrip('/') + '/stats', timeout=5).json()}")
+        except requests.RequestException as exc:
+            print(f"fake SMSAPI:    /stats indisponibil ({exc})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
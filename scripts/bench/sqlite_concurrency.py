@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurență SQLite: citiri de dashboard în timp ce rulează importuri, audit batch și
+scrieri scurte din request-uri — profilul vechi (rollback journal) vs profilul de producție (app/database.py).
+
+Moduri (fiecare într-un proces separat, cu DB temporară proprie):
+  - legacy : journal_mode=DELETE, synchronous=FULL, fără busy_timeout / cache / mmap, fără calea de scriere separată
+             (comportamentul de dinainte: doar timeout-ul implicit de 5s al driverului).
+  - wal    : profilul implicit (SQLITE_WAL, SQLITE_SYNCHRONOUS=NORMAL, busy_timeout, cache, mmap,
+             SQLITE_WRITE_SPLIT => import + audit pe write_engine).
+
+Sarcina (un proces per rol, ca workerii uvicorn; fără GIL comun între ei):
+  - --readers procese x --reader-threads : count + pagină de comenzi + sms_daily_stats
+                 (ca GET /api/orders și /api/sms/stats);
+  - 1 proces writer, două threaduri (ca un worker cu import în curs + audit_writer):
+      importer : DELETE + --import-rows INSERT-uri de comenzi într-o tranzacție (ca POST /api/orders/import),
+                 apoi --import-pause-ms pauză;
+      audit    : INSERT batch de 200 rânduri în audit_logs (ca services/audit_writer.py);
+  - --request-writers procese : UPSERT rate-limit (ca login / register), pe engine-ul principal.
+
+Usage (from repo root):
+  python scripts/bench/sqlite_concurrency.py
+  python scripts/bench/sqlite_concurrency.py --seconds 20 --readers 8 --import-rows 5000
+
+Output per mod: citiri/s, latență p50 / p99 / max, erori ("database is locked"), scrieri per tip și erorile lor.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+MODES = {
+    "legacy": {
+        "SQLITE_WAL": "false",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "0",
+        "SQLITE_CACHE_SIZE_MB": "0",
+        "SQLITE_MMAP_SIZE_MB": "0",
+        "SQLITE_WRITE_SPLIT": "false",
+    },
+    "wal": {},  # valorile implicite din config
+}
+
+
+def _pct(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _seed(import_rows: int) -> int:
+    from datetime import date, timedelta
+
+    from app.database import Base, SessionLocal, engine
+    from app.models import Order, SmsDailyStat, User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(
+            email="bench-sqlite@example.invalid",
+            email_normalized="bench-sqlite@example.invalid",
+            password_hash="!",
+            first_name="Bench",
+            last_name="Sqlite",
+            street="-",
+            street_no="-",
+            locality="-",
+            county="-",
+            postal_code="-",
+            country="RO",
+        )
+        db.add(user)
+        db.flush()
+        db.add_all(
+            Order(user_id=user.id, order_number=str(i), pnk=f"PNK{i % 20}", phone_number=f"07{i:08d}")
+            for i in range(import_rows)
+        )
+        today = date.today()
+        db.add_all(
+            SmsDailyStat(user_id=user.id, day=today - timedelta(days=d), pnk=f"PNK{p}", success_count=3, error_count=1)
+            for d in range(30)
+            for p in range(5)
+        )
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _mode_env(mode: str, db_path: str) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("DEBUG", "true")
+    os.environ["AUDIT_ASYNC"] = "false"
+    os.environ["RATE_LIMIT_BACKEND"] = "db"
+    os.environ["JANITOR_INTERVAL_SECONDS"] = "0"
+    os.environ.update(MODES[mode])
+
+
+def _setup(mode: str, db_path: str, import_rows: int, out: "mp.Queue") -> None:
+    _mode_env(mode, db_path)
+    user_id = _seed(import_rows)
+
+    from app.database import engine
+
+    with engine.connect() as conn:
+        out.put((user_id, conn.exec_driver_sql("PRAGMA journal_mode").scalar()))
+
+
+def _role(role: str, mode: str, db_path: str, user_id: int, args: argparse.Namespace, start_at: float, out: "mp.Queue") -> None:
+    """
+    Un proces = un worker: "reader" (--reader-threads), "writer" (importer + audit, ca un worker uvicorn
+    cu audit_writer) sau "request" (UPSERT-uri rate-limit).
+    """
+    _mode_env(mode, db_path)
+
+    from datetime import datetime
+
+    from sqlalchemy import func, insert
+
+    from app.database import SessionLocal, WriteSessionLocal, write_engine
+    from app.models import AuditLog, Order, SmsDailyStat
+    from app.services.rate_limit import RateLimitRule, rate_limiter
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies: list = []
+    ok = {"read": 0, "import": 0, "audit": 0, "request": 0}
+    errors = {"read": 0, "import": 0, "audit": 0, "request": 0}
+    last_error: dict = {}
+
+    def timed(kind: str, fn) -> None:
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            with lock:
+                errors[kind] += 1
+                last_error[kind] = str(e).splitlines()[0][:120]
+            return
+        with lock:
+            ok[kind] += 1
+            if kind == "read":
+                latencies.append(time.perf_counter() - t0)
+
+    def read_once() -> None:
+        db = SessionLocal()
+        try:
+            q = db.query(Order).filter(Order.user_id == user_id)
+            q.count()
+            q.order_by(Order.id.desc()).limit(50).all()
+            db.query(SmsDailyStat.pnk, func.sum(SmsDailyStat.success_count)).filter(
+                SmsDailyStat.user_id == user_id
+            ).group_by(SmsDailyStat.pnk).all()
+        finally:
+            db.close()
+
+    def import_once() -> None:
+        db = WriteSessionLocal()
+        try:
+            db.query(Order).filter(Order.user_id == user_id).delete()
+            db.add_all(
+                Order(user_id=user_id, order_number=str(i), pnk=f"PNK{i % 20}", phone_number=f"07{i:08d}")
+                for i in range(args.import_rows)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    audit_stmt = insert(AuditLog.__table__)
+
+    def audit_once() -> None:
+        rows = [
+            {"user_id": user_id, "action": "BENCH", "details": "x" * 200, "created_at": datetime.utcnow()}
+            for _ in range(200)
+        ]
+        with write_engine.begin() as conn:
+            conn.execute(audit_stmt, rows)
+
+    def request_once() -> None:
+        db = SessionLocal()
+        try:
+            key = f"bench:{os.getpid()}:{random.randint(1, 500)}"
+            rate_limiter.check(db, [RateLimitRule(key=key, max_count=10**9, window_seconds=60, block_seconds=0)])
+        finally:
+            db.close()
+
+    def loop(kind: str, fn, pause: float) -> None:
+        while not stop.is_set():
+            timed(kind, fn)
+            if pause:
+                stop.wait(pause)
+
+    if role == "reader":
+        threads = [threading.Thread(target=loop, args=("read", read_once, 0)) for _ in range(args.reader_threads)]
+    elif role == "writer":
+        threads = [
+            threading.Thread(target=loop, args=("import", import_once, args.import_pause_ms / 1000.0)),
+            threading.Thread(target=loop, args=("audit", audit_once, 0.05)),
+        ]
+    else:
+        threads = [threading.Thread(target=loop, args=("request", request_once, 0.005))]
+
+    time.sleep(max(0.0, start_at - time.time()))
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout=60)
+    out.put({"ok": ok, "errors": errors, "latencies": latencies, "last_error": last_error})
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Citiri vs scrieri bulk pe SQLite: rollback journal vs WAL + un writer.")
+    ap.add_argument("--modes", default="legacy,wal")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--readers", type=int, default=4, help="Procese cititor (workeri).")
+    ap.add_argument("--reader-threads", type=int, default=2, help="Threaduri per proces cititor.")
+    ap.add_argument("--request-writers", type=int, default=2)
+    ap.add_argument("--import-rows", type=int, default=2000)
+    ap.add_argument("--import-pause-ms", type=float, default=500.0, help="Pauză între importuri (0 = importuri continue).")
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            print(f"Mod necunoscut: {mode} (disponibile: {', '.join(MODES)})")
+            return 2
+        db_path = str(Path(tempfile.mkdtemp(prefix=f"sqlite-bench-{mode}-")) / "bench.db")
+
+        out = ctx.Queue()
+        setup = ctx.Process(target=_setup, args=(mode, db_path, args.import_rows, out))
+        setup.start()
+        user_id, journal = out.get()
+        setup.join()
+
+        roles = ["reader"] * args.readers + ["writer"] + ["request"] * args.request_writers
+        start_at = time.time() + 3.0  # toate procesele pornesc simultan, după import
+        procs = [ctx.Process(target=_role, args=(role, mode, db_path, user_id, args, start_at, out)) for role in roles]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        ok = {k: sum(r["ok"][k] for r in results) for k in results[0]["ok"]}
+        errors = {k: sum(r["errors"][k] for r in results) for k in results[0]["errors"]}
+        latencies = [x for r in results for x in r["latencies"]]
+        last_error = {k: v for r in results for k, v in r["last_error"].items()}
+
+        el = args.seconds
+        print(
+            f"[{mode}] journal_mode={journal}, {args.readers} procese x {args.reader_threads} cititori, "
+            f"1 writer (import + audit), {args.request_writers} request writers, {el:.0f}s"
+        )
+        print(
+            f"  citiri    {ok['read'] / el:8.0f}/s  p50 {_pct(latencies, 0.50) * 1000:.1f} ms  "
+            f"p99 {_pct(latencies, 0.99) * 1000:.1f} ms  max {max(latencies, default=0) * 1000:.0f} ms  erori {errors['read']}"
+        )
+        for kind in ("import", "audit", "request"):
+            print(f"  {kind:<8}  {ok[kind]:8d} ok  erori {errors[kind]}")
+        for kind, msg in last_error.items():
+            print(f"  ultima eroare {kind}: {msg}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Fake SMSAPI (local) pentru testare end-to-end și load-test pe calea de trimitere SMS.
+
+Implementează:
+- POST /sms.do   (to=a,b,c, message, from, format=json) -> {"count", "list": [{"id", "points", "number", ...}]}
+- GET  /profile  -> {"points": ...}
+- /stats         -> contoare fake (cereri, mesaje, 429, erori) pentru verificare după un test.
+
+Comportament configurabil:
+- --latency-ms / --jitter-ms : întârziere per cerere (uniform latency ± jitter).
+- --error-rate               : fracțiune de cereri sms.do care întorc eroare SMSAPI (JSON "error").
+- --rate-limit               : cereri/sec acceptate (token bucket); peste => 429 + Retry-After.
+- --throttle-rate            : fracțiune de cereri care primesc 429 aleator (independent de rate-limit).
+- --dlr-url                  : dacă e setat, trimite rapoarte de livrare (DLR) către app după --dlr-delay-ms.
+
+Usage (from repo root):
+  python scripts/dev/fake_smsapi.py --port 8025 --latency-ms 120 --jitter-ms 40 --error-rate 0.01 --rate-limit 50
+  # în .env / mediul aplicației:
+  SMSAPI_BASE_URL=http://127.0.0.1:8025
+
+Debug:
+  - Token-ul nu e validat (orice Bearer e acceptat); lipsa header-ului Authorization => 401.
+  - Numerele sunt normalizate ca la SMSAPI (prefix 40), ca maparea pe phone_key să fie exercitată.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.token_bucket import TokenBucket  # noqa: E402
+
+POINTS_PER_SMS = 0.16
+
+
+class FakeState:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.lock = threading.Lock()
+        self.bucket = TokenBucket(rate=args.rate_limit, capacity=max(1.0, args.rate_limit)) if args.rate_limit > 0 else None
+        self.points = args.points
+        self.seq = 0
+        self.counters = {"requests": 0, "messages": 0, "throttled": 0, "errors": 0, "profile": 0}
+
+    def next_id(self) -> str:
+        with self.lock:
+            self.seq += 1
+            return f"fake{self.seq:012d}"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[key] += n
+
+    def take_rate_token(self) -> float:
+        """
+        0 dacă cererea e acceptată, altfel secunde până la următorul token (Retry-After).
+        """
+        if self.bucket is None:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            if self.bucket.try_take(1.0, now):
+                return 0.0
+            return max(0.001, self.bucket.seconds_until(1.0, now))
+
+
+def _normalize_number(raw: str) -> str:
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if digits.startswith("0"):
+        digits = "4" + digits
+    return digits
+
+
+def _send_dlr(url: str, delay: float, msg_ids: list) -> None:
+    time.sleep(delay)
+    data = urllib.parse.urlencode(
+        {
+            "MsgId": ",".join(msg_ids),
+            "status": ",".join("404" for _ in msg_ids),
+            "status_name": ",".join("DELIVERED" for _ in msg_ids),
+            "done_date": ",".join(str(int(time.time())) for _ in msg_ids),
+        }
+    ).encode()
+    try:
+        urllib.request.urlopen(urllib.request.Request(url, data=data, method="POST"), timeout=10).read()
+    except Exception as exc:
+        print(f"[fake-smsapi] DLR eșuat: {exc}", file=sys.stderr)
+
+
+def make_handler(state: FakeState):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *a):  # noqa: N802
+            if args.verbose:
+                super().log_message(fmt, *a)
+
+        def _json(self, code: int, payload: dict, headers: dict | None = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _delay(self) -> None:
+            ms = args.latency_ms + random.uniform(-args.jitter_ms, args.jitter_ms)
+            if ms > 0:
+                time.sleep(ms / 1000.0)
+
+        def _authorized(self) -> bool:
+            if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+                self._json(401, {"error": 101, "message": "Authorization failed"})
+                return False
+            return True
+
+        def do_GET(self):  # noqa: N802
+            path = urllib.parse.urlparse(self.path).path
+            if path == "/stats":
+                with state.lock:
+                    self._json(200, dict(state.counters, points=round(state.points, 2)))
+                return
+            if path != "/profile":
+                self._json(404, {"error": 404, "message": "Not found"})
+                return
+            if not self._authorized():
+                return
+            state.count("profile")
+            self._delay()
+            with state.lock:
+                points = round(state.points, 2)
+            self._json(200, {"points": points, "username": "fake", "name": "Fake SMSAPI"})
+
+        def do_POST(self):  # noqa: N802
+            path = urllib.parse.urlparse(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            form = urllib.parse.parse_qs(self.rfile.read(length).decode() if length else "")
+            if path != "/sms.do":
+                self._json(404, {"error": 404, "message": "Not found"})
+                return
+            if not self._authorized():
+                return
+
+            state.count("requests")
+            retry_after = state.take_rate_token()
+            if not retry_after and args.throttle_rate > 0 and random.random() < args.throttle_rate:
+                retry_after = 1.0
+            if retry_after:
+                state.count("throttled")
+                self._json(429, {"error": 429, "message": "Too many requests"}, {"Retry-After": f"{retry_after:.3f}"})
+                return
+
+            self._delay()
+
+            if args.error_rate > 0 and random.random() < args.error_rate:
+                state.count("errors")
+                self._json(200, {"error": 8, "message": "Error in request (fake)"})
+                return
+
+            numbers = [n for n in (form.get("to", [""])[0]).split(",") if n.strip()]
+            if not numbers or not form.get("message"):
+                self._json(200, {"error": 13, "message": "No correct phone numbers or empty message"})
+                return
+
+            now = int(time.time())
+            items = []
+            for raw in numbers:
+                items.append(
+                    {
+                        "id": state.next_id(),
+                        "points": POINTS_PER_SMS,
+                        "number": _normalize_number(raw),
+                        "submitted_number": raw,
+                        "date_sent": now,
+                        "status": "QUEUE",
+                        "error": None,
+                        "idx": None,
+                    }
+                )
+            state.count("messages", len(items))
+            with state.lock:
+                state.points -= POINTS_PER_SMS * len(items)
+
+            if args.dlr_url:
+                threading.Thread(
+                    target=_send_dlr,
+                    args=(args.dlr_url, args.dlr_delay_ms / 1000.0, [i["id"] for i in items]),
+                    daemon=True,
+                ).start()
+
+            self._json(200, {"count": len(items), "list": items})
+
+    return Handler
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Fake SMSAPI pentru dezvoltare locală și load-test.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8025)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--jitter-ms", type=float, default=20.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="0..1, erori SMSAPI (JSON error).")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="0..1, 429 aleator.")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="Cereri sms.do/sec acceptate (0 = nelimitat).")
+    ap.add_argument("--points", type=float, default=100000.0, help="Sold inițial (points).")
+    ap.add_argument("--dlr-url", default="", help="Ex: http://127.0.0.1:8000/api/sms/callback/dlr?key=...")
+    ap.add_argument("--dlr-delay-ms", type=float, default=500.0)
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    state = FakeState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(
+        f"[fake-smsapi] http://{args.host}:{args.port} latency={args.latency_ms}±{args.jitter_ms}ms "
+        f"error_rate={args.error_rate} throttle_rate={args.throttle_rate} rate_limit={args.rate_limit or '∞'}/s"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fake SMTP (local) pentru testarea outbox-ului de email (app/services/email_sender.py).
+
+Implementează (minimal, fără TLS):
+- EHLO / HELO (anunță AUTH PLAIN LOGIN), AUTH PLAIN / LOGIN (orice credențiale sunt acceptate),
+  MAIL FROM, RCPT TO, DATA, RSET, NOOP, QUIT.
+- Contoare la fiecare mesaj / conexiune închisă: conexiuni, AUTH-uri, mesaje, eșecuri simulate.
+  Un outbox care refolosește conexiunea => "connections" rămâne mic în timp ce "messages" crește.
+
+Comportament configurabil:
+- --latency-ms    : întârziere înainte de răspunsul la DATA (cât "durează" acceptarea mesajului).
+- --fail-rate     : fracțiune de mesaje respinse temporar (451 la DATA) => outbox-ul reîncearcă cu backoff.
+- --reject-rate   : fracțiune de destinatari respinși definitiv (550 la RCPT) => outbox-ul marchează 'failed'.
+- --idle-timeout  : închide conexiunile inactive după N secunde (421), ca serverele reale => reconectare.
+- --maildir       : scrie fiecare mesaj acceptat ca .eml în director.
+
+Usage (from repo root):
+  python scripts/dev/fake_smtp.py --port 2525 --latency-ms 80 --fail-rate 0.1
+  # în .env / mediul aplicației:
+  SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_TLS=false SMTP_USER=dev SMTP_PASSWORD=dev SMTP_FROM=noreply@localhost
+
+Debug:
+  - SMTP_TLS=true nu merge aici (STARTTLS nu e implementat) => 502 la STARTTLS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+class FakeState:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.counters = {"connections": 0, "auth": 0, "messages": 0, "temp_failed": 0, "rejected": 0, "idle_closed": 0}
+
+    def count(self, key: str, n: int = 1) -> int:
+        with self.lock:
+            self.counters[key] += n
+            return self.counters[key]
+
+    def next_id(self) -> int:
+        with self.lock:
+            self.seq += 1
+            return self.seq
+
+    def summary(self) -> str:
+        with self.lock:
+            return " ".join(f"{k}={v}" for k, v in self.counters.items())
+
+
+def make_handler(state: FakeState):
+    args = state.args
+
+    class Handler(socketserver.StreamRequestHandler):
+        timeout = args.idle_timeout or None
+
+        def _reply(self, line: str) -> None:
+            self.wfile.write((line + "\r\n").encode())
+            self.wfile.flush()
+
+        def _readline(self) -> str | None:
+            try:
+                raw = self.rfile.readline(65536)
+            except TimeoutError:
+                state.count("idle_closed")
+                self._reply("421 4.4.2 Idle timeout, closing connection")
+                return None
+            if not raw:
+                return None
+            return raw.decode("utf-8", "replace").rstrip("\r\n")
+
+        def _read_data(self) -> bytes | None:
+            lines = []
+            while True:
+                raw = self.rfile.readline(1 << 20)
+                if not raw:
+                    return None
+                if raw in (b".\r\n", b".\n"):
+                    return b"".join(lines)
+                lines.append(raw[1:] if raw.startswith(b"..") else raw)
+
+        def handle(self) -> None:
+            conn_no = state.count("connections")
+            messages = 0
+            mail_from, rcpts = None, []
+            self._reply("220 fake-smtp ESMTP ready")
+            while True:
+                line = self._readline()
+                if line is None:
+                    break
+                cmd, _, rest = line.partition(" ")
+                cmd = cmd.upper()
+
+                if cmd == "EHLO":
+                    self._reply("250-fake-smtp")
+                    self._reply("250-AUTH PLAIN LOGIN")
+                    self._reply("250-8BITMIME")
+                    self._reply("250 SIZE 10485760")
+                elif cmd == "HELO":
+                    self._reply("250 fake-smtp")
+                elif cmd == "AUTH":
+                    mech, _, initial = rest.partition(" ")
+                    if mech.upper() == "LOGIN":
+                        if not initial:
+                            self._reply("334 VXNlcm5hbWU6")
+                            self._readline()
+                        self._reply("334 UGFzc3dvcmQ6")
+                        self._readline()
+                    elif mech.upper() == "PLAIN" and not initial:
+                        self._reply("334 ")
+                        self._readline()
+                    state.count("auth")
+                    self._reply("235 2.7.0 Authentication successful")
+                elif cmd == "MAIL":
+                    mail_from, rcpts = rest.partition(":")[2].strip(), []
+                    self._reply("250 2.1.0 OK")
+                elif cmd == "RCPT":
+                    if args.reject_rate > 0 and random.random() < args.reject_rate:
+                        state.count("rejected")
+                        self._reply("550 5.1.1 Mailbox unavailable (fake)")
+                        continue
+                    rcpts.append(rest.partition(":")[2].strip())
+                    self._reply("250 2.1.5 OK")
+                elif cmd == "DATA":
+                    if not mail_from or not rcpts:
+                        self._reply("503 5.5.1 Bad sequence of commands")
+                        continue
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = self._read_data()
+                    if data is None:
+                        break
+                    if args.latency_ms > 0:
+                        time.sleep(args.latency_ms / 1000.0)
+                    if args.fail_rate > 0 and random.random() < args.fail_rate:
+                        state.count("temp_failed")
+                        self._reply("451 4.3.0 Temporary failure (fake)")
+                    else:
+                        msg_id = state.next_id()
+                        total = state.count("messages")
+                        messages += 1
+                        if args.maildir:
+                            Path(args.maildir, f"{msg_id:08d}.eml").write_bytes(data)
+                        self._reply(f"250 2.0.0 OK queued as fake{msg_id:08d}")
+                        if args.verbose:
+                            print(f"[fake-smtp] conn #{conn_no} msg #{total} -> {', '.join(rcpts)}")
+                    mail_from, rcpts = None, []
+                elif cmd == "RSET":
+                    mail_from, rcpts = None, []
+                    self._reply("250 2.0.0 OK")
+                elif cmd == "NOOP":
+                    self._reply("250 2.0.0 OK")
+                elif cmd == "QUIT":
+                    self._reply("221 2.0.0 Bye")
+                    break
+                else:
+                    self._reply("502 5.5.2 Command not implemented")
+
+            print(f"[fake-smtp] conn #{conn_no} închisă după {messages} mesaje | {state.summary()}")
+
+    return Handler
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Fake SMTP pentru dezvoltare locală (outbox email).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=2525)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="0..1, 451 temporar la DATA.")
+    ap.add_argument("--reject-rate", type=float, default=0.0, help="0..1, 550 definitiv la RCPT.")
+    ap.add_argument("--idle-timeout", type=float, default=0.0, help="Secunde; 0 = conexiunile nu expiră.")
+    ap.add_argument("--maildir", default="", help="Director pentru mesajele acceptate (.eml).")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    if args.maildir:
+        Path(args.maildir).mkdir(parents=True, exist_ok=True)
+
+    state = FakeState(args)
+    server = Server((args.host, args.port), make_handler(state))
+    print(
+        f"[fake-smtp] smtp://{args.host}:{args.port} latency={args.latency_ms}ms fail_rate={args.fail_rate} "
+        f"reject_rate={args.reject_rate} idle_timeout={args.idle_timeout or '∞'}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[fake-smtp] final | {state.summary()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
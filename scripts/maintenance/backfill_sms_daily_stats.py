@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Recalculează rollup-ul zilnic SMS (sms_daily_stats) din sms_logs.
+
+Când:
+- o singură dată după introducerea tabelului (istoricul existent nu are rollup);
+- dacă totalurile din dashboard diferă de sms_logs (ex. restore parțial de DB).
+
+Cum:
+- per tenant, într-o singură tranzacție: DELETE rollup + INSERT ... SELECT grupat pe (zi UTC, PNK).
+- tot calculul rulează în DB; nu încărcăm rânduri sms_logs în Python.
+- numără doar status 'success' / 'error' (ca record_sms_results); NULL (legacy / în curs) nu intră.
+
+Usage (from repo root):
+  python scripts/maintenance/backfill_sms_daily_stats.py            # toți tenanții
+  python scripts/maintenance/backfill_sms_daily_stats.py --user-id 7
+  python scripts/maintenance/backfill_sms_daily_stats.py --dry-run  # doar numără
+
+Debug:
+  - Rulează cu trimiterile SMS oprite: un SMS trimis în timpul recalculării tenantului
+    poate fi numărat de două ori sau deloc.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import and_, case, delete, func, select  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Order, SmsDailyStat, SmsLog  # noqa: E402
+
+
+def _rollup_select(user_id: int):
+    return (
+        select(
+            SmsLog.user_id,
+            func.date(SmsLog.created_at).label("day"),
+            func.coalesce(Order.pnk, "").label("pnk"),
+            func.sum(case((SmsLog.status == "success", 1), else_=0)).label("success_count"),
+            func.sum(case((SmsLog.status == "error", 1), else_=0)).label("error_count"),
+            func.max(SmsLog.created_at).label("last_sent_at"),
+        )
+        .join(Order, and_(SmsLog.order_id == Order.id, SmsLog.user_id == Order.user_id))
+        .where(
+            SmsLog.user_id == user_id,
+            SmsLog.created_at.is_not(None),
+            SmsLog.status.in_(("success", "error")),
+        )
+        .group_by(SmsLog.user_id, func.date(SmsLog.created_at), func.coalesce(Order.pnk, ""))
+    )
+
+
+def backfill_user(db, user_id: int, dry_run: bool) -> int:
+    sel = _rollup_select(user_id)
+    if dry_run:
+        return db.execute(select(func.count()).select_from(sel.subquery())).scalar() or 0
+
+    table = SmsDailyStat.__table__
+    db.execute(delete(table).where(table.c.user_id == user_id))
+    res = db.execute(
+        table.insert().from_select(
+            ["user_id", "day", "pnk", "success_count", "error_count", "last_sent_at"],
+            sel,
+        )
+    )
+    db.commit()
+    return res.rowcount or 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Backfill sms_daily_stats din sms_logs.")
+    ap.add_argument("--user-id", type=int, default=None, help="Doar acest tenant (implicit: toți).")
+    ap.add_argument("--dry-run", action="store_true", help="Doar numără rândurile de rollup rezultate.")
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[SmsDailyStat.__table__])
+
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        else:
+            user_ids = [uid for (uid,) in db.execute(select(SmsLog.user_id).distinct()).all()]
+
+        total = 0
+        for uid in user_ids:
+            n = backfill_user(db, uid, args.dry_run)
+            total += n
+            print(f"user_id={uid}: {n} rânduri rollup" + (" (dry-run)" if args.dry_run else ""))
+        print(f"Total: {total} rânduri rollup pentru {len(user_ids)} tenanți.")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Calibrează parametrii Argon2 (ARGON2_TIME_COST / ARGON2_MEMORY_COST / ARGON2_PARALLELISM) pe host-ul curent.
+
+De ce:
+- staging și prod au CPU / RAM diferite; parametrii default passlib dau latențe de login foarte diferite.
+- rulăm benchmark-ul cu CONCURENȚA reală (câte hash-uri rulează simultan pe box), pentru că Argon2
+  e limitat de lățimea de bandă a memoriei: latența la 1 hash ≠ latența la 8 hash-uri în paralel.
+
+Cum alege:
+- memoria per hash <= --max-memory-mb / --concurrency (bugetul de RAM al box-ului pentru hashing);
+- pentru fiecare memorie candidată (descrescător) caută cel mai mare time_cost cu p50 <= --target-ms;
+- prima combinație care respectă minimul OWASP (>= 46 MiB cu t>=1 sau >= 19 MiB cu t>=2) câștigă;
+- parallelism = 1 implicit: concurența vine din pool-ul de procese (PASSWORD_HASH_WORKERS), nu din lane-uri.
+
+Usage (from repo root, pe host-ul țintă, cu aplicația oprită sau în afara vârfului):
+  python scripts/maintenance/calibrate_argon2.py --target-ms 250 --concurrency 4 --max-memory-mb 512
+  python scripts/maintenance/calibrate_argon2.py --target-ms 250 --concurrency 4 --write .env
+  # concurrency = workeri uvicorn × PASSWORD_HASH_WORKERS
+
+După --write: restart aplicație. Hash-urile existente se rehash-uiesc la următorul login;
+  python scripts/maintenance/password_schemes.py report  => "Parametri Argon2 vechi".
+
+Debug:
+  - "Ținta nu poate fi atinsă": host-ul e prea lent pentru target la concurența dată;
+    se scrie minimul OWASP (latența reală e afișată) — crește --target-ms sau scade concurența.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# memorie candidată (KiB), descrescător; 19 MiB / 46 MiB = praguri OWASP
+MEMORY_CANDIDATES_KIB = [262144, 131072, 65536, 47104, 19456]
+MAX_TIME_COST = 10
+
+
+def _min_time_cost(memory_kib: int) -> int:
+    return 1 if memory_kib >= 47104 else 2
+
+
+def _hash_once(time_cost: int, memory_kib: int, parallelism: int) -> float:
+    from passlib.hash import argon2
+
+    hasher = argon2.using(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    t0 = time.perf_counter()
+    hasher.hash("calibrate-argon2-password")
+    return time.perf_counter() - t0
+
+
+def measure(pool: ProcessPoolExecutor, concurrency: int, samples: int, time_cost: int, memory_kib: int, parallelism: int) -> float:
+    """
+    p50 (ms) pentru un hash, cu `concurrency` hash-uri rulând simultan.
+    """
+    latencies = []
+    for _ in range(samples):
+        futures = [pool.submit(_hash_once, time_cost, memory_kib, parallelism) for _ in range(concurrency)]
+        latencies.extend(f.result() for f in futures)
+    return statistics.median(latencies) * 1000.0
+
+
+def calibrate(args) -> tuple:
+    budget_kib = int(args.max_memory_mb * 1024 / args.concurrency)
+    candidates = [m for m in MEMORY_CANDIDATES_KIB if m <= budget_kib] or [MEMORY_CANDIDATES_KIB[-1]]
+    print(f"Buget memorie per hash: {budget_kib // 1024} MiB (concurență {args.concurrency}); țintă p50 {args.target_ms:.0f} ms")
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=ctx) as pool:
+        measure(pool, args.concurrency, 1, 1, candidates[-1], args.parallelism)  # warmup (spawn + import)
+
+        for memory_kib in candidates:
+            best = None
+            for time_cost in range(_min_time_cost(memory_kib), MAX_TIME_COST + 1):
+                p50 = measure(pool, args.concurrency, args.samples, time_cost, memory_kib, args.parallelism)
+                print(f"  m={memory_kib // 1024:>3} MiB t={time_cost:<2} p={args.parallelism} => p50 {p50:7.1f} ms")
+                if p50 > args.target_ms:
+                    break
+                best = (time_cost, memory_kib, p50)
+            if best:
+                return best + (True,)
+
+        memory_kib = MEMORY_CANDIDATES_KIB[-1]
+        time_cost = _min_time_cost(memory_kib)
+        p50 = measure(pool, args.concurrency, args.samples, time_cost, memory_kib, args.parallelism)
+        return time_cost, memory_kib, p50, False
+
+
+def write_env(path: Path, values: dict) -> None:
+    """
+    Actualizează / adaugă cheile în fișierul .env, păstrând restul liniilor neschimbate.
+    """
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    pending = dict(values)
+    out = []
+    for line in lines:
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            out.append(f"{key}={pending.pop(key)}")
+        else:
+            out.append(line)
+    if pending:
+        out.append("# Argon2 calibrat cu scripts/maintenance/calibrate_argon2.py")
+        out.extend(f"{k}={v}" for k, v in pending.items())
+    path.write_text("\n".join(out) + "\n", encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Calibrare parametri Argon2 pentru host-ul curent.")
+    ap.add_argument("--target-ms", type=float, default=250.0, help="Latență p50 țintă per hash, sub concurență.")
+    ap.add_argument("--concurrency", type=int, default=2, help="Hash-uri simultane (workeri uvicorn × PASSWORD_HASH_WORKERS).")
+    ap.add_argument("--max-memory-mb", type=float, default=512.0, help="RAM total alocat hashing-ului simultan.")
+    ap.add_argument("--parallelism", type=int, default=1)
+    ap.add_argument("--samples", type=int, default=3, help="Runde de măsurare per combinație.")
+    ap.add_argument("--write", default="", help="Fișier .env de actualizat (ex. .env). Fără => doar afișează.")
+    args = ap.parse_args()
+    args.concurrency = max(1, args.concurrency)
+    args.parallelism = max(1, args.parallelism)
+    args.samples = max(1, args.samples)
+
+    time_cost, memory_kib, p50, met = calibrate(args)
+    values = {
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_MEMORY_COST": memory_kib,
+        "ARGON2_PARALLELISM": args.parallelism,
+    }
+    if not met:
+        print(f"Ținta nu poate fi atinsă: minimul OWASP dă p50 {p50:.1f} ms la concurența {args.concurrency}.")
+    print(f"Ales: t={time_cost} m={memory_kib} KiB p={args.parallelism} (p50 {p50:.1f} ms)")
+    for k, v in values.items():
+        print(f"{k}={v}")
+
+    if args.write:
+        write_env(Path(args.write), values)
+        print(f"Scris în {args.write}. Restart aplicația; hash-urile vechi se rehash-uiesc la login.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
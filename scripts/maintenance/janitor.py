@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Janitor: șterge în loturi tokenurile expirate / folosite / revocate, cheile rate-limit inactive,
+rezervările de cotă decontate și emailurile trimise din outbox (vezi app/services/janitor.py).
+
+Aceeași rutină rulează și în aplicație (thread per worker, JANITOR_INTERVAL_SECONDS); scriptul e pentru
+cron (cu JANITOR_INTERVAL_SECONDS=0 în app) sau rulare manuală după o perioadă lungă fără curățenie.
+
+Usage (from repo root):
+  python scripts/maintenance/janitor.py --dry-run            # câte rânduri s-ar șterge
+  python scripts/maintenance/janitor.py                      # o rulare (JANITOR_MAX_BATCHES loturi per criteriu)
+  python scripts/maintenance/janitor.py --max-batches 0 --pause-ms 50   # până la capăt, cu pauză
+  */15 * * * * cd /opt/smssend && venv/bin/python scripts/maintenance/janitor.py --quiet
+
+Setări (.env):
+  JANITOR_GRACE_HOURS (24), JANITOR_BATCH_SIZE (500), JANITOR_MAX_BATCHES (50), JANITOR_PAUSE_MS (20)
+
+Debug:
+  - "incomplet" la final => s-a atins --max-batches; restul se șterge la rularea următoare.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.database import WriteSessionLocal  # noqa: E402
+from app.services.janitor import run_janitor  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Curățenie tokenuri expirate / chei rate-limit inactive.")
+    ap.add_argument("--dry-run", action="store_true", help="Doar numără, nu șterge.")
+    ap.add_argument("--grace-hours", type=int, default=None, help="Implicit JANITOR_GRACE_HOURS.")
+    ap.add_argument("--batch-size", type=int, default=0, help="Implicit JANITOR_BATCH_SIZE.")
+    ap.add_argument("--max-batches", type=int, default=None, help="Per criteriu; 0 = până la capăt. Implicit JANITOR_MAX_BATCHES.")
+    ap.add_argument("--pause-ms", type=float, default=None, help="Pauză între loturi. Implicit JANITOR_PAUSE_MS.")
+    ap.add_argument("--quiet", action="store_true", help="Fără output dacă nu s-a șters nimic (cron).")
+    args = ap.parse_args()
+
+    db = WriteSessionLocal()
+    try:
+        res = run_janitor(
+            db,
+            grace_hours=args.grace_hours,
+            batch_size=args.batch_size or None,
+            max_batches=args.max_batches,
+            pause_seconds=None if args.pause_ms is None else args.pause_ms / 1000.0,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+
+    if args.quiet and not res.total_deleted and not res.expired_reservations:
+        return 0
+
+    verb = "de șters" if res.dry_run else "șterse"
+    print(f"Cutoff {res.cutoff:%Y-%m-%d %H:%M} UTC ({'dry-run' if res.dry_run else f'{res.batches} loturi'}, {res.duration_seconds:.2f}s)")
+    for name, n in res.deleted.items():
+        print(f"  {name:<40} {n:>8} {verb}")
+    if not res.dry_run:
+        print(f"  {'sms_quota_reservations:pending->expired':<40} {res.expired_reservations:>8}")
+    print(f"Total: {res.total_deleted} {verb}")
+    if res.incomplete:
+        print(f"Incomplet (max-batches atins): {', '.join(res.incomplete)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
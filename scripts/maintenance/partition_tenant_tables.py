@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Partiționare PostgreSQL pe user_id pentru orders + sms_logs (app/services/partitioning.py).
+
+Comenzi:
+  apply        migrează tabelele existente la tabele partiționate (o tranzacție, lock exclusiv):
+                 --hash-partitions N         PARTITION BY HASH (user_id), N partiții
+                 --dedicated 12,34           tenanții mari în partiții proprii (LIST), restul în
+                                             _default sub-partiționată HASH în N
+                 --drop-old                  șterge orders_unpartitioned / sms_logs_unpartitioned
+  add-tenant   mută un tenant în partiție dedicată (doar layout list)
+  verify       EXPLAIN pe query-urile tenant-scoped => exit 1 dacă vreun plan atinge > 1 partiție / tabel
+  status       partițiile și rândurile estimate (reltuples)
+
+Usage (from repo root):
+  python scripts/maintenance/partition_tenant_tables.py apply --hash-partitions 16 --dry-run
+  python scripts/maintenance/partition_tenant_tables.py apply --hash-partitions 16 --dedicated 12,34
+  python scripts/maintenance/partition_tenant_tables.py verify
+  python scripts/maintenance/partition_tenant_tables.py add-tenant --user-id 56
+  # după ce aplicația rulează ok pe tabelele noi:
+  psql -c "DROP TABLE sms_logs_unpartitioned; DROP TABLE orders_unpartitioned;"
+
+Debug:
+  - --dry-run afișează SQL-ul fără să-l ruleze (catalogul e citit, deci cere conexiune).
+  - verify fără --user-id: primii 5 useri + tenanții cu partiție dedicată.
+  - Rollback după apply (înainte de --drop-old): în aceeași tranzacție
+      DROP TABLE sms_logs, orders; ALTER TABLE orders_unpartitioned RENAME TO orders; (idem sms_logs)
+    + redenumirea indexurilor *_unpartitioned și ALTER SEQUENCE ... OWNED BY <tabel>.id.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.services.partitioning import (  # noqa: E402
+    add_tenant_sql,
+    apply_sql,
+    dedicated_tenants,
+    partitions,
+    run_sql,
+    verify_pruning,
+)
+
+
+def _ids(raw: str) -> list:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def _run(conn, statements, dry_run: bool) -> int:
+    for stmt in statements:
+        print(f"{stmt};")
+    if dry_run:
+        conn.rollback()
+        print("-- dry-run: nimic executat")
+        return 0
+    run_sql(conn, statements)
+    conn.commit()
+    print(f"-- OK: {len(statements)} comenzi executate")
+    return 0
+
+
+def cmd_apply(conn, args) -> int:
+    statements = apply_sql(
+        conn,
+        hash_partitions=args.hash_partitions,
+        dedicated_tenants=_ids(args.dedicated),
+        drop_old=args.drop_old,
+    )
+    return _run(conn, statements, args.dry_run)
+
+
+def cmd_add_tenant(conn, args) -> int:
+    return _run(conn, add_tenant_sql(conn, args.user_id), args.dry_run)
+
+
+def cmd_verify(conn, args) -> int:
+    user_ids = list(args.user_id or [])
+    if not user_ids:
+        user_ids = [uid for (uid,) in conn.execute(text("SELECT id FROM users ORDER BY id LIMIT 5")).all()]
+        user_ids += [uid for uid in dedicated_tenants(conn) if uid not in user_ids]
+    if not user_ids:
+        print("Niciun user în DB: dă --user-id.")
+        return 1
+
+    checks = verify_pruning(conn, user_ids)
+    for c in checks:
+        leaves = ", ".join(f"{t}: {'/'.join(v)}" for t, v in sorted(c.leaves.items())) or "-"
+        print(f"{'OK  ' if c.ok else 'FAIL'} user {c.user_id:<6} {c.name:<40} {leaves}")
+    failed = [c for c in checks if not c.ok]
+    print(f"{len(checks) - len(failed)}/{len(checks)} planuri cu pruning")
+    return 1 if failed else 0
+
+
+def cmd_status(conn, args) -> int:
+    rows = partitions(conn)
+    if not rows:
+        print("orders / sms_logs nu sunt partiționate.")
+        return 0
+    for p in rows:
+        print(f"{p.table:<9} {p.partition:<28} {p.rows:>12}  {p.bound}" + (f"  (în {p.parent})" if p.parent != p.table else ""))
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Partiționare orders / sms_logs pe user_id (PostgreSQL).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_apply = sub.add_parser("apply")
+    p_apply.add_argument("--hash-partitions", type=int, default=16)
+    p_apply.add_argument("--dedicated", default="", help="user id-uri cu partiție proprie, separate prin virgulă.")
+    p_apply.add_argument("--drop-old", action="store_true", help="Șterge tabelele *_unpartitioned în aceeași tranzacție.")
+    p_apply.add_argument("--dry-run", action="store_true")
+
+    p_add = sub.add_parser("add-tenant")
+    p_add.add_argument("--user-id", type=int, required=True)
+    p_add.add_argument("--dry-run", action="store_true")
+
+    p_verify = sub.add_parser("verify")
+    p_verify.add_argument("--user-id", type=int, action="append")
+
+    sub.add_parser("status")
+
+    args = ap.parse_args()
+
+    with engine.connect() as conn:
+        try:
+            if args.cmd == "apply":
+                return cmd_apply(conn, args)
+            if args.cmd == "add-tenant":
+                return cmd_add_tenant(conn, args)
+            if args.cmd == "verify":
+                return cmd_verify(conn, args)
+            return cmd_status(conn, args)
+        except RuntimeError as exc:
+            print(f"OPRIT - {exc}")
+            return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
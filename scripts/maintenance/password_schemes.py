@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Raport / tag-uire pentru schema hash-urilor de parolă (users.password_scheme).
+
+Context:
+- "argon2+pepper" = schema curentă; "argon2" = legacy (fără pepper); NULL = netagat (cont vechi).
+- Login-ul face o singură verificare Argon2 pentru conturile tagate; cele netagate încearcă ambele variante
+  (2× CPU la parolă greșită) până la primul login reușit, când se tag-uiesc și, dacă sunt legacy, se rehash-uiesc.
+- Hash-urile legacy nu se pot migra offline (nu avem parola) => migrarea se face la login;
+  raportul arată câte au rămas.
+- `tag` pune DOAR "argon2+pepper", pe conturile netagate create după introducerea PASSWORD_PEPPER
+  (toate căile de hash de atunci folosesc pepper-ul). Conturile mai vechi rămân NULL: un reset de parolă
+  sau un rehash la schimbarea parametrilor Argon2 le-a putut da deja un hash peppered, deci data creării
+  nu spune schema => se tag-uiesc la primul login reușit.
+
+Usage (from repo root):
+  python scripts/maintenance/password_schemes.py report
+  python scripts/maintenance/password_schemes.py tag --created-after 2025-03-01 --dry-run
+  python scripts/maintenance/password_schemes.py tag --created-after 2025-03-01
+
+Debug:
+  - Un tag greșit blochează login-ul contului (verificarea nu mai încearcă și cealaltă schemă);
+    remediere: UPDATE users SET password_scheme = NULL WHERE id = ...; (revine la verificarea dublă).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import func, select, update  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.models import User  # noqa: E402
+from app.security import (  # noqa: E402
+    PASSWORD_SCHEME_LEGACY,
+    PASSWORD_SCHEME_PEPPERED,
+    current_password_scheme,
+    pwd_context,
+)
+
+
+def report(db, batch_size: int) -> int:
+    rows = db.execute(
+        select(User.password_scheme, func.count()).group_by(User.password_scheme)
+    ).all()
+    counts = {scheme or "netagat": int(n) for scheme, n in rows}
+    total = sum(counts.values())
+
+    # parametri Argon2 vechi (se rehash-uiesc la login); parcurgem pe loturi, doar parsare, fără verify
+    stale_params = 0
+    last_id = 0
+    while True:
+        batch = db.execute(
+            select(User.id, User.password_hash).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        for _, password_hash in batch:
+            try:
+                stale_params += 1 if pwd_context.needs_update(password_hash) else 0
+            except Exception:
+                pass
+
+    print(f"Schema curentă: {current_password_scheme()}")
+    print(f"Total conturi:  {total}")
+    for scheme in (PASSWORD_SCHEME_PEPPERED, PASSWORD_SCHEME_LEGACY, "netagat"):
+        print(f"  {scheme:<14} {counts.get(scheme, 0)}")
+    print(f"Parametri Argon2 vechi (rehash la login): {stale_params}")
+
+    remaining = counts.get("netagat", 0)
+    if current_password_scheme() != PASSWORD_SCHEME_LEGACY:
+        remaining += counts.get(PASSWORD_SCHEME_LEGACY, 0)
+    print(f"De migrat (legacy + netagate): {remaining}")
+    return remaining
+
+
+def tag(db, created_after: datetime, batch_size: int, dry_run: bool) -> int:
+    scheme = PASSWORD_SCHEME_PEPPERED
+    cond = [User.password_scheme.is_(None), User.created_at >= created_after]
+
+    if dry_run:
+        n = db.execute(select(func.count()).select_from(User).where(*cond)).scalar() or 0
+        print(f"{n} conturi netagate ar primi schema {scheme} (dry-run)")
+        return n
+
+    total = 0
+    while True:
+        ids = [uid for (uid,) in db.execute(select(User.id).where(*cond).order_by(User.id).limit(batch_size)).all()]
+        if not ids:
+            break
+        db.execute(update(User).where(User.id.in_(ids)).values(password_scheme=scheme))
+        db.commit()
+        total += len(ids)
+    print(f"{total} conturi tag-uite cu {scheme}")
+    return total
+
+
+def _date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Raport / tag-uire schema hash-urilor de parolă.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_report = sub.add_parser("report", help="Câte hash-uri sunt peppered / legacy / netagate.")
+    p_report.add_argument("--batch-size", type=int, default=1000)
+    p_report.add_argument(
+        "--fail-if-remaining", action="store_true", help="Exit 1 dacă mai există hash-uri de migrat (pentru cron/CI)."
+    )
+
+    p_tag = sub.add_parser(
+        "tag", help="Tag-uiește argon2+pepper conturile netagate create după introducerea pepper-ului."
+    )
+    p_tag.add_argument(
+        "--created-after", type=_date, required=True, help="ISO, data de la care PASSWORD_PEPPER e activ (ex. 2025-03-01)."
+    )
+    p_tag.add_argument("--batch-size", type=int, default=1000)
+    p_tag.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cmd == "report":
+            remaining = report(db, max(1, args.batch_size))
+            return 1 if args.fail_if_remaining and remaining else 0
+
+        tag(db, args.created_after, max(1, args.batch_size), args.dry_run)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Retenție sms_logs / audit_logs: arhivă lunară (JSONL gzip) + ștergere în loturi.
+
+Comenzi:
+  status            câte rânduri depășesc fereastra de retenție, pe tabel și lună
+  purge             arhivează + șterge (loturi de RETENTION_BATCH_SIZE, o tranzacție per lot)
+  backfill-history  populează sms_send_history din sms_logs (o dată, după deploy; idempotent)
+
+Usage (from repo root):
+  python scripts/maintenance/retention.py status
+  python scripts/maintenance/retention.py backfill-history
+  python scripts/maintenance/retention.py purge --table audit_logs --pause-ms 50
+  python scripts/maintenance/retention.py purge --max-batches 20      # cron frecvent, muncă limitată
+
+Setări (.env):
+  SMS_LOG_RETENTION_DAYS, AUDIT_LOG_RETENTION_DAYS (0 = păstrăm tot),
+  RETENTION_ARCHIVE_DIR (implicit ./data/archive), RETENTION_BATCH_SIZE (implicit 1000)
+
+Debug:
+  - "sms_send_history nu acoperă sms_logs" => rulează întâi backfill-history.
+  - Verificare arhivă: zcat data/archive/audit_logs/audit_logs-2024-01.jsonl.gz | head
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services.retention import (  # noqa: E402
+    RETENTION_TABLES,
+    backfill_send_history,
+    pending_by_month,
+    purge_table,
+    retention_days,
+)
+
+
+def _tables(arg: str) -> list:
+    return list(RETENTION_TABLES) if arg == "all" else [arg]
+
+
+def cmd_status(db, args) -> int:
+    for table in _tables(args.table):
+        res = pending_by_month(db, table)
+        days = retention_days(table)
+        if res.cutoff is None:
+            print(f"{table}: retenție dezactivată (0 zile)")
+            continue
+        total = sum(res.per_month.values())
+        print(f"{table}: retenție {days} zile, cutoff {res.cutoff:%Y-%m-%d %H:%M} UTC, {total} rânduri de purjat")
+        for month, n in res.per_month.items():
+            print(f"  {month}: {n}")
+    return 0
+
+
+def cmd_purge(db, args) -> int:
+    rc = 0
+    for table in _tables(args.table):
+        try:
+            res = purge_table(
+                db,
+                table,
+                archive=not args.no_archive,
+                batch_size=args.batch_size or None,
+                max_batches=args.max_batches,
+                pause_seconds=args.pause_ms / 1000.0,
+            )
+        except RuntimeError as exc:
+            print(f"{table}: OPRIT - {exc}")
+            rc = 1
+            continue
+        if res.cutoff is None:
+            print(f"{table}: retenție dezactivată (0 zile)")
+            continue
+        print(
+            f"{table}: arhivate {res.archived}, șterse {res.deleted} în {res.batches} loturi "
+            f"(cutoff {res.cutoff:%Y-%m-%d %H:%M} UTC)"
+        )
+        for f in res.files:
+            print(f"  arhivă: {f}")
+    return rc
+
+
+def cmd_backfill(db, args) -> int:
+    n = backfill_send_history(db, user_id=args.user_id)
+    print(f"sms_send_history: {n} perechi (telefon, PNK) scrise/actualizate")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Retenție sms_logs / audit_logs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_status = sub.add_parser("status")
+    p_status.add_argument("--table", choices=["all", *RETENTION_TABLES], default="all")
+
+    p_purge = sub.add_parser("purge")
+    p_purge.add_argument("--table", choices=["all", *RETENTION_TABLES], default="all")
+    p_purge.add_argument("--batch-size", type=int, default=0, help="Implicit RETENTION_BATCH_SIZE.")
+    p_purge.add_argument("--max-batches", type=int, default=0, help="0 = până la capăt.")
+    p_purge.add_argument("--pause-ms", type=float, default=0.0, help="Pauză între loturi.")
+    p_purge.add_argument("--no-archive", action="store_true", help="Șterge fără arhivă (atenție!).")
+
+    p_backfill = sub.add_parser("backfill-history")
+    p_backfill.add_argument("--user-id", type=int, default=None)
+
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.cmd == "status":
+            return cmd_status(db, args)
+        if args.cmd == "purge":
+            return cmd_purge(db, args)
+        return cmd_backfill(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())